@@ -0,0 +1,228 @@
+"""
+Archivo de la bitácora: los meses viejos salen de la base de datos a archivos JSON Lines
+comprimidos (zstd si está instalado `zstandard`, si no gzip), uno o más segmentos por mes.
+
+Los archivos nunca se modifican: cada corrida agrega segmentos nuevos y una línea por
+segmento en manifest.jsonl con el número de filas, rango de ids y su SHA-256.
+"""
+import gzip
+import hashlib
+import io
+import json
+import os
+from datetime import datetime, date
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from .models import AuditLog
+from .partitions import month_start, add_months, partition_name, is_partitioned
+from .serializers import AuditLogSerializer
+
+try:
+    import zstandard
+except ImportError:  # Dependencia opcional: sin ella los segmentos se comprimen con gzip
+    zstandard = None
+
+MANIFEST = 'manifest.jsonl'
+DEFAULT_BATCH_SIZE = 5000
+
+
+def archive_dir():
+    return getattr(settings, 'AUDIT_ARCHIVE_DIR', os.path.join(settings.BASE_DIR, 'archive', 'auditlog'))
+
+
+def month_key(day):
+    return f"{day.year}-{day.month:02d}"
+
+
+def _month_bounds(month):
+    start = timezone.make_aware(datetime.combine(month, datetime.min.time()))
+    end = timezone.make_aware(datetime.combine(add_months(month, 1), datetime.min.time()))
+    return start, end
+
+
+# --- Manifiesto ---
+
+def read_manifest():
+    path = os.path.join(archive_dir(), MANIFEST)
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _append_manifest(entry):
+    with open(os.path.join(archive_dir(), MANIFEST), 'a', encoding='utf-8') as f:
+        f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def archived_months():
+    return sorted({entry['month'] for entry in read_manifest()})
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def verify_archive():
+    """Devuelve la lista de segmentos cuyo archivo falta o no coincide con su SHA-256."""
+    broken = []
+    for entry in read_manifest():
+        path = os.path.join(archive_dir(), entry['file'])
+        if not os.path.exists(path) or _sha256(path) != entry['sha256']:
+            broken.append(entry['file'])
+    return broken
+
+
+# --- Escritura ---
+
+def _open_segment(path, mode):
+    if path.endswith('.zst'):
+        if zstandard is None:
+            raise RuntimeError("Para leer segmentos .zst instale el paquete 'zstandard'.")
+        if mode == 'w':
+            return io.TextIOWrapper(zstandard.ZstdCompressor(level=10).stream_writer(open(path, 'wb')), encoding='utf-8')
+        return io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(open(path, 'rb')), encoding='utf-8')
+    return gzip.open(path, mode + 't', encoding='utf-8')
+
+
+def _new_segment_name(month):
+    extension = 'jsonl.zst' if zstandard is not None else 'jsonl.gz'
+    existing = {entry['file'] for entry in read_manifest()}
+    number = 1
+    while True:
+        suffix = '' if number == 1 else f'.{number}'
+        name = f"auditlog_{month_key(month)}{suffix}.{extension}"
+        if name not in existing and not os.path.exists(os.path.join(archive_dir(), name)):
+            return name
+        number += 1
+
+
+def _serialize(log):
+    # Misma forma que en el API, para que no se distinga lo archivado de lo vivo
+    return dict(AuditLogSerializer(log).data)
+
+
+def archive_month(month, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Pasa las entradas de un mes a un segmento nuevo y luego las borra por lotes.
+    Si una corrida anterior se interrumpió después de escribir el segmento, las filas
+    ya archivadas (id <= max_id del mes) solo se borran. Devuelve cuántas filas archivó.
+    """
+    month = month_start(month)
+    start, end = _month_bounds(month)
+    os.makedirs(archive_dir(), exist_ok=True)
+    in_month = AuditLog.objects.filter(timestamp__gte=start, timestamp__lt=end)
+
+    already = [e['max_id'] for e in read_manifest() if e['month'] == month_key(month)]
+    if already:
+        _delete_in_batches(in_month.filter(id__lte=max(already)), batch_size)
+
+    pending = in_month.select_related('user').order_by('id')
+    if not pending.exists():
+        _drop_empty_partition(month)
+        return 0
+
+    name = _new_segment_name(month)
+    path = os.path.join(archive_dir(), name)
+    tmp_path = path + '.tmp'
+    rows, min_id, max_id = 0, None, None
+    with _open_segment(tmp_path, 'w') as f:
+        for log in pending.iterator(chunk_size=batch_size):
+            f.write(json.dumps(_serialize(log), ensure_ascii=False, default=str) + '\n')
+            rows += 1
+            min_id = log.id if min_id is None else min_id
+            max_id = log.id
+    os.replace(tmp_path, path)
+
+    _append_manifest({
+        'month': month_key(month),
+        'file': name,
+        'rows': rows,
+        'min_id': min_id,
+        'max_id': max_id,
+        'sha256': _sha256(path),
+        'bytes': os.path.getsize(path),
+        'created_at': timezone.now().isoformat(),
+    })
+
+    # Solo después de registrar el segmento borramos, en lotes cortos (sin bloqueos largos)
+    _delete_in_batches(in_month.filter(id__lte=max_id), batch_size)
+    _drop_empty_partition(month)
+    return rows
+
+
+def _delete_in_batches(queryset, batch_size):
+    deleted = 0
+    while True:
+        ids = list(queryset.order_by('id').values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        deleted += queryset.filter(id__in=ids).delete()[0]
+
+
+def _drop_empty_partition(month):
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        if not is_partitioned(cursor):
+            return
+        name = partition_name(month)
+        cursor.execute("SELECT to_regclass(%s)", [name])
+        if cursor.fetchone()[0] is None:
+            return
+        cursor.execute(f'SELECT EXISTS (SELECT 1 FROM "{name}")')
+        if not cursor.fetchone()[0]:
+            cursor.execute(f'DROP TABLE "{name}"')
+
+
+def months_to_archive(older_than_days, today=None):
+    """Meses completos anteriores a (hoy - older_than_days) que todavía tienen filas en la base."""
+    today = today or date.today()
+    cutoff = month_start(date.fromordinal(today.toordinal() - older_than_days))
+    oldest = AuditLog.objects.order_by('timestamp').values_list('timestamp', flat=True).first()
+    if oldest is None:
+        return []
+    month = month_start(timezone.localtime(oldest).date())
+    months = []
+    while month < cutoff:
+        months.append(month)
+        month = add_months(month, 1)
+    return months
+
+
+# --- Lectura ---
+
+def iter_archived(months):
+    """Entradas archivadas (dicts como los del API) de los meses 'AAAA-MM' indicados."""
+    months = set(months)
+    for entry in read_manifest():
+        if entry['month'] not in months:
+            continue
+        with _open_segment(os.path.join(archive_dir(), entry['file']), 'r') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def months_in_range(date_from, date_to):
+    """Meses archivados que se cruzan con el rango [date_from, date_to) (datetimes o None)."""
+    selected = []
+    for key in archived_months():
+        month = date(int(key[:4]), int(key[5:]), 1)
+        start, end = _month_bounds(month)
+        if (date_to is None or start < date_to) and (date_from is None or end > date_from):
+            selected.append(key)
+    return selected
+
+
+def row_key(row):
+    """Llave de orden (timestamp, id) de una entrada serializada."""
+    return parse_datetime(row['timestamp']), row['id']
@@ -0,0 +1,193 @@
+"""
+Respaldos de PostgreSQL: completos con pg_dump en formato directorio (en paralelo) e
+incrementales por tabla con las filas cambiadas desde el respaldo anterior.
+
+Cada respaldo queda en su carpeta dentro de BACKUP_DIR y se registra en manifest.jsonl
+(tipo, fecha de inicio, duración, tamaño), que también usan la rotación y restore_db.
+"""
+import gzip
+import json
+import os
+import shutil
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils.dateparse import parse_datetime
+
+MANIFEST = 'manifest.jsonl'
+
+# Tablas con respaldo incremental y la columna que indica cuándo cambió la fila, en el
+# orden en que se aplican (llaves foráneas). Estudios no tiene esa columna y es chica:
+# va completa en cada incremental (None). Participaciones y bitácora solo reciben
+# inserciones; en voluntarios y estudios las filas también se actualizan.
+# Los borrados no viajan en los incrementales.
+INCREMENTAL_TABLES = {
+    'studies_study': None,
+    'volunteers_volunteer': 'updated_at',
+    'volunteers_participation': 'assigned_at',
+    'auditing_auditlog': 'timestamp',
+}
+APPEND_ONLY_TABLES = {'volunteers_participation', 'auditing_auditlog'}
+
+
+def backup_dir():
+    return getattr(settings, 'BACKUP_DIR', os.path.join(settings.BASE_DIR, 'backups'))
+
+
+def pg_env(db):
+    """Entorno para pg_dump/pg_restore con la contraseña, sin tocar os.environ del proceso."""
+    env = dict(os.environ)
+    if db.get('PASSWORD'):
+        env['PGPASSWORD'] = db['PASSWORD']
+    return env
+
+
+def pg_args(db):
+    args = []
+    if db.get('HOST'):
+        args += ['-h', db['HOST']]
+    if db.get('PORT'):
+        args += ['-p', str(db['PORT'])]
+    if db.get('USER'):
+        args += ['-U', db['USER']]
+    return args
+
+
+def dir_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+    return total
+
+
+# --- Manifiesto ---
+
+def read_manifest():
+    path = os.path.join(backup_dir(), MANIFEST)
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def write_manifest(entries):
+    path = os.path.join(backup_dir(), MANIFEST)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        for entry in entries:
+            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+    os.replace(tmp_path, path)
+
+
+def append_manifest(entry):
+    os.makedirs(backup_dir(), exist_ok=True)
+    with open(os.path.join(backup_dir(), MANIFEST), 'a', encoding='utf-8') as f:
+        f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+
+def last_backup(database):
+    """Último respaldo (completo o incremental) de la base; de ahí parte el siguiente incremental."""
+    entries = [e for e in read_manifest() if e['database'] == database]
+    return entries[-1] if entries else None
+
+
+def find_backup(name):
+    for entry in read_manifest():
+        if entry['name'] == name or os.path.abspath(entry['path']) == os.path.abspath(name):
+            return entry
+    return None
+
+
+def incrementals_after(full_entry):
+    """Incrementales tomados después de `full_entry` y antes del siguiente completo, en orden."""
+    entries = [e for e in read_manifest() if e['database'] == full_entry['database']]
+    index = next(i for i, e in enumerate(entries) if e['name'] == full_entry['name'])
+    chain = []
+    for entry in entries[index + 1:]:
+        if entry['kind'] == 'full':
+            break
+        chain.append(entry)
+    return chain
+
+
+# --- Incrementales ---
+
+def export_incremental(path, since, compress_level=6, using=connection):
+    """
+    Exporta a CSV comprimido las filas cambiadas desde `since` de cada tabla incremental.
+    Devuelve {tabla: filas}.
+    """
+    os.makedirs(path, exist_ok=True)
+    rows = {}
+    with using.cursor() as cursor:
+        for table, column in INCREMENTAL_TABLES.items():
+            where, params = (f'WHERE "{column}" >= %s', [since]) if column else ('', [])
+            query = cursor.mogrify(f'SELECT * FROM "{table}" {where}', params).decode()
+            with gzip.open(os.path.join(path, f'{table}.csv.gz'), 'wb', compresslevel=compress_level) as f:
+                cursor.copy_expert(f'COPY ({query}) TO STDOUT WITH CSV HEADER', f)
+            cursor.execute(f'SELECT COUNT(*) FROM "{table}" {where}', params)
+            rows[table] = cursor.fetchone()[0]
+    return rows
+
+
+def apply_incremental(path, using=connection):
+    """
+    Carga los CSV de un incremental: inserta las filas nuevas y sobrescribe las existentes
+    (participaciones y bitácora solo insertan). Los borrados no viajan en los incrementales.
+    Devuelve {tabla: filas aplicadas}.
+    """
+    rows = {}
+    with transaction.atomic(using=using.alias), using.cursor() as cursor:
+        for table in INCREMENTAL_TABLES:
+            file_path = os.path.join(path, f'{table}.csv.gz')
+            if not os.path.exists(file_path):
+                continue
+            staging = f'{table}_incremental'
+            cursor.execute(f'CREATE TEMP TABLE "{staging}" (LIKE "{table}")')
+            with gzip.open(file_path, 'rb') as f:
+                cursor.copy_expert(f'COPY "{staging}" FROM STDIN WITH CSV HEADER', f)
+
+            cursor.execute(
+                "SELECT column_name FROM information_schema.columns WHERE table_name = %s ORDER BY ordinal_position",
+                [table],
+            )
+            columns = [row[0] for row in cursor.fetchall()]
+            column_list = ', '.join(f'"{c}"' for c in columns)
+            if table in APPEND_ONLY_TABLES:
+                conflict = 'ON CONFLICT DO NOTHING'
+            else:
+                updates = ', '.join(f'"{c}" = EXCLUDED."{c}"' for c in columns if c != 'id')
+                conflict = f'ON CONFLICT (id) DO UPDATE SET {updates}'
+            cursor.execute(f'INSERT INTO "{table}" ({column_list}) SELECT {column_list} FROM "{staging}" {conflict}')
+            rows[table] = cursor.rowcount
+            cursor.execute(f'DROP TABLE "{staging}"')
+
+            # Las filas restauradas traen su id: adelantamos la secuencia
+            cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [table])
+            sequence = cursor.fetchone()[0]
+            if sequence:
+                cursor.execute(f'SELECT setval(%s, GREATEST((SELECT COALESCE(MAX(id), 0) FROM "{table}"), 1))', [sequence])
+    return rows
+
+
+# --- Rotación ---
+
+def apply_retention(database, keep):
+    """
+    Conserva los `keep` respaldos completos más recientes de la base y los incrementales
+    que dependen de ellos; borra las carpetas del resto. Devuelve los nombres borrados.
+    """
+    entries = read_manifest()
+    fulls = [e for e in entries if e['database'] == database and e['kind'] == 'full']
+    if keep <= 0 or len(fulls) <= keep:
+        return []
+
+    oldest_kept = parse_datetime(fulls[-keep]['started_at'])
+    removed, remaining = [], []
+    for entry in entries:
+        if entry['database'] == database and parse_datetime(entry['started_at']) < oldest_kept:
+            shutil.rmtree(entry['path'], ignore_errors=True)
+            removed.append(entry['name'])
+        else:
+            remaining.append(entry)
+    write_manifest(remaining)
+    return removed
@@ -0,0 +1,92 @@
+import re
+from datetime import datetime, time, timedelta
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework import filters
+from rest_framework.exceptions import ValidationError
+from .models import AuditLog
+
+FIELD_NAME = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+
+class AuditLogFilterBackend(filters.BaseFilterBackend):
+    """
+    Filtros de la bitácora, resueltos en SQL:
+      ?user=<id>
+      ?action=CREATE,UPDATE
+      ?model=Volunteer
+      ?changed_field=manual_status              entradas cuyo `changes` trae ese campo (índice GIN)
+      ?date_from=2026-01-01&date_to=2026-01-31   (ambas fechas incluidas)
+    Con rango de fechas PostgreSQL solo lee las particiones de esos meses.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        params = request.query_params
+
+        if params.get('user'):
+            if not params['user'].isdigit():
+                raise ValidationError({'user': "Debe ser un número entero."})
+            queryset = queryset.filter(user_id=int(params['user']))
+
+        if params.get('action'):
+            valid = {code for code, _ in AuditLog.ACTION_CHOICES}
+            actions = [a.strip().upper() for a in params['action'].split(',') if a.strip()]
+            invalid = [a for a in actions if a not in valid]
+            if invalid:
+                raise ValidationError({'action': f"Acción inválida: {', '.join(invalid)}"})
+            queryset = queryset.filter(action__in=actions)
+
+        if params.get('model'):
+            queryset = queryset.filter(model_affected=params['model'])
+
+        if params.get('changed_field'):
+            field = params['changed_field']
+            if not FIELD_NAME.match(field):
+                raise ValidationError({'changed_field': "Nombre de campo inválido."})
+            queryset = queryset.filter(changes__has_key=field)
+
+        date_from, date_to = date_range(params)
+        if date_from:
+            queryset = queryset.filter(timestamp__gte=date_from)
+        if date_to:
+            queryset = queryset.filter(timestamp__lt=date_to)
+
+        return queryset
+
+
+def date_range(params):
+    """Devuelve (desde, hasta) como datetimes con zona horaria; `hasta` es el inicio del día siguiente."""
+    return _day_start(params, 'date_from'), _day_start(params, 'date_to', days_after=1)
+
+
+def _day_start(params, name, days_after=0):
+    if not params.get(name):
+        return None
+    try:
+        day = parse_date(params[name])
+    except ValueError:
+        day = None
+    if day is None:
+        raise ValidationError({name: "Fecha inválida (use AAAA-MM-DD)."})
+    return timezone.make_aware(datetime.combine(day + timedelta(days=days_after), time.min))
+
+
+def archived_row_matches(row, params):
+    """Los mismos filtros aplicados a una entrada archivada (dict serializado). Los parámetros ya vienen validados."""
+    if params.get('user') and row['user'] != int(params['user']):
+        return False
+    if params.get('action'):
+        actions = {a.strip().upper() for a in params['action'].split(',') if a.strip()}
+        if row['action'] not in actions:
+            return False
+    if params.get('model') and row['model_affected'] != params['model']:
+        return False
+    if params.get('changed_field') and params['changed_field'] not in (row['changes'] or {}):
+        return False
+    timestamp = parse_datetime(row['timestamp'])
+    date_from, date_to = date_range(params)
+    if date_from and timestamp < date_from:
+        return False
+    if date_to and timestamp >= date_to:
+        return False
+    return True
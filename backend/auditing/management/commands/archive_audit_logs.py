@@ -0,0 +1,40 @@
+import time
+from django.core.management.base import BaseCommand
+from auditing.archive import archive_month, archive_dir, months_to_archive, verify_archive, month_key, DEFAULT_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Mueve las entradas viejas de la bitácora a archivos mensuales comprimidos y las borra de la base'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-days', type=int, default=365,
+                            help='Archiva los meses completos anteriores a hoy menos estos días')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help='Filas por lote al leer y al borrar')
+        parser.add_argument('--dry-run', action='store_true', help='Solo muestra los meses que se archivarían')
+        parser.add_argument('--verify', action='store_true', help='Revisa los SHA-256 del manifiesto y termina')
+
+    def handle(self, *args, **kwargs):
+        if kwargs['verify']:
+            broken = verify_archive()
+            if broken:
+                self.stdout.write(self.style.ERROR(f"Segmentos dañados o faltantes: {', '.join(broken)}"))
+            else:
+                self.stdout.write(self.style.SUCCESS("Archivo íntegro"))
+            return
+
+        months = months_to_archive(kwargs['older_than_days'])
+        if not months:
+            self.stdout.write("No hay meses por archivar.")
+            return
+        if kwargs['dry_run']:
+            self.stdout.write(f"Meses por archivar: {', '.join(month_key(m) for m in months)}")
+            return
+
+        total = 0
+        for month in months:
+            started = time.monotonic()
+            rows = archive_month(month, batch_size=kwargs['batch_size'])
+            total += rows
+            self.stdout.write(f"{month_key(month)}: {rows} entradas ({time.monotonic() - started:.1f} s)")
+        self.stdout.write(self.style.SUCCESS(f"Archivadas {total} entradas en {archive_dir()}"))
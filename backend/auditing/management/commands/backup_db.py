@@ -1,50 +1,83 @@
 import os
+import shutil
 import subprocess
+import time
 from datetime import datetime
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from django.conf import settings
+from django.utils import timezone
+from auditing.backups import (
+    backup_dir, pg_env, pg_args, dir_size, append_manifest, last_backup, export_incremental, apply_retention,
+)
 
 
 class Command(BaseCommand):
-    help = 'Genera un respaldo de la base de datos PostgreSQL'
+    help = 'Genera un respaldo de la base de datos PostgreSQL (completo en paralelo o incremental)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--jobs', '-j', type=int, default=4, help='Procesos paralelos de pg_dump')
+        parser.add_argument('--compress', type=int, default=6, choices=range(10), metavar='0-9',
+                            help='Nivel de compresión')
+        parser.add_argument('--incremental', action='store_true',
+                            help='Solo las filas nuevas o cambiadas desde el último respaldo (sin borrados)')
+        parser.add_argument('--keep', type=int, default=7,
+                            help='Respaldos completos a conservar (0 = no borrar ninguno)')
 
     def handle(self, *args, **kwargs):
         db = settings.DATABASES['default']
-
         db_name = db['NAME']
-        db_user = db['USER']
-        db_pass = db['PASSWORD']
-        db_host = db['HOST']
-        db_port = db['PORT']
-
-        backup_dir = os.path.join(settings.BASE_DIR, 'backups')
-        os.makedirs(backup_dir, exist_ok=True)
 
         timestamp = datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
-        filename = f"backup_{db_name}_{timestamp}.dump"
-        filepath = os.path.join(backup_dir, filename)
-
-        os.environ['PGPASSWORD'] = db_pass
-
-        cmd = [
-            "pg_dump",
-            "-h", db_host,
-            "-p", str(db_port),
-            "-U", db_user,
-            "-F", "c",
-            "-b",
-            "-f", filepath,
-            db_name
-        ]
-
-        try:
-            subprocess.run(cmd, check=True)
-            self.stdout.write(
-                self.style.SUCCESS(f'Backup creado exitosamente: {filename}')
-            )
-        except subprocess.CalledProcessError as e:
-            self.stdout.write(
-                self.style.ERROR(f'Error creando backup: {e}')
-            )
-        finally:
-            os.environ.pop('PGPASSWORD', None)
+        kind = 'incremental' if kwargs['incremental'] else 'full'
+        prefix = 'incremental' if kwargs['incremental'] else 'backup'
+        name = f"{prefix}_{db_name}_{timestamp}"
+        path = os.path.join(backup_dir(), name)
+        os.makedirs(backup_dir(), exist_ok=True)
+
+        started_at = timezone.now()
+        started = time.monotonic()
+        entry = {'name': name, 'path': path, 'database': db_name, 'kind': kind,
+                 'started_at': started_at.isoformat(), 'compress': kwargs['compress']}
+
+        if kind == 'incremental':
+            previous = last_backup(db_name)
+            if previous is None:
+                raise CommandError("No hay un respaldo previo: genere primero uno completo.")
+            entry['since'] = previous['started_at']
+            try:
+                entry['tables'] = export_incremental(path, previous['started_at'], compress_level=kwargs['compress'])
+            except Exception:
+                shutil.rmtree(path, ignore_errors=True)
+                raise
+        else:
+            # Formato directorio: es el único que pg_dump puede escribir con varios procesos
+            cmd = [
+                "pg_dump", *pg_args(db),
+                "-F", "d",
+                "-j", str(kwargs['jobs']),
+                "-Z", str(kwargs['compress']),
+                "-b",
+                "-f", path,
+                db_name
+            ]
+            try:
+                subprocess.run(cmd, check=True, env=pg_env(db))
+            except (subprocess.CalledProcessError, OSError) as e:
+                # No dejamos un directorio a medias que parezca un respaldo
+                shutil.rmtree(path, ignore_errors=True)
+                self.stdout.write(
+                    self.style.ERROR(f'Error creando backup: {e}')
+                )
+                return
+            entry['jobs'] = kwargs['jobs']
+
+        entry['duration_s'] = round(time.monotonic() - started, 2)
+        entry['bytes'] = dir_size(path)
+        append_manifest(entry)
+        self.stdout.write(
+            self.style.SUCCESS(f"Backup creado exitosamente: {name} ({entry['bytes']} bytes, {entry['duration_s']} s)")
+        )
+
+        removed = apply_retention(db_name, kwargs['keep'])
+        if removed:
+            self.stdout.write(f"Respaldos eliminados por rotación: {', '.join(removed)}")
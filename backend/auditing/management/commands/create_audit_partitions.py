@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from auditing.partitions import ensure_partitions
+
+
+class Command(BaseCommand):
+    help = 'Crea por adelantado las particiones mensuales de la bitácora (PostgreSQL). Correr cada mes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months', type=int, default=3, help='Meses hacia adelante a crear')
+
+    def handle(self, *args, **kwargs):
+        checked = ensure_partitions(months_ahead=kwargs['months'])
+        if not checked:
+            self.stdout.write(self.style.WARNING("La bitácora no está particionada (solo aplica en PostgreSQL)."))
+            return
+        self.stdout.write(self.style.SUCCESS(f"Particiones revisadas: {checked} meses"))
@@ -0,0 +1,57 @@
+import subprocess
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from auditing.backups import find_backup, incrementals_after, apply_incremental, pg_env, pg_args
+
+
+class Command(BaseCommand):
+    help = ('Restaura un respaldo de backup_db (pg_restore en paralelo) y, opcionalmente, sus incrementales. '
+            'Los incrementales traen estudios, voluntarios, participaciones y bitácora nuevos o cambiados, '
+            'pero no los borrados ni el resto de las tablas (usuarios, importaciones, reportes): para eso '
+            'hace falta un respaldo completo.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('backup', help='Nombre o ruta del respaldo completo (ver backups/manifest.jsonl)')
+        parser.add_argument('--jobs', '-j', type=int, default=4, help='Procesos paralelos de pg_restore')
+        parser.add_argument('--database', default='default',
+                            help='Alias de DATABASES donde restaurar (ej. una base desechable de prueba)')
+        parser.add_argument('--with-incrementals', action='store_true',
+                            help='Aplica después los incrementales tomados sobre ese respaldo (restauración parcial, ver arriba)')
+        parser.add_argument('--noinput', '--no-input', action='store_false', dest='interactive',
+                            help='No pedir confirmación')
+
+    def handle(self, *args, **kwargs):
+        entry = find_backup(kwargs['backup'])
+        if entry is None or entry['kind'] != 'full':
+            raise CommandError(f"No existe el respaldo completo '{kwargs['backup']}' en el manifiesto.")
+
+        connection = connections[kwargs['database']]
+        db = connection.settings_dict
+        if kwargs['interactive']:
+            answer = input(f"Se reemplazarán los datos de '{db['NAME']}' con {entry['name']}. Escriba 'si' para continuar: ")
+            if answer.strip().lower() not in ('si', 'sí'):
+                self.stdout.write("Restauración cancelada.")
+                return
+
+        started = time.monotonic()
+        cmd = [
+            "pg_restore", *pg_args(db),
+            "-d", db['NAME'],
+            "-j", str(kwargs['jobs']),
+            "--clean", "--if-exists", "--no-owner",
+            entry['path'],
+        ]
+        try:
+            subprocess.run(cmd, check=True, env=pg_env(db))
+        except (subprocess.CalledProcessError, OSError) as e:
+            raise CommandError(f"Error restaurando backup: {e}")
+        self.stdout.write(f"{entry['name']} restaurado ({time.monotonic() - started:.1f} s)")
+
+        if kwargs['with_incrementals']:
+            for incremental in incrementals_after(entry):
+                rows = apply_incremental(incremental['path'], using=connection)
+                detail = ', '.join(f'{table}: {count}' for table, count in rows.items())
+                self.stdout.write(f"{incremental['name']} aplicado ({detail})")
+
+        self.stdout.write(self.style.SUCCESS(f"Restauración terminada en {time.monotonic() - started:.1f} s"))
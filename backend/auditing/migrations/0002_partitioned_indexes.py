@@ -0,0 +1,117 @@
+# Generated by Django 5.2.6 on 2026-10-18 00:47
+
+from datetime import date
+from django.conf import settings
+from django.db import migrations, models
+
+# Copia de auditing/partitions.py al momento de esta migración: si el módulo cambia
+# después, la migración sigue haciendo lo mismo.
+TABLE = 'auditing_auditlog'
+
+
+def month_start(day):
+    return date(day.year, day.month, 1)
+
+
+def add_months(day, months):
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f"{TABLE}_y{month.year}m{month.month:02d}"
+
+
+def is_partitioned(cursor):
+    cursor.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass", [TABLE])
+    return cursor.fetchone() is not None
+
+
+def create_month_partition(cursor, month):
+    # Aquí la DEFAULT todavía no existe: no hay filas que mover
+    month = month_start(month)
+    cursor.execute(
+        f'CREATE TABLE IF NOT EXISTS "{partition_name(month)}" PARTITION OF "{TABLE}" '
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+    )
+
+
+def convert_to_partitioned(schema_editor, user_table='auth_user', months_ahead=3):
+    """
+    Convierte la tabla normal en una particionada por mes copiando los datos.
+    La llave primaria pasa a ser (id, timestamp), requisito de PostgreSQL; los ids
+    siguen saliendo de una sola secuencia.
+    """
+    old = f"{TABLE}_unpartitioned"
+    with schema_editor.connection.cursor() as cursor:
+        if is_partitioned(cursor):
+            return
+
+        # Nombres actuales de la llave foránea e índice de user_id, para conservarlos
+        cursor.execute(
+            "SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'f'", [TABLE]
+        )
+        fk_names = [row[0] for row in cursor.fetchall()] or [f"{TABLE}_user_id_fk"]
+        cursor.execute(
+            "SELECT indexname FROM pg_indexes WHERE tablename = %s AND indexdef LIKE '%%(user_id)%%'", [TABLE]
+        )
+        user_index_names = [row[0] for row in cursor.fetchall()] or [f"{TABLE}_user_id_idx"]
+        cursor.execute(f'SELECT MIN("timestamp"), MAX(id) FROM "{TABLE}"')
+        first_timestamp, max_id = cursor.fetchone()
+
+        cursor.execute(f'ALTER TABLE "{TABLE}" RENAME TO "{old}"')
+        cursor.execute(f'CREATE TABLE "{TABLE}" (LIKE "{old}") PARTITION BY RANGE ("timestamp")')
+
+        # Una partición por mes desde el registro más antiguo, más la DEFAULT
+        today = date.today()
+        month = month_start(first_timestamp.date() if first_timestamp else today)
+        last = add_months(month_start(today), months_ahead)
+        while month <= last:
+            create_month_partition(cursor, month)
+            month = add_months(month, 1)
+        cursor.execute(f'CREATE TABLE "{TABLE}_default" PARTITION OF "{TABLE}" DEFAULT')
+
+        cursor.execute(f'INSERT INTO "{TABLE}" SELECT * FROM "{old}"')
+        # Al borrar la tabla vieja se liberan los nombres de su llave, índices y secuencia
+        cursor.execute(f'DROP TABLE "{old}"')
+
+        cursor.execute(f'CREATE SEQUENCE "{TABLE}_id_seq" AS bigint OWNED BY "{TABLE}".id')
+        cursor.execute(f"SELECT setval('{TABLE}_id_seq', %s, false)", [(max_id or 0) + 1])
+        cursor.execute(f"""ALTER TABLE "{TABLE}" ALTER COLUMN id SET DEFAULT nextval('{TABLE}_id_seq')""")
+        cursor.execute(f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{TABLE}_pkey" PRIMARY KEY (id, "timestamp")')
+        for name in fk_names:
+            cursor.execute(
+                f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{name}" FOREIGN KEY (user_id) '
+                f'REFERENCES "{user_table}" (id) DEFERRABLE INITIALLY DEFERRED'
+            )
+        for name in user_index_names:
+            cursor.execute(f'CREATE INDEX "{name}" ON "{TABLE}" (user_id)')
+
+
+def partition_auditlog(apps, schema_editor):
+    # El particionado declarativo solo existe en PostgreSQL; en otros motores queda la tabla normal
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    convert_to_partitioned(schema_editor, user_table=User._meta.db_table)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auditing', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # Primero el particionado: los índices se crean después sobre la tabla particionada
+        migrations.RunPython(partition_auditlog, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['timestamp', 'id'], name='auditlog_timestamp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['model_affected', 'record_id', 'timestamp'], name='auditlog_record_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.6 on 2026-10-18 03:20
+
+from django.db import migrations
+
+
+def create_changes_index(apps, schema_editor):
+    # jsonb + GIN solo existe en PostgreSQL; atiende ?changed_field= (operador ?)
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS auditlog_changes_gin ON auditing_auditlog USING gin (changes)'
+    )
+
+
+def drop_changes_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS auditlog_changes_gin')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auditing', '0002_partitioned_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_changes_index, drop_changes_index),
+    ]
@@ -16,5 +16,13 @@ class AuditLog(models.Model):
     justification = models.TextField(verbose_name="Justificación")
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        # En PostgreSQL la tabla está particionada por mes sobre timestamp (auditing/partitions.py)
+        # y `changes` tiene además un índice GIN (migración 0003) para ?changed_field=
+        indexes = [
+            models.Index(fields=['timestamp', 'id'], name='auditlog_timestamp_idx'),
+            models.Index(fields=['model_affected', 'record_id', 'timestamp'], name='auditlog_record_idx'),
+        ]
+
     def __str__(self):
         return f"{self.user} - {self.action} - {self.timestamp}"
\ No newline at end of file
@@ -0,0 +1,10 @@
+from rest_framework.pagination import CursorPagination
+
+
+class AuditLogCursorPagination(CursorPagination):
+    # Paginación por llave (timestamp, id): cada página es una búsqueda en el índice
+    # auditlog_timestamp_idx, sin OFFSET, aunque la bitácora tenga años de historia.
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = ('-timestamp', '-id')
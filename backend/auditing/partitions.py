@@ -0,0 +1,128 @@
+"""
+Particionado mensual de la bitácora (solo PostgreSQL).
+
+auditing_auditlog es una tabla particionada por rango de `timestamp`, con una partición
+por mes (auditing_auditlog_y2026m10) y una partición DEFAULT para lo que no caiga en
+ninguna. El comando create_audit_partitions crea por adelantado los meses siguientes.
+"""
+from datetime import date
+from django.db import connection, transaction
+
+TABLE = 'auditing_auditlog'
+
+
+def month_start(day):
+    return date(day.year, day.month, 1)
+
+
+def add_months(day, months):
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f"{TABLE}_y{month.year}m{month.month:02d}"
+
+
+def is_partitioned(cursor):
+    cursor.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass", [TABLE])
+    return cursor.fetchone() is not None
+
+
+def create_month_partition(cursor, month):
+    """
+    Crea la partición del mes. Si la DEFAULT ya tiene filas de ese mes, PostgreSQL no deja
+    crearla: en la misma transacción se separa la DEFAULT, se crea el mes, se pasan las
+    filas y se vuelve a adjuntar.
+    """
+    month = month_start(month)
+    name = partition_name(month)
+    start, end = month.isoformat(), add_months(month, 1).isoformat()
+    default = f"{TABLE}_default"
+
+    cursor.execute("SELECT to_regclass(%s), to_regclass(%s)", [name, default])
+    exists, has_default = cursor.fetchone()
+    if exists:
+        return
+
+    create = f'CREATE TABLE "{name}" PARTITION OF "{TABLE}" FOR VALUES FROM (\'{start}\') TO (\'{end}\')'
+    in_month = '"timestamp" >= %s AND "timestamp" < %s'
+    pending = False
+    if has_default:
+        cursor.execute(f'SELECT EXISTS (SELECT 1 FROM "{default}" WHERE {in_month})', [start, end])
+        pending = cursor.fetchone()[0]
+    if not pending:
+        cursor.execute(create)
+        return
+
+    with transaction.atomic(using=cursor.db.alias):
+        cursor.execute(f'ALTER TABLE "{TABLE}" DETACH PARTITION "{default}"')
+        cursor.execute(create)
+        cursor.execute(f'INSERT INTO "{TABLE}" SELECT * FROM "{default}" WHERE {in_month}', [start, end])
+        cursor.execute(f'DELETE FROM "{default}" WHERE {in_month}', [start, end])
+        cursor.execute(f'ALTER TABLE "{TABLE}" ATTACH PARTITION "{default}" DEFAULT')
+
+
+def ensure_partitions(months_ahead=3, today=None, using=connection):
+    """Crea las particiones desde el mes actual hasta `months_ahead` meses después. Devuelve cuántos meses revisó."""
+    if using.vendor != 'postgresql':
+        return 0
+    current = month_start(today or date.today())
+    with using.cursor() as cursor:
+        if not is_partitioned(cursor):
+            return 0
+        for offset in range(months_ahead + 1):
+            create_month_partition(cursor, add_months(current, offset))
+    return months_ahead + 1
+
+
+def convert_to_partitioned(schema_editor, user_table='auth_user', months_ahead=3):
+    """
+    Convierte la tabla normal en una particionada por mes copiando los datos.
+    La llave primaria pasa a ser (id, timestamp), requisito de PostgreSQL; los ids
+    siguen saliendo de una sola secuencia.
+    """
+    old = f"{TABLE}_unpartitioned"
+    with schema_editor.connection.cursor() as cursor:
+        if is_partitioned(cursor):
+            return
+
+        # Nombres actuales de la llave foránea e índice de user_id, para conservarlos
+        cursor.execute(
+            "SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'f'", [TABLE]
+        )
+        fk_names = [row[0] for row in cursor.fetchall()] or [f"{TABLE}_user_id_fk"]
+        cursor.execute(
+            "SELECT indexname FROM pg_indexes WHERE tablename = %s AND indexdef LIKE '%%(user_id)%%'", [TABLE]
+        )
+        user_index_names = [row[0] for row in cursor.fetchall()] or [f"{TABLE}_user_id_idx"]
+        cursor.execute(f'SELECT MIN("timestamp"), MAX(id) FROM "{TABLE}"')
+        first_timestamp, max_id = cursor.fetchone()
+
+        cursor.execute(f'ALTER TABLE "{TABLE}" RENAME TO "{old}"')
+        cursor.execute(f'CREATE TABLE "{TABLE}" (LIKE "{old}") PARTITION BY RANGE ("timestamp")')
+
+        # Una partición por mes desde el registro más antiguo, más la DEFAULT
+        today = date.today()
+        month = month_start(first_timestamp.date() if first_timestamp else today)
+        last = add_months(month_start(today), months_ahead)
+        while month <= last:
+            create_month_partition(cursor, month)
+            month = add_months(month, 1)
+        cursor.execute(f'CREATE TABLE "{TABLE}_default" PARTITION OF "{TABLE}" DEFAULT')
+
+        cursor.execute(f'INSERT INTO "{TABLE}" SELECT * FROM "{old}"')
+        # Al borrar la tabla vieja se liberan los nombres de su llave, índices y secuencia
+        cursor.execute(f'DROP TABLE "{old}"')
+
+        cursor.execute(f'CREATE SEQUENCE "{TABLE}_id_seq" AS bigint OWNED BY "{TABLE}".id')
+        cursor.execute(f"SELECT setval('{TABLE}_id_seq', %s, false)", [(max_id or 0) + 1])
+        cursor.execute(f"""ALTER TABLE "{TABLE}" ALTER COLUMN id SET DEFAULT nextval('{TABLE}_id_seq')""")
+        cursor.execute(f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{TABLE}_pkey" PRIMARY KEY (id, "timestamp")')
+        for name in fk_names:
+            cursor.execute(
+                f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{name}" FOREIGN KEY (user_id) '
+                f'REFERENCES "{user_table}" (id) DEFERRABLE INITIALLY DEFERRED'
+            )
+        for name in user_index_names:
+            cursor.execute(f'CREATE INDEX "{name}" ON "{TABLE}" (user_id)')
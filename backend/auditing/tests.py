@@ -1,3 +1,336 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+from unittest import mock
+from io import StringIO
+from datetime import date, datetime, timedelta
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.core.management import call_command, CommandError
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from studies.models import Study
+from .models import AuditLog
+from .writer import log_change
+from .partitions import add_months, partition_name, is_partitioned
+from .archive import archive_month, read_manifest, verify_archive, months_to_archive
+from . import backups
+
+
+def _log(record_id):
+    return log_change(None, 'UPDATE', 'Volunteer', record_id, {'phone': {'from': '1', 'to': '2'}}, 'Prueba')
+
+
+class AuditWriterTests(TestCase):
+    def test_entries_are_written_on_commit_in_one_insert(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            for i in range(3):
+                _log(f'V-{i}')
+            self.assertFalse(AuditLog.objects.exists())
+        self.assertEqual(len(callbacks), 1)
+
+        with CaptureQueriesContext(connection) as queries:
+            callbacks[0]()
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(AuditLog.objects.count(), 3)
+
+    def test_rollback_discards_entries(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            _log('V-1')
+            try:
+                with transaction.atomic():
+                    _log('V-2')
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+            _log('V-3')
+        self.assertEqual(sorted(AuditLog.objects.values_list('record_id', flat=True)), ['V-1', 'V-3'])
+
+    def test_committed_entries_are_written_by_their_own_commit(self):
+        # Cada transacción escribe sus entradas al confirmar: si la escritura de una
+        # transacción posterior falla, las ya confirmadas no se pierden con ella.
+        with self.captureOnCommitCallbacks(execute=True):
+            _log('V-1')
+        self.assertEqual(list(AuditLog.objects.values_list('record_id', flat=True)), ['V-1'])
+
+        with mock.patch.object(AuditLog.objects, 'bulk_create', side_effect=RuntimeError('sin conexión')):
+            with self.assertRaises(RuntimeError):
+                with self.captureOnCommitCallbacks(execute=True):
+                    _log('V-2')
+        self.assertEqual(list(AuditLog.objects.values_list('record_id', flat=True)), ['V-1'])
+
+    def test_study_update_is_logged(self):
+        admin = User.objects.create_superuser(username='admin', password='x')
+        client = APIClient()
+        client.force_authenticate(admin)
+        study = Study.objects.create(name='Estudio')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.patch(f'/api/studies/{study.id}/', {'description': 'Nueva', 'justification': 'Ajuste'})
+        self.assertEqual(response.status_code, 200)
+        log = AuditLog.objects.get()
+        self.assertEqual(log.user, admin)
+        self.assertEqual(log.changes['description'], {'from': '', 'to': 'Nueva'})
+
+
+class AuditLogListTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username='admin', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.other = User.objects.create_user(username='capturista', password='x')
+
+        entries = []
+        for i in range(6):
+            entries.append(AuditLog(user=self.admin if i % 2 else self.other, action='UPDATE' if i < 4 else 'CREATE',
+                                    model_affected='Volunteer' if i < 3 else 'Study', record_id=f'R-{i}',
+                                    changes={}, justification='x'))
+        AuditLog.objects.bulk_create(entries)
+        # La entrada más vieja queda en el mes anterior
+        self.old = AuditLog.objects.get(record_id='R-0')
+        AuditLog.objects.filter(pk=self.old.pk).update(timestamp=self.old.timestamp - timedelta(days=40))
+
+    def _records(self, query=''):
+        response = self.client.get(f'/api/admin/logs/?{query}')
+        self.assertEqual(response.status_code, 200, response.data)
+        return [row['record_id'] for row in response.data['results']]
+
+    def test_keyset_pagination(self):
+        response = self.client.get('/api/admin/logs/?page_size=4')
+        self.assertEqual([r['record_id'] for r in response.data['results']], ['R-5', 'R-4', 'R-3', 'R-2'])
+        self.assertEqual(response.data['results'][0]['user_name'], 'admin')
+        rest = self.client.get(response.data['next'])
+        self.assertEqual([r['record_id'] for r in rest.data['results']], ['R-1', 'R-0'])
+
+    def test_filters(self):
+        self.assertEqual(self._records(f'user={self.other.id}'), ['R-4', 'R-2', 'R-0'])
+        self.assertEqual(self._records('action=create'), ['R-5', 'R-4'])
+        self.assertEqual(self._records('model=Volunteer'), ['R-2', 'R-1', 'R-0'])
+        today = date.today()
+        self.assertEqual(self._records(f'date_from={today}&date_to={today}'), ['R-5', 'R-4', 'R-3', 'R-2', 'R-1'])
+        self.assertEqual(self._records(f'date_to={today - timedelta(days=1)}'), ['R-0'])
+
+    def test_invalid_filters_return_400(self):
+        for query in ['user=abc', 'action=BORRAR', 'date_from=2026-02-30']:
+            self.assertEqual(self.client.get(f'/api/admin/logs/?{query}').status_code, 400, query)
+
+    def test_single_query_per_page(self):
+        with self.assertNumQueries(1):
+            self.client.get('/api/admin/logs/')
+
+    def test_partition_helpers(self):
+        self.assertEqual(add_months(date(2026, 11, 1), 3), date(2027, 2, 1))
+        self.assertEqual(add_months(date(2026, 1, 1), -1), date(2025, 12, 1))
+        self.assertEqual(partition_name(date(2026, 3, 1)), 'auditing_auditlog_y2026m03')
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                self.assertTrue(is_partitioned(cursor))
+
+    def test_month_partition_takes_rows_from_default(self):
+        if connection.vendor != 'postgresql':
+            self.skipTest('El particionado solo existe en PostgreSQL')
+        from django.utils import timezone
+        from .partitions import create_month_partition
+
+        # Un mes lejano sin partición: la fila cae en la DEFAULT
+        month = date(2100, 5, 1)
+        log = AuditLog.objects.create(action='UPDATE', model_affected='Volunteer', record_id='X', changes={},
+                                      justification='x')
+        AuditLog.objects.filter(pk=log.pk).update(timestamp=timezone.make_aware(datetime(2100, 5, 10)))
+
+        with connection.cursor() as cursor:
+            create_month_partition(cursor, month)
+            create_month_partition(cursor, month)  # la segunda vez no hace nada
+            cursor.execute(f'SELECT COUNT(*) FROM "{partition_name(month)}"')
+            self.assertEqual(cursor.fetchone()[0], 1)
+            cursor.execute('SELECT COUNT(*) FROM "auditing_auditlog_default" WHERE id = %s', [log.pk])
+            self.assertEqual(cursor.fetchone()[0], 0)
+        self.assertTrue(AuditLog.objects.filter(pk=log.pk).exists())
+
+
+class AuditLogRecordHistoryTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_superuser(username='admin', password='x'))
+        AuditLog.objects.bulk_create([
+            AuditLog(action='UPDATE', model_affected='Volunteer', record_id='FGG-2026-0338',
+                     changes={'manual_status': {'from': 'waiting_approval', 'to': 'eligible'}}, justification='x'),
+            AuditLog(action='UPDATE', model_affected='Volunteer', record_id='FGG-2026-0338',
+                     changes={'phone': {'from': '1', 'to': '2'}}, justification='x'),
+            AuditLog(action='UPDATE', model_affected='Volunteer', record_id='ABC-2026-0001',
+                     changes={'manual_status': {'from': 'eligible', 'to': 'rejected'}}, justification='x'),
+            AuditLog(action='UPDATE', model_affected='Study', record_id='FGG-2026-0338',
+                     changes={'name': {'from': 'a', 'to': 'b'}}, justification='x'),
+        ])
+
+    def _records(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.data)
+        return [(row['record_id'], list(row['changes'])) for row in response.data['results']]
+
+    def test_history_of_one_record(self):
+        self.assertEqual(self._records('/api/admin/logs/by-record/Volunteer/FGG-2026-0338/'), [
+            ('FGG-2026-0338', ['phone']), ('FGG-2026-0338', ['manual_status']),
+        ])
+        self.assertEqual(
+            self._records('/api/admin/logs/by-record/Volunteer/FGG-2026-0338/?changed_field=phone'),
+            [('FGG-2026-0338', ['phone'])],
+        )
+
+    def test_changed_field_filter(self):
+        self.assertEqual(self._records('/api/admin/logs/?changed_field=manual_status'), [
+            ('ABC-2026-0001', ['manual_status']), ('FGG-2026-0338', ['manual_status']),
+        ])
+        self.assertEqual(self.client.get('/api/admin/logs/?changed_field=a;b').status_code, 400)
+
+    def test_indexes_are_used(self):
+        if connection.vendor != 'postgresql':
+            self.skipTest('Los índices GIN y el particionado solo existen en PostgreSQL')
+        with connection.cursor() as cursor:
+            cursor.execute('SET enable_seqscan TO off')
+        # En una tabla particionada cada partición tiene su copia del índice (con otro nombre)
+        for queryset in [
+            AuditLog.objects.filter(changes__has_key='phone'),
+            AuditLog.objects.filter(model_affected='Volunteer', record_id='FGG-2026-0338'),
+        ]:
+            plan = queryset.explain()
+            self.assertIn('Index', plan)
+            self.assertNotIn('Seq Scan', plan)
+
+
+class AuditArchiveTests(TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        settings_override = override_settings(AUDIT_ARCHIVE_DIR=self.dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.client = APIClient()
+        self.admin = User.objects.create_superuser(username='admin', password='x')
+        self.client.force_authenticate(self.admin)
+        AuditLog.objects.bulk_create([
+            AuditLog(user=self.admin, action='UPDATE', model_affected='Volunteer', record_id=f'V-{i}',
+                     changes={'phone': {'from': '1', 'to': str(i)}}, justification='x')
+            for i in range(5)
+        ])
+        # V-0..V-2 hace dos años, V-3 y V-4 son de hoy
+        self.old_day = date.today().replace(day=15) - timedelta(days=730)
+        for log in AuditLog.objects.filter(record_id__in=['V-0', 'V-1', 'V-2']):
+            AuditLog.objects.filter(pk=log.pk).update(timestamp=log.timestamp - (date.today() - self.old_day))
+
+    def test_archive_moves_old_months(self):
+        months = months_to_archive(365)
+        self.assertEqual(months[0], self.old_day.replace(day=1))
+        self.assertLess(months[-1], add_months(date.today().replace(day=1), -11))
+        call_command('archive_audit_logs', '--older-than-days', '365', '--batch-size', '2', stdout=StringIO())
+
+        self.assertEqual(sorted(AuditLog.objects.values_list('record_id', flat=True)), ['V-3', 'V-4'])
+        manifest = read_manifest()
+        self.assertEqual([(e['month'], e['rows']) for e in manifest], [(f"{self.old_day:%Y-%m}", 3)])
+        self.assertEqual(verify_archive(), [])
+
+        # Una segunda corrida no duplica nada
+        self.assertEqual(archive_month(self.old_day), 0)
+        self.assertEqual(len(read_manifest()), 1)
+
+    def test_list_reads_archived_months(self):
+        archive_month(self.old_day)
+        response = self.client.get(f'/api/admin/logs/?date_from={self.old_day}&date_to={date.today()}&page_size=2')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual([r['record_id'] for r in response.data['results']], ['V-4', 'V-3'])
+        rest = self.client.get(response.data['next'])
+        self.assertEqual([r['record_id'] for r in rest.data['results']], ['V-2', 'V-1'])
+        last = self.client.get(rest.data['next'])
+        self.assertEqual([r['record_id'] for r in last.data['results']], ['V-0'])
+        self.assertIsNone(last.data['next'])
+        self.assertEqual(last.data['results'][0]['user_name'], 'admin')
+
+        # Los filtros también aplican a lo archivado; sin fecha solo se consulta la base
+        self.assertEqual(
+            [r['record_id'] for r in self.client.get(
+                f'/api/admin/logs/by-record/Volunteer/V-1/?date_to={date.today()}').data['results']],
+            ['V-1'],
+        )
+        self.assertEqual(len(self.client.get('/api/admin/logs/').data['results']), 2)
+
+    def test_interrupted_run_is_resumed(self):
+        archive_month(self.old_day)
+        # Simula un borrado que no terminó: la fila sigue en la base pero ya está en un segmento
+        archived_id = read_manifest()[0]['max_id']
+        log = AuditLog.objects.create(id=archived_id, action='UPDATE', model_affected='Volunteer',
+                                      record_id='V-2', changes={})
+        AuditLog.objects.filter(pk=log.pk).update(timestamp=log.timestamp - (date.today() - self.old_day))
+        self.assertEqual(archive_month(self.old_day), 0)
+        self.assertFalse(AuditLog.objects.filter(pk=archived_id).exists())
+        self.assertEqual(len(read_manifest()), 1)
+
+
+class BackupTests(TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        settings_override = override_settings(BACKUP_DIR=self.dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def _entry(self, name, kind, day):
+        path = os.path.join(self.dir, name)
+        os.makedirs(path)
+        backups.append_manifest({'name': name, 'path': path, 'database': 'db', 'kind': kind,
+                                 'started_at': f'2026-01-{day:02d}T03:00:00+00:00'})
+
+    def test_retention_keeps_last_fulls_and_their_incrementals(self):
+        self._entry('backup_1', 'full', 1)
+        self._entry('incremental_2', 'incremental', 2)
+        self._entry('backup_3', 'full', 3)
+        self._entry('incremental_4', 'incremental', 4)
+        self._entry('backup_5', 'full', 5)
+
+        self.assertEqual(backups.apply_retention('db', keep=2), ['backup_1', 'incremental_2'])
+        self.assertEqual([e['name'] for e in backups.read_manifest()], ['backup_3', 'incremental_4', 'backup_5'])
+        self.assertFalse(os.path.exists(os.path.join(self.dir, 'backup_1')))
+        self.assertEqual([e['name'] for e in backups.incrementals_after(backups.find_backup('backup_3'))],
+                         ['incremental_4'])
+
+    def test_password_is_not_left_in_environment(self):
+        env = backups.pg_env({'PASSWORD': 'secreta'})
+        self.assertEqual(env['PGPASSWORD'], 'secreta')
+        self.assertNotEqual(os.environ.get('PGPASSWORD'), 'secreta')
+
+    def test_incremental_needs_previous_backup(self):
+        with self.assertRaises(CommandError):
+            call_command('backup_db', '--incremental', stdout=StringIO())
+
+    def test_failed_dump_leaves_no_partial_directory(self):
+        # pg_dump que escribe algo y falla a la mitad
+        bin_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, bin_dir)
+        script = os.path.join(bin_dir, 'pg_dump')
+        with open(script, 'w') as f:
+            f.write('#!/bin/sh\nwhile [ "$1" != "-f" ]; do shift; done\nmkdir -p "$2" && touch "$2/toc.dat"\nexit 1\n')
+        os.chmod(script, 0o755)
+
+        with mock.patch.dict(os.environ, {'PATH': bin_dir + os.pathsep + os.environ.get('PATH', '')}):
+            out = StringIO()
+            call_command('backup_db', stdout=out)
+        self.assertIn('Error creando backup', out.getvalue())
+        self.assertEqual(os.listdir(self.dir), [])
+
+    def test_full_and_incremental_backup(self):
+        if connection.vendor != 'postgresql' or not shutil.which('pg_dump'):
+            self.skipTest('Requiere PostgreSQL y pg_dump')
+        call_command('backup_db', '--jobs', '2', '--compress', '1', stdout=StringIO())
+        AuditLog.objects.create(action='UPDATE', model_affected='Volunteer', record_id='V-1', changes={})
+        call_command('backup_db', '--incremental', stdout=StringIO())
+
+        full, incremental = backups.read_manifest()
+        self.assertEqual((full['kind'], incremental['kind']), ('full', 'incremental'))
+        self.assertGreater(full['bytes'], 0)
+        self.assertIn('duration_s', full)
+        self.assertEqual(incremental['since'], full['started_at'])
+        self.assertGreaterEqual(incremental['tables']['auditing_auditlog'], 1)
+        self.assertEqual(set(incremental['tables']), set(backups.INCREMENTAL_TABLES))
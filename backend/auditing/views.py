@@ -1,8 +1,76 @@
+import heapq
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
 from rest_framework import viewsets, permissions
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 from .models import AuditLog
 from .serializers import AuditLogSerializer
+from .filters import AuditLogFilterBackend, archived_row_matches, date_range
+from .pagination import AuditLogCursorPagination
+from .archive import iter_archived, months_in_range, row_key
 
 class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = AuditLog.objects.all().order_by('-timestamp')
+    # select_related evita una consulta por fila para user_name
+    queryset = AuditLog.objects.select_related('user').order_by('-timestamp', '-id')
     serializer_class = AuditLogSerializer
-    permission_classes = [permissions.IsAdminUser]
\ No newline at end of file
+    permission_classes = [permissions.IsAdminUser]
+    pagination_class = AuditLogCursorPagination
+    filter_backends = [AuditLogFilterBackend]
+
+    def list(self, request, *args, **kwargs):
+        return self._paginated(self.filter_queryset(self.get_queryset()))
+
+    @action(detail=False, methods=['GET'], url_path=r'by-record/(?P<model>[^/.]+)/(?P<record_id>[^/]+)')
+    def by_record(self, request, model=None, record_id=None):
+        # Historial de un registro, ej. by-record/Volunteer/FGG-2026-0338/ (índice auditlog_record_idx)
+        queryset = self.filter_queryset(self.get_queryset()).filter(model_affected=model, record_id=record_id)
+        return self._paginated(queryset, lambda row: row['model_affected'] == model and row['record_id'] == record_id)
+
+    def _paginated(self, queryset, row_filter=None):
+        # Sin filtro de fecha, o si el rango no toca meses archivados, todo sale de la base
+        params = self.request.query_params
+        months = []
+        if params.get('date_from') or params.get('date_to'):
+            months = months_in_range(*date_range(params))
+        if not months:
+            page = self.paginate_queryset(queryset)
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
+        return self._merged_with_archive(queryset, months, row_filter)
+
+    def _merged_with_archive(self, queryset, months, row_filter):
+        """
+        Une la base y los meses archivados en el mismo orden (-timestamp, -id).
+        Pagina por llave con ?before=<timestamp>|<id>, la última entrada de la página anterior.
+        """
+        params = self.request.query_params
+        page_size = self.paginator.get_page_size(self.request)
+        before = None
+        if params.get('before'):
+            timestamp, _, last_id = params['before'].rpartition('|')
+            timestamp = parse_datetime(timestamp)
+            if timestamp is None or not last_id.isdigit():
+                raise ValidationError({'before': "Cursor inválido."})
+            before = (timestamp, int(last_id))
+            queryset = queryset.filter(Q(timestamp__lt=before[0]) | Q(timestamp=before[0], id__lt=before[1]))
+
+        rows = {row['id']: row for row in heapq.nlargest(
+            page_size + 1,
+            (row for row in iter_archived(months)
+             if archived_row_matches(row, params)
+             and (row_filter is None or row_filter(row))
+             and (before is None or row_key(row) < before)),
+            key=row_key,
+        )}
+        # Si una entrada quedó en ambos lados (archivado interrumpido), gana la de la base
+        rows.update({row['id']: row for row in self.get_serializer(queryset[:page_size + 1], many=True).data})
+        results = sorted(rows.values(), key=row_key, reverse=True)
+
+        next_url = None
+        if len(results) > page_size:
+            results = results[:page_size]
+            last = results[-1]
+            next_url = replace_query_param(self.request.build_absolute_uri(), 'before', f"{last['timestamp']}|{last['id']}")
+        return Response({'next': next_url, 'previous': None, 'results': results, 'archived_months': months})
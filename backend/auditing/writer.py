@@ -0,0 +1,77 @@
+import threading
+from django.db import transaction
+from .models import AuditLog
+
+# Estado por hilo: entradas esperando el commit, agrupadas por savepoint
+_local = threading.local()
+
+
+class _PendingGroup:
+    """Entradas registradas dentro de la misma transacción/savepoint; se escriben al confirmar."""
+
+    def __init__(self, key):
+        self.key = key
+        self.entries = []
+
+    def commit(self):
+        groups = _pending_groups()
+        if groups.get(self.key) is self:
+            del groups[self.key]
+        _write(self.entries)
+
+
+def _pending_groups():
+    if not hasattr(_local, 'groups'):
+        _local.groups = {}
+    return _local.groups
+
+
+def _write(entries):
+    # Se escribe en el mismo on_commit de la transacción que confirmó los datos: si algo
+    # falla después (otra transacción, la respuesta, el worker), estas entradas ya están.
+    if entries:
+        AuditLog.objects.bulk_create(entries)
+
+
+def log_change(user, action, model_affected, record_id, changes, justification=''):
+    """
+    Registra un cambio en la bitácora. No hace el INSERT en ese momento: se escribe
+    cuando la transacción se confirma (y nunca si se revierte), junto con las demás
+    entradas de esa transacción en un solo bulk_create.
+    """
+    entry = AuditLog(
+        user=user,
+        action=action,
+        model_affected=model_affected,
+        record_id=str(record_id)[:100],
+        changes=changes,
+        justification=justification,
+    )
+    log_changes([entry])
+    return entry
+
+
+def log_changes(entries):
+    """Versión masiva de log_change para importadores: recibe instancias de AuditLog sin guardar."""
+    entries = list(entries)
+    if not entries:
+        return
+
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        _write(entries)
+        return
+
+    # Un grupo por savepoint activo: si ese savepoint se revierte, Django descarta su
+    # callback de on_commit y las entradas se pierden con él.
+    key = tuple(connection.savepoint_ids)
+    groups = _pending_groups()
+    group = groups.get(key)
+    pending = {func for _, func, _ in connection.run_on_commit}
+    if group is None or group.commit not in pending:
+        # Los grupos de transacciones revertidas ya no tienen callback: se descartan
+        for stale_key in [k for k, g in groups.items() if g.commit not in pending]:
+            del groups[stale_key]
+        group = groups[key] = _PendingGroup(key)
+        transaction.on_commit(group.commit)
+    group.entries.extend(entries)
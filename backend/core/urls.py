@@ -6,11 +6,13 @@ from rest_framework_simplejwt.views import TokenRefreshView
 # Importamos las vistas necesarias
 from users.views import MyTokenObtainPairView, UserViewSet
 from auditing.views import AuditLogViewSet
+from monitoring.views import MetricsViewSet
 
 # Router para el panel de administración
 admin_router = DefaultRouter()
 admin_router.register(r'users', UserViewSet)
 admin_router.register(r'logs', AuditLogViewSet)
+admin_router.register(r'metrics', MetricsViewSet, basename='metrics')
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -25,6 +27,8 @@ urlpatterns = [
     path('api/volunteers/', include('volunteers.urls')), 
     
     path('api/studies/', include('studies.urls')),
+
+    path('api/reports/', include('reports.urls')),
     
     # Rutas de Administración
     path('api/admin/', include(admin_router.urls)), 
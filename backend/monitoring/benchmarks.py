@@ -0,0 +1,182 @@
+"""
+Benchmarks de las rutas principales contra la base configurada (pensado para un
+PostgreSQL local): para cada escala se generan voluntarios sintéticos (volunteers.fake)
+y se miden listado, búsqueda, detalle, edición, importación de un .xlsx, exportación y
+la bitácora. Cada medición guarda min/p50/p95 en ms, consultas y bytes.
+
+Cada escala corre dentro de una transacción que se revierte al final, así que la base
+queda como estaba; con keep=True los datos generados se conservan.
+"""
+import io
+import platform
+import subprocess
+import time
+from datetime import datetime
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from rest_framework.test import APIClient
+from volunteers.export import SEX_LABELS
+from volunteers.fake import FakeVolunteerFactory, generate
+from volunteers.importer import VolunteerImporter
+from volunteers.models import Volunteer
+from volunteers.readers import SpreadsheetReader
+from .metrics import percentile
+
+DEFAULT_SCALES = (1000, 10000, 100000)
+
+
+class _Rollback(Exception):
+    pass
+
+
+class QueryCounter:
+    """execute_wrapper que solo cuenta consultas y su tiempo."""
+
+    def __init__(self):
+        self.count = 0
+        self.sql_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.sql_time += time.perf_counter() - started
+
+
+def measure(operation, repeat):
+    """Corre `operation` (devuelve bytes procesados) `repeat` veces y resume los tiempos."""
+    durations, queries, sql_times, sizes = [], [], [], []
+    for _ in range(repeat):
+        counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            started = time.perf_counter()
+            size = operation()
+            durations.append((time.perf_counter() - started) * 1000)
+        queries.append(counter.count)
+        sql_times.append(counter.sql_time * 1000)
+        sizes.append(size or 0)
+    return {
+        'runs': repeat,
+        'min_ms': round(min(durations), 2),
+        'p50_ms': round(percentile(durations, 0.50), 2),
+        'p95_ms': round(percentile(durations, 0.95), 2),
+        'max_ms': round(max(durations), 2),
+        'queries': max(queries),
+        'sql_ms': round(sum(sql_times) / repeat, 2),
+        'bytes': max(sizes),
+    }
+
+
+def _response_size(response, expected=200):
+    if response.status_code != expected:
+        raise RuntimeError(f"{response.status_code}: {getattr(response, 'data', '')}")
+    if response.streaming:
+        return sum(len(block) for block in response.streaming_content)
+    return len(response.content)
+
+
+def build_import_file(factory, rows):
+    """Libro .xlsx con `rows` voluntarios nuevos, con los encabezados del importador."""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Voluntarios')
+    sheet.append(['CURP', 'Nombre', 'Segundo nombre', 'Apellido paterno', 'Apellido materno',
+                  'Sexo', 'Fecha nacimiento', 'Telefono'])
+    for _ in range(rows):
+        v = factory.volunteer()
+        sheet.append([v.curp, v.first_name, v.middle_name, v.last_name_paternal, v.last_name_maternal,
+                      SEX_LABELS[v.sex], v.birth_date, v.phone])
+    output = io.BytesIO()
+    workbook.save(output)
+    return output.getvalue()
+
+
+def run_scale(scale, user, repeat=5, import_rows=1000, seed=0):
+    """Genera `scale` voluntarios y mide cada operación. Devuelve el resultado de la escala."""
+    # Fuera de las pruebas 'testserver' no está en ALLOWED_HOSTS
+    client = APIClient(HTTP_HOST=next((h for h in settings.ALLOWED_HOSTS if h.strip('.*')), 'localhost'))
+    client.force_authenticate(user)
+
+    # Los voluntarios que ya hubiera en la base también cuentan (sobre todo en la exportación)
+    existing = Volunteer.objects.count()
+    started = time.perf_counter()
+    totals = generate(scale, study_count=max(10, scale // 1000), seed=seed)
+    result = {'scale': scale, 'existing_volunteers': existing,
+              'generate_s': round(time.perf_counter() - started, 2), **totals, 'operations': {}}
+
+    factory = FakeVolunteerFactory(seed=seed + 1)
+    sample = Volunteer.objects.order_by('?').values('pk', 'last_name_paternal').first()
+    search = sample['last_name_paternal']
+    edits = iter(range(10 ** 6))
+
+    def update():
+        response = client.patch(f'/api/volunteers/{sample["pk"]}/',
+                                {'phone': f"55{next(edits):08d}", 'justification': 'benchmark'}, format='json')
+        return _response_size(response)
+
+    def import_xlsx():
+        # Cada corrida importa CURPs nuevas; el armado del archivo no entra en la medición
+        content = files.pop()
+        importer = VolunteerImporter(user=user).import_batches(SpreadsheetReader(io.BytesIO(content), 'bench.xlsx'))
+        if importer.errors:
+            raise RuntimeError(importer.errors[:3])
+        return len(content)
+
+    files = [build_import_file(factory, import_rows) for _ in range(repeat)]
+
+    operations = {
+        'list': lambda: _response_size(client.get('/api/volunteers/?page_size=50')),
+        'search': lambda: _response_size(client.get('/api/volunteers/', {'search': search})),
+        'retrieve': lambda: _response_size(client.get(f'/api/volunteers/{sample["pk"]}/')),
+        'update': update,
+        'import_xlsx': import_xlsx,
+        'export_csv': lambda: _response_size(client.get('/api/volunteers/export/?format=csv')),
+        'audit_logs': lambda: _response_size(client.get('/api/admin/logs/')),
+    }
+    for name, operation in operations.items():
+        result['operations'][name] = measure(operation, repeat)
+    result['operations']['import_xlsx']['rows'] = import_rows
+    return result
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                cwd=settings.BASE_DIR).stdout.strip()
+    except OSError:
+        commit = ''
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git_commit': commit,
+        'database': connection.vendor,
+        'database_version': connection.Database.sqlite_version
+        if connection.vendor == 'sqlite' else str(connection.pg_version),
+        'django': django.get_version(),
+        'python': platform.python_version(),
+        'host': platform.node(),
+    }
+
+
+def run_benchmarks(scales=DEFAULT_SCALES, repeat=5, import_rows=1000, seed=0, keep=False, on_scale=None):
+    """Corre todas las escalas y devuelve {'environment': ..., 'results': [...]} listo para JSON."""
+    results = []
+    for scale in scales:
+        try:
+            with transaction.atomic():
+                user, _ = get_user_model().objects.get_or_create(
+                    username='benchmark', defaults={'is_staff': True, 'is_superuser': True},
+                )
+                result = run_scale(scale, user, repeat=repeat, import_rows=import_rows, seed=seed)
+                if not keep:
+                    raise _Rollback
+        except _Rollback:
+            pass
+        results.append(result)
+        if on_scale:
+            on_scale(result)
+    return {'environment': environment(), 'repeat': repeat, 'results': results}
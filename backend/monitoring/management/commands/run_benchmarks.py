@@ -0,0 +1,43 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from monitoring.benchmarks import DEFAULT_SCALES, run_benchmarks
+
+
+class Command(BaseCommand):
+    help = ('Mide listado, búsqueda, detalle, edición, importación, exportación y bitácora con '
+            'voluntarios sintéticos a varias escalas; los datos se revierten al terminar')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scales', default=','.join(str(n) for n in DEFAULT_SCALES),
+                            help='Voluntarios por escala, separados por coma')
+        parser.add_argument('--repeat', type=int, default=5, help='Corridas por operación')
+        parser.add_argument('--import-rows', type=int, default=1000, help='Filas del .xlsx a importar')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Archivo JSON con los resultados (por defecto a la salida estándar)')
+        parser.add_argument('--keep', action='store_true', help='Conservar los datos generados')
+
+    def handle(self, *args, **kwargs):
+        try:
+            scales = [int(value) for value in kwargs['scales'].split(',') if value.strip()]
+        except ValueError:
+            raise CommandError("--scales debe ser una lista de números, p. ej. 1000,10000")
+        if not scales or min(scales) < 1 or kwargs['repeat'] < 1:
+            raise CommandError("Las escalas y --repeat deben ser mayores a 0.")
+
+        def progress(result):
+            self.stderr.write(f"Escala {result['scale']}: datos generados en {result['generate_s']} s")
+            for name, values in result['operations'].items():
+                self.stderr.write(
+                    f"  {name:<12} p50 {values['p50_ms']:>9.1f} ms  p95 {values['p95_ms']:>9.1f} ms  "
+                    f"{values['queries']:>4} consultas  {values['bytes']} bytes"
+                )
+
+        report = run_benchmarks(scales, repeat=kwargs['repeat'], import_rows=kwargs['import_rows'],
+                                seed=kwargs['seed'], keep=kwargs['keep'], on_scale=progress)
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if kwargs['output']:
+            with open(kwargs['output'], 'w', encoding='utf-8') as f:
+                f.write(output + '\n')
+            self.stderr.write(self.style.SUCCESS(f"Resultados guardados en {kwargs['output']}"))
+        else:
+            self.stdout.write(output)
@@ -0,0 +1,135 @@
+"""
+Métricas por petición (consultas, tiempo de SQL, de serializadores y bytes de respuesta)
+y agregados por ruta en memoria: las últimas WINDOW peticiones de cada ruta, de las que
+se sacan p50/p95/p99. Los agregados son por proceso; cada worker lleva los suyos.
+"""
+import threading
+import time
+from collections import defaultdict, deque
+
+WINDOW = 1000
+
+_local = threading.local()
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = []  # (segundos, sql)
+        self.serializer_time = 0.0
+        self._serializing = False
+
+    @property
+    def query_count(self):
+        return len(self.queries)
+
+    @property
+    def sql_time(self):
+        return sum(duration for duration, _ in self.queries)
+
+    def __call__(self, execute, sql, params, many, context):
+        # execute_wrapper de Django: se llama en cada consulta de la petición
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((time.perf_counter() - started, sql))
+
+    def top_queries(self, n):
+        return sorted(self.queries, key=lambda q: q[0], reverse=True)[:n]
+
+
+def current():
+    return getattr(_local, 'metrics', None)
+
+
+def start():
+    _local.metrics = RequestMetrics()
+    return _local.metrics
+
+
+def stop():
+    _local.metrics = None
+
+
+def instrument_serializers():
+    """
+    Mide el tiempo de BaseSerializer.data (donde DRF arma la representación). Serializer y
+    ListSerializer llaman a super().data, así que basta con envolver la propiedad base;
+    las llamadas anidadas no se cuentan dos veces.
+    """
+    from rest_framework.serializers import BaseSerializer
+
+    original = BaseSerializer.data
+    if getattr(original.fget, 'instrumented', False):
+        return
+
+    def data(self):
+        metrics = current()
+        if metrics is None or metrics._serializing:
+            return original.fget(self)
+        metrics._serializing = True
+        started = time.perf_counter()
+        try:
+            return original.fget(self)
+        finally:
+            metrics.serializer_time += time.perf_counter() - started
+            metrics._serializing = False
+
+    data.instrumented = True
+    BaseSerializer.data = property(data)
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+class RouteStats:
+    """Ventana móvil por ruta ("GET volunteer-list") con duración, consultas y bytes."""
+
+    def __init__(self, window=WINDOW):
+        self.window = window
+        self._lock = threading.Lock()
+        self._samples = defaultdict(lambda: deque(maxlen=self.window))
+        self._totals = defaultdict(int)
+
+    def record(self, route, duration, queries, sql_time, serializer_time, size):
+        with self._lock:
+            self._samples[route].append((duration, queries, sql_time, serializer_time, size))
+            self._totals[route] += 1
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._totals.clear()
+
+    def snapshot(self):
+        with self._lock:
+            samples = {route: list(values) for route, values in self._samples.items()}
+            totals = dict(self._totals)
+
+        routes = []
+        for route, values in sorted(samples.items()):
+            durations = [v[0] * 1000 for v in values]
+            queries = [v[1] for v in values]
+            routes.append({
+                'route': route,
+                'requests': totals[route],
+                'window': len(values),
+                'p50_ms': round(percentile(durations, 0.50), 2),
+                'p95_ms': round(percentile(durations, 0.95), 2),
+                'p99_ms': round(percentile(durations, 0.99), 2),
+                'avg_queries': round(sum(queries) / len(values), 2),
+                'max_queries': max(queries),
+                'avg_sql_ms': round(sum(v[2] for v in values) * 1000 / len(values), 2),
+                'avg_serializer_ms': round(sum(v[3] for v in values) * 1000 / len(values), 2),
+                'avg_bytes': round(sum(v[4] for v in values) / len(values)),
+            })
+        return routes
+
+
+route_stats = RouteStats()
@@ -0,0 +1,59 @@
+import logging
+import time
+from contextlib import ExitStack
+from django.conf import settings
+from django.db import connections
+from . import metrics
+
+logger = logging.getLogger('monitoring.slow_requests')
+
+
+def route_name(request):
+    match = getattr(request, 'resolver_match', None)
+    name = (match.view_name or match.route) if match else 'unmatched'
+    return f"{request.method} {name}"
+
+
+class RequestMetricsMiddleware:
+    """
+    Mide cada petición: número de consultas y tiempo de SQL (execute_wrapper de Django),
+    tiempo de serializadores, bytes de respuesta y duración total. Los manda en el
+    encabezado Server-Timing, los acumula por ruta (/api/admin/metrics/) y registra en
+    el log las peticiones lentas con sus consultas más pesadas.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request_metrics = metrics.start()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(request_metrics))
+                response = self.get_response(request)
+        finally:
+            metrics.stop()
+
+        duration = time.perf_counter() - request_metrics.started
+        size = 0 if response.streaming else len(response.content)
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={request_metrics.sql_time * 1000:.1f};desc="{request_metrics.query_count} queries"',
+            f'ser;dur={request_metrics.serializer_time * 1000:.1f}',
+            f'total;dur={duration * 1000:.1f}',
+            f'size;desc="{size} bytes"',
+        ])
+
+        route = route_name(request)
+        metrics.route_stats.record(route, duration, request_metrics.query_count, request_metrics.sql_time,
+                                   request_metrics.serializer_time, size)
+
+        if duration * 1000 >= getattr(settings, 'SLOW_REQUEST_MS', 1000):
+            top = request_metrics.top_queries(getattr(settings, 'SLOW_REQUEST_TOP_QUERIES', 5))
+            logger.warning(
+                "Petición lenta %s %s: %.0f ms, %d consultas (%.0f ms SQL)\n%s",
+                route, request.get_full_path(), duration * 1000, request_metrics.query_count,
+                request_metrics.sql_time * 1000,
+                '\n'.join(f"  {seconds * 1000:.1f} ms  {sql[:500]}" for seconds, sql in top),
+            )
+        return response
@@ -0,0 +1,29 @@
+from rest_framework.renderers import BaseRenderer
+
+# Métricas de /api/admin/metrics/ que se exportan a Prometheus, con su tipo
+PROMETHEUS_FIELDS = [
+    ('requests', 'counter'),
+    ('p50_ms', 'gauge'), ('p95_ms', 'gauge'), ('p99_ms', 'gauge'),
+    ('avg_queries', 'gauge'), ('max_queries', 'gauge'),
+    ('avg_sql_ms', 'gauge'), ('avg_serializer_ms', 'gauge'), ('avg_bytes', 'gauge'),
+]
+
+
+class PrometheusRenderer(BaseRenderer):
+    """Formato de texto de Prometheus (?format=prometheus): una serie por métrica y ruta."""
+    media_type = 'text/plain'
+    format = 'prometheus'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if not isinstance(data, dict) or 'routes' not in data:
+            return str(data).encode(self.charset)
+
+        lines = []
+        for field, kind in PROMETHEUS_FIELDS:
+            name = f'api_request_{field}'
+            lines.append(f'# TYPE {name} {kind}')
+            for route in data['routes']:
+                label = route['route'].replace('\\', '\\\\').replace('"', '\\"')
+                lines.append(f'{name}{{route="{label}"}} {route[field]}')
+        return ('\n'.join(lines) + '\n').encode(self.charset)
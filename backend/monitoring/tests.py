@@ -0,0 +1,83 @@
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from studies.models import Study
+from .metrics import route_stats, percentile
+
+
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        route_stats.reset()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_superuser(username='admin', password='x'))
+        self.study = Study.objects.create(name='Estudio A')
+
+    def test_server_timing_header(self):
+        response = self.client.get(f'/api/studies/{self.study.id}/eligible/')
+        timing = response['Server-Timing']
+        self.assertIn('db;dur=', timing)
+        self.assertIn('queries"', timing)
+        self.assertIn('ser;dur=', timing)
+        self.assertIn(f'size;desc="{len(response.content)} bytes"', timing)
+
+    def test_route_percentiles(self):
+        for _ in range(3):
+            self.client.get(f'/api/studies/{self.study.id}/eligible/')
+        response = self.client.get('/api/admin/metrics/')
+        self.assertEqual(response.status_code, 200)
+        route = next(r for r in response.data['routes'] if r['route'] == 'GET study-eligible')
+        self.assertEqual(route['requests'], 3)
+        self.assertLessEqual(route['p50_ms'], route['p99_ms'])
+        self.assertGreater(route['avg_queries'], 0)
+
+    def test_prometheus_format_and_admin_only(self):
+        self.client.get('/api/studies/?with_stats=1')
+        response = self.client.get('/api/admin/metrics/?format=prometheus')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('# TYPE api_request_p95_ms gauge', response.content.decode())
+        self.assertIn('api_request_requests{route="GET study-list"} 1', response.content.decode())
+
+        other = APIClient()
+        other.force_authenticate(User.objects.create_user(username='recepcion', password='x'))
+        self.assertEqual(other.get('/api/admin/metrics/').status_code, 403)
+
+    @override_settings(SLOW_REQUEST_MS=0, SLOW_REQUEST_TOP_QUERIES=1)
+    def test_slow_requests_are_logged_with_top_queries(self):
+        with self.assertLogs('monitoring.slow_requests', level='WARNING') as logs:
+            self.client.get(f'/api/studies/{self.study.id}/eligible/')
+        self.assertIn('GET study-eligible', logs.output[0])
+        self.assertEqual(logs.output[0].count(' ms  '), 1)
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual((percentile(values, 0.5), percentile(values, 0.95), percentile(values, 0.99)), (50, 95, 99))
+        self.assertEqual(percentile([], 0.5), 0.0)
+
+
+class BenchmarkTests(TestCase):
+    def test_run_benchmarks_writes_json_and_rolls_back(self):
+        import json
+        import os
+        import tempfile
+        from django.core.management import call_command
+        from django.db import connection
+        from volunteers.models import Volunteer
+
+        handle, path = tempfile.mkstemp(suffix='.json')
+        os.close(handle)
+        self.addCleanup(os.remove, path)
+        call_command('run_benchmarks', scales='30', repeat=1, import_rows=5, output=path, stderr=open(os.devnull, 'w'))
+
+        with open(path, encoding='utf-8') as f:
+            report = json.load(f)
+        self.assertEqual(report['environment']['database'], connection.vendor)
+        [result] = report['results']
+        self.assertEqual(result['scale'], 30)
+        self.assertEqual(set(result['operations']), {
+            'list', 'search', 'retrieve', 'update', 'import_xlsx', 'export_csv', 'audit_logs',
+        })
+        self.assertGreater(result['operations']['export_csv']['bytes'], 0)
+        # Los datos generados se revierten
+        self.assertEqual(Volunteer.objects.count(), 0)
+        self.assertFalse(User.objects.filter(username='benchmark').exists())
@@ -0,0 +1,17 @@
+from rest_framework import viewsets, permissions
+from rest_framework.renderers import JSONRenderer, BrowsableAPIRenderer
+from rest_framework.response import Response
+from .metrics import route_stats, WINDOW
+from .renderers import PrometheusRenderer
+
+
+class MetricsViewSet(viewsets.ViewSet):
+    """
+    Latencia y consultas por ruta de este proceso (últimas WINDOW peticiones de cada una).
+    ?format=prometheus para el formato de texto de Prometheus.
+    """
+    permission_classes = [permissions.IsAdminUser]
+    renderer_classes = [JSONRenderer, BrowsableAPIRenderer, PrometheusRenderer]
+
+    def list(self, request):
+        return Response({'window': WINDOW, 'routes': route_stats.snapshot()})
@@ -0,0 +1,9 @@
+from django.contrib import admin
+from .models import DailyMetric
+
+
+@admin.register(DailyMetric)
+class DailyMetricAdmin(admin.ModelAdmin):
+    list_display = ('day', 'metric', 'dimension', 'value')
+    list_filter = ('metric',)
+    ordering = ('-day',)
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.6 on 2026-10-18 01:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DailyMetric',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('metric', models.CharField(choices=[('registrations', 'Registros de voluntarios'), ('approvals', 'Aprobaciones'), ('rejections', 'Rechazos'), ('enrollments', 'Inscripciones a estudios'), ('completions', 'Estudios terminados (pago)'), ('washout_backlog', 'Voluntarios en lavado')], max_length=30)),
+                ('dimension', models.CharField(blank=True, default='', max_length=50)),
+                ('value', models.IntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['metric', 'day'], name='dailymetric_metric_day_idx')],
+                'constraints': [models.UniqueConstraint(fields=('metric', 'dimension', 'day'), name='unique_daily_metric')],
+            },
+        ),
+    ]
@@ -0,0 +1,42 @@
+from django.db import models
+
+
+class DailyMetric(models.Model):
+    """
+    Agregado diario precalculado por rollup_reports. `dimension` distingue series dentro
+    de la misma métrica (ej. el id del estudio); vacío si la métrica es global.
+    """
+    METRIC_CHOICES = [
+        ('registrations', 'Registros de voluntarios'),
+        ('approvals', 'Aprobaciones'),
+        ('rejections', 'Rechazos'),
+        ('enrollments', 'Inscripciones a estudios'),
+        ('completions', 'Estudios terminados (pago)'),
+        ('washout_backlog', 'Voluntarios en lavado'),
+    ]
+
+    day = models.DateField()
+    metric = models.CharField(max_length=30, choices=METRIC_CHOICES)
+    dimension = models.CharField(max_length=50, blank=True, default='')
+    value = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['metric', 'dimension', 'day'], name='unique_daily_metric'),
+        ]
+        indexes = [
+            # Series de una métrica en un rango de fechas (sumando dimensiones)
+            models.Index(fields=['metric', 'day'], name='dailymetric_metric_day_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.metric}{f' [{self.dimension}]' if self.dimension else ''}: {self.value}"
+
+
+class RollupDay(models.Model):
+    """Días ya calculados; el siguiente rollup incremental empieza en el último."""
+    day = models.DateField(unique=True)
+    computed_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return str(self.day)
@@ -0,0 +1,134 @@
+"""
+Rollups diarios para los reportes de reclutamiento.
+
+Cada bloque de días se recalcula completo dentro de una transacción (se borran sus
+filas de DailyMetric y se vuelven a insertar), así que correrlo dos veces da el mismo
+resultado. Las consultas agrupan por día todo el bloque de una vez.
+"""
+from collections import Counter, defaultdict
+from datetime import date, datetime, time, timedelta
+from django.db import transaction
+from django.db.models import Count, Min
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from auditing.archive import iter_archived, months_in_range, row_key
+from auditing.models import AuditLog
+from studies.models import Study
+from volunteers.models import Volunteer, Participation
+from volunteers.status import WASHOUT_DAYS
+from .models import DailyMetric, RollupDay
+
+DEFAULT_CHUNK_DAYS = 31
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _per_day(queryset, field, start, end, *extra):
+    """{(día, *extra): total} de las filas con `field` en [start, end]."""
+    rows = queryset.filter(**{
+        f'{field}__gte': _day_start(start), f'{field}__lt': _day_start(end + timedelta(days=1)),
+    }).annotate(day=TruncDate(field)).order_by().values('day', *extra).annotate(total=Count('id'))
+    return {(row['day'], *(row[name] for name in extra)): row['total'] for row in rows}
+
+
+def _status_changes(start, end, new_status):
+    # Cambios de estatus administrativo registrados en la bitácora (VolunteerSerializer.update)
+    logs = AuditLog.objects.filter(model_affected='Volunteer', changes__manual_status__to=new_status)
+    totals = Counter(_per_day(logs, 'timestamp', start, end))
+
+    # Los meses ya archivados (archive_audit_logs) se leen de sus segmentos
+    for row in iter_archived(months_in_range(_day_start(start), _day_start(end + timedelta(days=1)))):
+        change = (row['changes'] or {}).get('manual_status')
+        if row['model_affected'] != 'Volunteer' or not isinstance(change, dict) or change.get('to') != new_status:
+            continue
+        day = timezone.localtime(row_key(row)[0]).date()
+        if start <= day <= end:
+            totals[(day,)] += 1
+    return dict(totals)
+
+
+def _washout_backlog(start, end):
+    """Voluntarios en lavado cada día: con algún pago en los WASHOUT_DAYS días anteriores."""
+    payments = Participation.objects.filter(
+        study__payment_date__gt=start - timedelta(days=WASHOUT_DAYS), study__payment_date__lte=end,
+    ).values_list('volunteer_id', 'study__payment_date').distinct()
+
+    covered = defaultdict(set)
+    for volunteer_id, paid in payments:
+        first = max(paid, start)
+        last = min(paid + timedelta(days=WASHOUT_DAYS - 1), end)
+        covered[volunteer_id].update(first + timedelta(days=i) for i in range((last - first).days + 1))
+
+    backlog = Counter()
+    for days in covered.values():
+        backlog.update(days)
+    return {(day,): total for day, total in backlog.items()}
+
+
+def compute_metrics(start, end):
+    """Filas de DailyMetric (sin guardar) para los días de start a end, ambos incluidos."""
+    series = {
+        'registrations': _per_day(Volunteer.objects.all(), 'created_at', start, end),
+        'approvals': _status_changes(start, end, 'eligible'),
+        'rejections': _status_changes(start, end, 'rejected'),
+        'enrollments': _per_day(Participation.objects.all(), 'assigned_at', start, end, 'study_id'),
+        'washout_backlog': _washout_backlog(start, end),
+    }
+    completions = Study.objects.filter(payment_date__gte=start, payment_date__lte=end) \
+        .order_by().values('payment_date').annotate(total=Count('id'))
+    series['completions'] = {(row['payment_date'],): row['total'] for row in completions}
+
+    metrics = []
+    for metric, values in series.items():
+        for (day, *dimension), total in values.items():
+            dimension = str(dimension[0]) if dimension else ''
+            metrics.append(DailyMetric(day=day, metric=metric, dimension=dimension, value=total))
+    return metrics
+
+
+def rollup_range(start, end, chunk_days=DEFAULT_CHUNK_DAYS, on_chunk=None):
+    """Recalcula de start a end por bloques de `chunk_days`, un bloque por transacción."""
+    if chunk_days < 1:
+        raise ValueError("chunk_days debe ser mayor o igual a 1")
+    chunk_start = start
+    total = 0
+    while chunk_start <= end:
+        chunk_end = min(chunk_start + timedelta(days=chunk_days - 1), end)
+        metrics = compute_metrics(chunk_start, chunk_end)
+        with transaction.atomic():
+            DailyMetric.objects.filter(day__gte=chunk_start, day__lte=chunk_end).delete()
+            DailyMetric.objects.bulk_create(metrics, batch_size=1000)
+            days = [chunk_start + timedelta(days=i) for i in range((chunk_end - chunk_start).days + 1)]
+            RollupDay.objects.filter(day__in=days).delete()
+            RollupDay.objects.bulk_create([RollupDay(day=day) for day in days])
+        total += len(metrics)
+        if on_chunk:
+            on_chunk(chunk_start, chunk_end, len(metrics))
+        chunk_start = chunk_end + timedelta(days=1)
+    return total
+
+
+def earliest_day():
+    """Primer día con datos: el registro más antiguo o el primer pago de estudio."""
+    candidates = [
+        Volunteer.objects.aggregate(first=Min('created_at'))['first'],
+        Study.objects.aggregate(first=Min('payment_date'))['first'],
+    ]
+    days = [timezone.localtime(value).date() if isinstance(value, datetime) else value
+            for value in candidates if value]
+    return min(days) if days else None
+
+
+def pending_range(today=None):
+    """
+    Rango del rollup incremental: desde el último día calculado (se repite por si ese día
+    tuvo cambios tardíos) hasta ayer. None si no hay nada que calcular.
+    """
+    yesterday = (today or date.today()) - timedelta(days=1)
+    last = RollupDay.objects.order_by('-day').values_list('day', flat=True).first()
+    start = last or earliest_day()
+    if start is None or start > yesterday:
+        return None
+    return start, yesterday
@@ -0,0 +1,119 @@
+from datetime import date, timedelta
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command, CommandError
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from auditing.models import AuditLog
+from studies.models import Study
+from volunteers.models import Volunteer, Participation
+from .models import DailyMetric
+from .rollups import pending_range, rollup_range
+
+
+class RollupTests(TestCase):
+    def setUp(self):
+        today = date.today()
+        self.days_ago = lambda n: today - timedelta(days=n)
+
+        for i, age in enumerate([20, 20, 12, 3]):
+            volunteer = Volunteer.objects.create(first_name=f'V{i}', last_name_paternal='Prueba')
+            Volunteer.objects.filter(pk=volunteer.pk).update(created_at=volunteer.created_at - timedelta(days=age))
+        study = Study.objects.create(name='Pagado', payment_date=self.days_ago(10), is_active=False)
+        for volunteer in Volunteer.objects.all()[:2]:
+            Participation.objects.create(volunteer=volunteer, study=study)
+        Participation.objects.filter(study=study).update(assigned_at=study.created_at - timedelta(days=15))
+
+        AuditLog.objects.bulk_create([
+            AuditLog(action='UPDATE', model_affected='Volunteer', record_id='V-1',
+                     changes={'manual_status': {'from': 'waiting_approval', 'to': 'eligible'}}),
+            AuditLog(action='UPDATE', model_affected='Volunteer', record_id='V-2',
+                     changes={'manual_status': {'from': 'eligible', 'to': 'rejected'}}),
+        ])
+        AuditLog.objects.update(timestamp=AuditLog.objects.first().timestamp - timedelta(days=5))
+
+    def _metrics(self):
+        return sorted(DailyMetric.objects.values_list('metric', 'dimension', 'day', 'value'))
+
+    def _value(self, metric, day):
+        return sum(DailyMetric.objects.filter(metric=metric, day=day).values_list('value', flat=True))
+
+    def test_nightly_rollup(self):
+        call_command('rollup_reports', stdout=StringIO())
+        self.assertEqual(self._value('registrations', self.days_ago(20)), 2)
+        self.assertEqual(self._value('registrations', self.days_ago(3)), 1)
+        self.assertEqual(self._value('enrollments', self.days_ago(15)), 2)
+        self.assertEqual(self._value('completions', self.days_ago(10)), 1)
+        self.assertEqual(self._value('approvals', self.days_ago(5)), 1)
+        self.assertEqual(self._value('rejections', self.days_ago(5)), 1)
+        # Los dos pagados siguen en lavado desde el día del pago
+        self.assertEqual(self._value('washout_backlog', self.days_ago(11)), 0)
+        self.assertEqual(self._value('washout_backlog', self.days_ago(1)), 2)
+
+    def test_rollup_is_idempotent_and_incremental(self):
+        call_command('rollup_reports', stdout=StringIO())
+        first = self._metrics()
+        yesterday = self.days_ago(1)
+        self.assertEqual(pending_range(), (yesterday, yesterday))
+
+        call_command('rollup_reports', stdout=StringIO())
+        self.assertEqual(self._metrics(), first)
+
+    def test_backfill_in_chunks_gives_same_result(self):
+        call_command('rollup_reports', stdout=StringIO())
+        expected = self._metrics()
+        DailyMetric.objects.all().delete()
+
+        out = StringIO()
+        call_command('rollup_reports', '--backfill', '--chunk-days', '4', stdout=out)
+        self.assertEqual(self._metrics(), expected)
+        self.assertGreater(out.getvalue().count(' filas\n'), 1)
+
+    def test_chunk_days_must_be_positive(self):
+        for value in ('0', '-3'):
+            with self.assertRaises(CommandError):
+                call_command('rollup_reports', '--backfill', '--chunk-days', value, stdout=StringIO())
+        with self.assertRaises(ValueError):
+            rollup_range(self.days_ago(3), self.days_ago(1), chunk_days=0)
+
+
+class ReportApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_superuser(username='admin', password='x'))
+        monday = date(2026, 3, 2)
+        DailyMetric.objects.bulk_create([
+            DailyMetric(day=monday, metric='registrations', value=3),
+            DailyMetric(day=monday + timedelta(days=6), metric='registrations', value=2),
+            DailyMetric(day=monday + timedelta(days=7), metric='registrations', value=4),
+            DailyMetric(day=monday, metric='enrollments', dimension='1', value=5),
+            DailyMetric(day=monday, metric='enrollments', dimension='2', value=1),
+            DailyMetric(day=monday, metric='washout_backlog', value=10),
+            DailyMetric(day=monday + timedelta(days=3), metric='washout_backlog', value=12),
+        ])
+        self.range = 'date_from=2026-03-02&date_to=2026-03-15'
+
+    def _points(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.data)
+        return [(str(p['period']), p['value']) for p in response.data['points']]
+
+    def test_weekly_series(self):
+        self.assertEqual(self._points(f'/api/reports/registrations/?{self.range}&interval=week'),
+                         [('2026-03-02', 5), ('2026-03-09', 4)])
+        # Las fotos diarias toman el último valor de la semana
+        self.assertEqual(self._points(f'/api/reports/washout_backlog/?{self.range}&interval=week'),
+                         [('2026-03-02', 12), ('2026-03-09', 0)])
+
+    def test_daily_series_and_dimension(self):
+        points = self._points('/api/reports/enrollments/?date_from=2026-03-02&date_to=2026-03-04')
+        self.assertEqual(points, [('2026-03-02', 6), ('2026-03-03', 0), ('2026-03-04', 0)])
+        points = self._points('/api/reports/enrollments/?date_from=2026-03-02&date_to=2026-03-02&dimension=2')
+        self.assertEqual(points, [('2026-03-02', 1)])
+
+    def test_errors(self):
+        self.assertEqual(self.client.get('/api/reports/nada/').status_code, 404)
+        self.assertEqual(self.client.get('/api/reports/registrations/?interval=year').status_code, 400)
+        self.assertEqual(len(self.client.get('/api/reports/').data), len(DailyMetric.METRIC_CHOICES))
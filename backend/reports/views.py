@@ -0,0 +1,90 @@
+from collections import defaultdict
+from datetime import date, timedelta
+from django.db.models import Sum
+from django.utils.dateparse import parse_date
+from rest_framework import viewsets, permissions, status
+from rest_framework.response import Response
+from .models import DailyMetric
+
+# Métricas que son una foto del día (no se suman al agrupar: se toma el último día del periodo)
+SNAPSHOT_METRICS = {'washout_backlog'}
+INTERVALS = ('day', 'week', 'month')
+DEFAULT_DAYS = 90
+
+
+def period_start(day, interval):
+    if interval == 'week':
+        return day - timedelta(days=day.weekday())
+    if interval == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def next_period(period, interval):
+    if interval == 'week':
+        return period + timedelta(days=7)
+    if interval == 'month':
+        return (period.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return period + timedelta(days=1)
+
+
+class ReportViewSet(viewsets.ViewSet):
+    """
+    Series de tiempo leídas de los agregados diarios (rollup_reports), nunca de las tablas vivas.
+      GET /api/reports/                    métricas disponibles
+      GET /api/reports/<métrica>/?date_from=&date_to=&interval=day|week|month&dimension=<id de estudio>
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def list(self, request):
+        return Response([{'metric': code, 'label': label} for code, label in DailyMetric.METRIC_CHOICES])
+
+    def retrieve(self, request, pk=None):
+        if pk not in dict(DailyMetric.METRIC_CHOICES):
+            return Response({"detail": "Métrica desconocida."}, status=status.HTTP_404_NOT_FOUND)
+
+        params = request.query_params
+        errors = {}
+        date_to = self._date(params, 'date_to', errors) or date.today() - timedelta(days=1)
+        date_from = self._date(params, 'date_from', errors) or date_to - timedelta(days=DEFAULT_DAYS - 1)
+        interval = params.get('interval', 'day')
+        if interval not in INTERVALS:
+            errors['interval'] = f"Debe ser uno de: {', '.join(INTERVALS)}."
+        if errors:
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+        rows = DailyMetric.objects.filter(metric=pk, day__gte=date_from, day__lte=date_to)
+        if params.get('dimension'):
+            rows = rows.filter(dimension=params['dimension'])
+        # Un valor por día (suma de las dimensiones, ej. todos los estudios)
+        daily = rows.values('day').annotate(total=Sum('value')).order_by('day')
+
+        series = defaultdict(int)
+        for row in daily:
+            period = period_start(row['day'], interval)
+            if pk in SNAPSHOT_METRICS:
+                series[period] = row['total']
+            else:
+                series[period] += row['total']
+
+        # Periodos sin datos salen en cero para que la gráfica no tenga huecos
+        points = []
+        period = period_start(date_from, interval)
+        while period <= date_to:
+            points.append({'period': period, 'value': series.get(period, 0)})
+            period = next_period(period, interval)
+
+        return Response({'metric': pk, 'interval': interval, 'date_from': date_from, 'date_to': date_to,
+                         'points': points})
+
+    @staticmethod
+    def _date(params, name, errors):
+        if not params.get(name):
+            return None
+        try:
+            value = parse_date(params[name])
+        except ValueError:
+            value = None
+        if value is None:
+            errors[name] = "Fecha inválida (use AAAA-MM-DD)."
+        return value
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class StudiesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'studies'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,80 @@
+"""
+Caché de lectura para el listado y el detalle de estudios.
+
+Cada respuesta se guarda junto con la versión con la que se armó; al guardar o borrar
+un estudio se genera una versión nueva y lo guardado con otra versión deja de usarse.
+La versión es un valor que no se repite (tiempo en ns + aleatorio), así que si la caché
+descarta la llave de la versión, la nueva nunca coincide con datos viejos. También sirve
+de ETag: un If-None-Match vigente se contesta con 304 sin tocar la base de datos.
+
+El listado con conteos (?with_stats=1) lleva su propia versión, que además cambia con
+las inscripciones y con los voluntarios (estatus, sexo, edad).
+"""
+import time
+import uuid
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+VERSION_KEY = 'studies:version'
+STATS_VERSION_KEY = 'studies:stats-version'
+TIMEOUT = 60 * 60
+
+
+def _new_version():
+    return f"{time.time_ns():x}-{uuid.uuid4().hex[:8]}"
+
+
+def get_version(key=VERSION_KEY):
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _new_version(), timeout=None)
+        version = cache.get(key)
+    # Si la caché ni siquiera guarda la llave, cada petición trae su propia versión (no se reutiliza nada)
+    return version or _new_version()
+
+
+def bump_version(*keys):
+    # Un valor nuevo en vez de incr: no depende de que incr sea atómico en el backend
+    cache.set_many({key: _new_version() for key in keys or (VERSION_KEY, STATS_VERSION_KEY)}, timeout=None)
+
+
+def invalidate():
+    # Al confirmar: si se invalidara antes, otra petición podría guardar en caché
+    # los datos viejos con la versión nueva mientras la transacción sigue abierta.
+    transaction.on_commit(bump_version)
+
+
+def invalidate_stats():
+    """Solo los conteos: inscripciones o cambios de voluntarios."""
+    transaction.on_commit(lambda: bump_version(STATS_VERSION_KEY))
+
+
+def _etag_matches(request, etag):
+    header = request.headers.get('If-None-Match', '')
+    return header.strip() == '*' or etag in [tag.strip() for tag in header.split(',')]
+
+
+def cached_response(request, name, build, version_key=VERSION_KEY):
+    """
+    Devuelve la respuesta guardada para `name` o la arma con `build()` (una Response de DRF)
+    y la guarda si fue 200. Agrega ETag y pide al navegador revalidar siempre.
+    """
+    version = get_version(version_key)
+    etag = f'"studies-v{version}-{name}"'
+    headers = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+    if _etag_matches(request, etag):
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    key = f'studies:{name}'
+    cached = cache.get(key)
+    if cached is not None and cached[0] == version:
+        data = cached[1]
+    else:
+        response = build()
+        if response.status_code != status.HTTP_200_OK:
+            return response
+        data = response.data
+        cache.set(key, (version, data), TIMEOUT)
+    return Response(data, headers=headers)
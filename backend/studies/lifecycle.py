@@ -0,0 +1,41 @@
+import time
+from datetime import date
+from django.db import transaction
+from volunteers.models import Volunteer
+from volunteers.status import refresh_statuses
+from .models import Study
+from .cache import invalidate
+
+
+def expire_studies(today=None):
+    """
+    Marca como no vigentes, en un solo UPDATE, los estudios activos cuya fecha de pago ya
+    pasó, y recalcula en bloque el estatus de sus voluntarios (dejan de estar "En estudio"),
+    todo en una transacción.
+    Devuelve {'studies', 'volunteers', 'changed', 'update_s', 'refresh_s'}.
+    """
+    today = today or date.today()
+    started = time.monotonic()
+
+    # Cierre y recálculo en la misma transacción: si el recálculo falla, los estudios siguen
+    # activos y la siguiente corrida vuelve a intentarlo completo
+    with transaction.atomic():
+        expired = Study.objects.select_for_update().filter(is_active=True, payment_date__lt=today)
+        study_ids = list(expired.values_list('id', flat=True))
+        if study_ids:
+            Study.objects.filter(pk__in=study_ids).update(is_active=False)
+            # update() no dispara señales: la caché de estudios se invalida a mano
+            invalidate()
+        updated = time.monotonic()
+
+        volunteers = Volunteer.objects.filter(participations__study_id__in=study_ids).distinct()
+        affected = volunteers.count() if study_ids else 0
+        changed = refresh_statuses(volunteers, today=today) if study_ids else 0
+
+    return {
+        'studies': len(study_ids),
+        'volunteers': affected,
+        'changed': changed,
+        'update_s': updated - started,
+        'refresh_s': time.monotonic() - updated,
+    }
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from studies.lifecycle import expire_studies
+
+
+class Command(BaseCommand):
+    help = 'Cierra los estudios cuya fecha de pago ya pasó y recalcula el estatus de sus voluntarios. Correr a diario.'
+
+    def handle(self, *args, **kwargs):
+        result = expire_studies()
+        self.stdout.write(self.style.SUCCESS(
+            f"Estudios cerrados: {result['studies']} ({result['update_s']:.2f} s). "
+            f"Voluntarios revisados: {result['volunteers']}, Cambiaron: {result['changed']} ({result['refresh_s']:.1f} s)"
+        ))
@@ -1,5 +1,4 @@
 from django.db import models
-from datetime import date # Importante
 
 class Study(models.Model):
     name = models.CharField(max_length=200, unique=True, verbose_name="Nombre del Estudio")
@@ -11,11 +10,8 @@ class Study(models.Model):
     is_active = models.BooleanField(default=True, verbose_name="Activo")
     created_at = models.DateTimeField(auto_now_add=True)
 
-    def save(self, *args, **kwargs):
-        if self.payment_date and self.payment_date < date.today():
-            self.is_active = False
-            
-        super().save(*args, **kwargs)
+    # is_active pasa a False cuando vence payment_date: lo hace el comando diario
+    # refresh_study_states (ver studies/lifecycle.py), no el guardado.
 
     def __str__(self):
         return f"{self.name} ({'Activo' if self.is_active else 'Finalizado'})"
\ No newline at end of file
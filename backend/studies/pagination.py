@@ -0,0 +1,9 @@
+from rest_framework.pagination import CursorPagination
+
+
+class RosterCursorPagination(CursorPagination):
+    # Participantes en el orden en que se inscribieron, por llave (assigned_at, id)
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = ('assigned_at', 'id')
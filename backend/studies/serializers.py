@@ -1,7 +1,34 @@
 from rest_framework import serializers
+from volunteers.models import Participation
 from .models import Study
+from .stats import STAT_FIELDS
 
 class StudySerializer(serializers.ModelSerializer):
     class Meta:
         model = Study
-        fields = ['id', 'name', 'description', 'admission_date', 'payment_date', 'is_active']
\ No newline at end of file
+        fields = ['id', 'name', 'description', 'admission_date', 'payment_date', 'is_active']
+
+class StudyStatsSerializer(StudySerializer):
+    """Estudio con los conteos anotados por studies.stats.with_stats."""
+    stats = serializers.SerializerMethodField()
+
+    class Meta(StudySerializer.Meta):
+        fields = StudySerializer.Meta.fields + ['stats']
+
+    def get_stats(self, obj):
+        return {name: getattr(obj, name) for name in STAT_FIELDS}
+
+
+class RosterSerializer(serializers.ModelSerializer):
+    """Participante del estudio con los datos básicos del voluntario (select_related)."""
+    volunteer_id = serializers.IntegerField(source='volunteer.id')
+    code = serializers.CharField(source='volunteer.code')
+    full_name = serializers.CharField(source='volunteer.full_name')
+    sex = serializers.CharField(source='volunteer.sex')
+    age = serializers.IntegerField(source='volunteer.age')
+    status = serializers.CharField(source='volunteer.get_computed_status_display')
+    washout_until = serializers.DateField(source='volunteer.washout_until')
+
+    class Meta:
+        model = Participation
+        fields = ['id', 'assigned_at', 'volunteer_id', 'code', 'full_name', 'sex', 'age', 'status', 'washout_until']
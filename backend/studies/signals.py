@@ -0,0 +1,21 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from volunteers.models import Volunteer, Participation
+from volunteers.signals import deleted_in_cascade
+from .models import Study
+from .cache import invalidate, invalidate_stats
+
+
+@receiver([post_save, post_delete], sender=Study)
+def invalidate_study_cache(sender, instance, **kwargs):
+    invalidate()
+
+
+@receiver([post_save, post_delete], sender=Participation)
+@receiver([post_save, post_delete], sender=Volunteer)
+def invalidate_study_stats(sender, instance, origin=None, **kwargs):
+    # Los bulk_create/bulk_update no mandan señales: esos caminos pasan por refresh_statuses.
+    # Las participaciones borradas en cascada ya las cubre la señal del estudio o voluntario.
+    if sender is Participation and deleted_in_cascade(origin):
+        return
+    invalidate_stats()
@@ -0,0 +1,32 @@
+from datetime import date
+from django.db.models import Count, F, Q
+from volunteers.status import years_before
+
+# Conteos por estudio; todos salen del mismo JOIN con participaciones y voluntarios
+STAT_FIELDS = [
+    'enrolled', 'in_study', 'study_assigned', 'in_washout',
+    'female', 'male', 'sex_unknown',
+    'age_under_30', 'age_30_44', 'age_45_plus',
+]
+
+
+def with_stats(queryset, today=None):
+    """Anota en cada estudio sus inscritos y el desglose de estatus, lavado, sexo y edad (una consulta)."""
+    today = today or date.today()
+    volunteer = 'participation__volunteer__'
+
+    def count(**conditions):
+        return Count('participation', filter=Q(**{volunteer + key: value for key, value in conditions.items()}))
+
+    return queryset.annotate(
+        enrolled=Count('participation'),
+        in_study=count(computed_status='in_study'),
+        study_assigned=count(computed_status='study_assigned'),
+        in_washout=count(washout_until__gt=today),
+        female=count(sex='F'),
+        male=count(sex='M'),
+        sex_unknown=F('enrolled') - F('female') - F('male'),
+        age_under_30=count(birth_date__gt=years_before(today, 30)),
+        age_30_44=count(birth_date__lte=years_before(today, 30), birth_date__gt=years_before(today, 45)),
+        age_45_plus=count(birth_date__lte=years_before(today, 45)),
+    )
@@ -1,3 +1,253 @@
+from datetime import date, timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from volunteers.models import Volunteer, Participation
+from volunteers.status import refresh_statuses
+from .models import Study
+
+
+class StudyEligibleTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='recepcion', password='x'))
+        today = date.today()
+        self.target = today + timedelta(days=60)
+        self.study = Study.objects.create(name='Nuevo', admission_date=self.target)
+
+        def volunteer(name, sex='F', years=30, paid_days_ago=None, study=None):
+            v = Volunteer.objects.create(first_name=name, last_name_paternal='Prueba', sex=sex,
+                                         birth_date=today.replace(year=today.year - years))
+            if paid_days_ago is not None:
+                past = Study.objects.create(name=f'Pasado {name}', payment_date=today - timedelta(days=paid_days_ago),
+                                            is_active=False)
+                Participation.objects.create(volunteer=v, study=past)
+            if study:
+                Participation.objects.create(volunteer=v, study=study)
+            return v
+
+        self.free = volunteer('Libre')
+        self.male = volunteer('Hombre', sex='M', years=45)
+        # Termina su lavado (pago hace 40 días + 90) antes del internamiento, pero no hoy
+        self.washout_ends = volunteer('TerminaLavado', paid_days_ago=40)
+        self.washout = volunteer('EnLavado', paid_days_ago=10)
+        self.busy = volunteer('Ocupado', study=Study.objects.create(name='En curso'))
+        self.already = volunteer('Inscrito', study=self.study)
+        self.old = volunteer('Mayor', years=55)
+        self.old.birth_date = self.target.replace(year=self.target.year - 56) - timedelta(days=1)
+        self.old.save()
+
+    def _ids(self, query=''):
+        response = self.client.get(f'/api/studies/{self.study.id}/eligible/?{query}')
+        self.assertEqual(response.status_code, 200, response.data)
+        return {row['id'] for row in response.data['results']}
+
+    def test_eligible_on_admission_date(self):
+        self.assertEqual(self._ids(), {self.free.id, self.male.id, self.washout_ends.id})
+
+    def test_eligible_on_other_date(self):
+        self.assertEqual(self._ids(f'date={date.today()}'), {self.free.id, self.male.id, self.old.id})
+
+    def test_sex_and_age_band(self):
+        self.assertEqual(self._ids('sex=m'), {self.male.id})
+        self.assertEqual(self._ids('age_min=40&age_max=50'), {self.male.id})
+
+    def test_single_query(self):
+        url = f'/api/studies/{self.study.id}/eligible/'
+        # get_object + la consulta de elegibles
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        row = next(r for r in response.data['results'] if r['id'] == self.washout_ends.id)
+        self.assertEqual(row['available_from'], date.today() - timedelta(days=40) + timedelta(days=90))
+
+    def test_invalid_params(self):
+        for query in ['date=2026-13-40', 'sex=X', 'age_min=abc']:
+            response = self.client.get(f'/api/studies/{self.study.id}/eligible/?{query}')
+            self.assertEqual(response.status_code, 400, query)
+
+
+class StudyCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_superuser(username='admin', password='x'))
+        self.study = Study.objects.create(name='Estudio A')
+
+    def test_repeat_loads_skip_the_database(self):
+        first = self.client.get('/api/studies/')
+        self.assertEqual(first.status_code, 200)
+        with self.assertNumQueries(0):
+            again = self.client.get('/api/studies/')
+        self.assertEqual(again.data, first.data)
+
+        with self.assertNumQueries(0):
+            not_modified = self.client.get('/api/studies/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_save_and_delete_invalidate(self):
+        etag = self.client.get('/api/studies/')['ETag']
+        detail = self.client.get(f'/api/studies/{self.study.id}/')
+        self.assertEqual(detail.data['name'], 'Estudio A')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.study.description = 'Nueva'
+            self.study.save()
+            Study.objects.create(name='Estudio B')
+        response = self.client.get('/api/studies/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(s['name'] for s in response.data), ['Estudio A', 'Estudio B'])
+        self.assertEqual(self.client.get(f'/api/studies/{self.study.id}/').data['description'], 'Nueva')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.study.delete()
+        self.assertEqual(self.client.get(f'/api/studies/{self.study.id}/').status_code, 404)
+
+    def test_evicted_version_does_not_revive_stale_entries(self):
+        from .cache import VERSION_KEY
+
+        etag = self.client.get('/api/studies/')['ETag']
+        # Cambio sin señal (p. ej. un UPDATE directo) y la caché descarta la llave de la versión
+        Study.objects.filter(pk=self.study.pk).update(name='Renombrado')
+        cache.delete(VERSION_KEY)
+
+        response = self.client.get('/api/studies/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual([s['name'] for s in response.data], ['Renombrado'])
+
+    def test_missing_study_is_not_cached(self):
+        self.assertEqual(self.client.get('/api/studies/999/').status_code, 404)
+        with self.captureOnCommitCallbacks(execute=True):
+            Study.objects.create(id=999, name='Tardío')
+        self.assertEqual(self.client.get('/api/studies/999/').status_code, 200)
+
+
+class StudyLifecycleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        today = date.today()
+        self.expired = Study.objects.create(name='Vencido', payment_date=today - timedelta(days=1))
+        self.current = Study.objects.create(name='Vigente', payment_date=today + timedelta(days=5))
+        self.volunteer = Volunteer.objects.create(first_name='Ana', last_name_paternal='López')
+        self.other = Volunteer.objects.create(first_name='Luis', last_name_paternal='Ruiz')
+        Participation.objects.create(volunteer=self.volunteer, study=self.expired)
+        Participation.objects.create(volunteer=self.other, study=self.current)
+
+    def test_save_no_longer_flips_is_active(self):
+        self.expired.refresh_from_db()
+        self.assertTrue(self.expired.is_active)
+
+    def test_command_expires_studies_and_refreshes_volunteers(self):
+        self.assertEqual(Volunteer.objects.get(pk=self.volunteer.pk).computed_status, 'in_study')
+        out = StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('refresh_study_states', stdout=out)
+        self.assertIn('Estudios cerrados: 1', out.getvalue())
+        self.assertIn('Cambiaron: 1', out.getvalue())
+
+        self.assertEqual(set(Study.objects.filter(is_active=True)), {self.current})
+        self.assertEqual(Volunteer.objects.get(pk=self.volunteer.pk).computed_status, 'standby')
+        self.assertEqual(Volunteer.objects.get(pk=self.other.pk).computed_status, 'in_study')
+
+        # Correrlo de nuevo no cambia nada
+        call_command('refresh_study_states', stdout=out)
+        self.assertIn('Estudios cerrados: 0', out.getvalue().splitlines()[-1])
+
+    def test_study_cache_is_invalidated(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(username='recepcion', password='x'))
+        client.get('/api/studies/')
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('refresh_study_states', stdout=StringIO())
+        rows = {row['name']: row['is_active'] for row in client.get('/api/studies/').data}
+        self.assertEqual(rows, {'Vencido': False, 'Vigente': True})
+
+    def test_failed_refresh_keeps_studies_active(self):
+        with mock.patch('studies.lifecycle.refresh_statuses', side_effect=RuntimeError('caída')):
+            with self.assertRaises(RuntimeError):
+                call_command('refresh_study_states', stdout=StringIO())
+        self.assertTrue(Study.objects.get(pk=self.expired.pk).is_active)
+
+        # La siguiente corrida lo cierra completo
+        call_command('refresh_study_states', stdout=StringIO())
+        self.assertEqual(Volunteer.objects.get(pk=self.volunteer.pk).computed_status, 'standby')
+
+    def test_daily_status_refresh_catches_stranded_in_study(self):
+        # Estudio cerrado sin recalcular a sus voluntarios
+        Study.objects.filter(pk=self.expired.pk).update(is_active=False)
+        self.assertEqual(Volunteer.objects.get(pk=self.volunteer.pk).computed_status, 'in_study')
+
+        call_command('refresh_volunteer_status', stdout=StringIO())
+        self.assertEqual(Volunteer.objects.get(pk=self.volunteer.pk).computed_status, 'standby')
+        self.assertEqual(Volunteer.objects.get(pk=self.other.pk).computed_status, 'in_study')
+
+
+class StudyStatsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='recepcion', password='x'))
+        today = date.today()
+        self.study = Study.objects.create(name='Con inscritos')
+        self.empty = Study.objects.create(name='Vacío')
+        finished = Study.objects.create(name='Terminado', payment_date=today - timedelta(days=10), is_active=False)
+        for i, (sex, years) in enumerate([('F', 25), ('F', 35), ('M', 50), (None, 40)]):
+            volunteer = Volunteer.objects.create(first_name=f'V{i}', last_name_paternal='Prueba', sex=sex,
+                                                 birth_date=today.replace(year=today.year - years))
+            Participation.objects.create(volunteer=volunteer, study=self.study)
+        washout = Volunteer.objects.create(first_name='Lavado', last_name_paternal='Prueba', sex='M')
+        Participation.objects.create(volunteer=washout, study=finished)
+
+    def test_list_with_stats_in_one_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/studies/?with_stats=1')
+        stats = {row['name']: row['stats'] for row in response.data}
+        self.assertEqual(stats['Con inscritos'], {
+            'enrolled': 4, 'in_study': 4, 'study_assigned': 0, 'in_washout': 0,
+            'female': 2, 'male': 1, 'sex_unknown': 1,
+            'age_under_30': 1, 'age_30_44': 2, 'age_45_plus': 1,
+        })
+        self.assertEqual(stats['Vacío']['enrolled'], 0)
+        self.assertEqual(stats['Terminado']['in_washout'], 1)
+        self.assertNotIn('stats', self.client.get('/api/studies/').data[0])
+
+    def test_stats_list_is_cached_until_enrollment_changes(self):
+        first = self.client.get('/api/studies/?with_stats=1')
+        with self.assertNumQueries(0):
+            self.client.get('/api/studies/?with_stats=1')
+
+        # Una inscripción nueva invalida solo los conteos
+        plain_etag = self.client.get('/api/studies/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            volunteer = Volunteer.objects.create(first_name='Nuevo', last_name_paternal='Prueba', sex='F')
+            Participation.objects.create(volunteer=volunteer, study=self.empty)
+        response = self.client.get('/api/studies/?with_stats=1', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({row['name']: row['stats']['enrolled'] for row in response.data}['Vacío'], 1)
+        self.assertEqual(self.client.get('/api/studies/', HTTP_IF_NONE_MATCH=plain_etag).status_code, 304)
+
+        # Las inscripciones masivas (bulk_create + refresh_statuses) también
+        with self.captureOnCommitCallbacks(execute=True):
+            Participation.objects.bulk_create([Participation(volunteer=volunteer, study=self.study)])
+            refresh_statuses([volunteer.pk])
+        response = self.client.get('/api/studies/?with_stats=1')
+        self.assertEqual({row['name']: row['stats']['enrolled'] for row in response.data}['Con inscritos'], 5)
+
+    def test_roster_in_constant_queries(self):
+        url = f'/api/studies/{self.study.id}/roster/?page_size=3'
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['study']['stats']['enrolled'], 4)
+        self.assertEqual([row['full_name'].split()[0] for row in response.data['results']], ['V0', 'V1', 'V2'])
+        self.assertEqual(response.data['results'][0]['status'], 'En estudio')
 
-# Create your tests here.
+        rest = self.client.get(response.data['next'])
+        self.assertEqual([row['code'] for row in rest.data['results']],
+                         [Volunteer.objects.get(first_name='V3').code])
@@ -1,8 +1,19 @@
+from datetime import date
+from django.db import transaction
+from django.utils.dateparse import parse_date
 from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import action
 from rest_framework.response import Response
 from .models import Study
-from .serializers import StudySerializer
-from auditing.models import AuditLog
+from .serializers import StudySerializer, StudyStatsSerializer, RosterSerializer
+from .cache import cached_response, STATS_VERSION_KEY
+from .stats import with_stats
+from .pagination import RosterCursorPagination
+from volunteers.models import Participation
+from auditing.writer import log_change
+from volunteers.enrollment import eligible_volunteers
+from volunteers.pagination import VolunteerCursorPagination
+from volunteers.serializers import EligibleVolunteerSerializer
 
 class StudyViewSet(viewsets.ModelViewSet):
     queryset = Study.objects.all()
@@ -14,6 +25,35 @@ class StudyViewSet(viewsets.ModelViewSet):
             return [permissions.IsAdminUser()]
         return [permissions.IsAuthenticated()]
 
+    def _with_stats(self):
+        # ?with_stats=1 en el listado, y siempre en el roster
+        return self.action == 'roster' or (self.action == 'list' and bool(self.request.query_params.get('with_stats')))
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self._with_stats():
+            return with_stats(queryset).order_by('id')
+        return queryset
+
+    def get_serializer_class(self):
+        if self._with_stats():
+            return StudyStatsSerializer
+        return super().get_serializer_class()
+
+    def list(self, request, *args, **kwargs):
+        def build():
+            return super(StudyViewSet, self).list(request, *args, **kwargs)
+
+        if self._with_stats():
+            # Los conteos tienen su propia versión (inscripciones, voluntarios) y la fecha en la
+            # llave, porque lavado y edad dependen del día
+            return cached_response(request, f'list-stats-{date.today()}', build, version_key=STATS_VERSION_KEY)
+        return cached_response(request, 'list', build)
+
+    def retrieve(self, request, *args, **kwargs):
+        return cached_response(request, f"detail-{kwargs['pk']}",
+                               lambda: super(StudyViewSet, self).retrieve(request, *args, **kwargs))
+
     def update(self, request, *args, **kwargs):
         # Interceptamos la actualización para exigir justificación
         partial = kwargs.pop('partial', False)
@@ -32,25 +72,79 @@ class StudyViewSet(viewsets.ModelViewSet):
         
         serializer = self.get_serializer(instance, data=request.data, partial=partial)
         serializer.is_valid(raise_exception=True)
-        self.perform_update(serializer)
 
-        new_data = serializer.data
-        
-        # Detectar qué cambió
-        changes = {}
-        for key, value in new_data.items():
-            if str(old_data.get(key)) != str(value):
-                changes[key] = {'from': old_data.get(key), 'to': value}
-
-        # Guardar log si hubo cambios
-        if changes:
-            AuditLog.objects.create(
-                user=request.user,
-                action='UPDATE',
-                model_affected='Study',
-                record_id=f"{instance.name} (ID: {instance.id})",
-                changes=changes,
-                justification=justification
-            )
+        # El cambio y su registro en la bitácora se confirman juntos
+        with transaction.atomic():
+            self.perform_update(serializer)
+
+            new_data = serializer.data
+
+            # Detectar qué cambió
+            changes = {}
+            for key, value in new_data.items():
+                if str(old_data.get(key)) != str(value):
+                    changes[key] = {'from': old_data.get(key), 'to': value}
+
+            # Guardar log si hubo cambios
+            if changes:
+                log_change(
+                    user=request.user,
+                    action='UPDATE',
+                    model_affected='Study',
+                    record_id=f"{instance.name} (ID: {instance.id})",
+                    changes=changes,
+                    justification=justification
+                )
+
+        return Response(serializer.data)
+
+    @action(detail=True, methods=['GET'])
+    def roster(self, request, pk=None):
+        # El estudio con sus conteos (1 consulta) y una página de participantes (1 consulta)
+        study = self.get_object()
+        participants = Participation.objects.filter(study=study).select_related('volunteer')
+        paginator = RosterCursorPagination()
+        page = paginator.paginate_queryset(participants, request, view=self)
+        response = paginator.get_paginated_response(RosterSerializer(page, many=True).data)
+        response.data['study'] = StudyStatsSerializer(study).data
+        return response
+
+    @action(detail=True, methods=['GET'])
+    def eligible(self, request, pk=None):
+        """
+        Voluntarios reclutables para el estudio en una fecha:
+        ?date=2026-11-03 (por defecto el internamiento del estudio o hoy), ?sex=M|F, ?age_min, ?age_max
+        """
+        study = self.get_object()
+        params = request.query_params
+
+        errors = {}
+        target_date = study.admission_date or date.today()
+        if params.get('date'):
+            try:
+                target_date = parse_date(params['date'])
+            except ValueError:
+                target_date = None
+            if target_date is None:
+                errors['date'] = "Fecha inválida (use AAAA-MM-DD)."
+
+        sex = params.get('sex', '').upper() or None
+        if sex and sex not in ('M', 'F'):
+            errors['sex'] = "Debe ser 'M' o 'F'."
+
+        ages = {}
+        for name in ('age_min', 'age_max'):
+            if params.get(name):
+                if not params[name].isdigit():
+                    errors[name] = "Debe ser un número entero positivo."
+                else:
+                    ages[name] = int(params[name])
+        if errors:
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = eligible_volunteers(study, target_date, sex=sex, **ages)
+        paginator = VolunteerCursorPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = EligibleVolunteerSerializer(page, many=True, context={'target_date': target_date})
+        return paginator.get_paginated_response(serializer.data)
 
-        return Response(serializer.data)
\ No newline at end of file
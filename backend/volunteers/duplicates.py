@@ -0,0 +1,197 @@
+import re
+from collections import defaultdict
+from functools import lru_cache
+from itertools import combinations
+from .search import normalize_search
+
+# Puntaje mínimo (0 a 1) para considerar que dos registros son la misma persona
+DEFAULT_THRESHOLD = 0.88
+
+# Bloques más grandes que esto se ignoran (p. ej. un apellido muy común sin fecha):
+# compararlos todos contra todos dispararía el número de pares.
+MAX_BLOCK_SIZE = 300
+
+# Si el apellido paterno se parece menos que esto, el par se descarta sin calcular lo demás
+MIN_SURNAME_SIMILARITY = 0.8
+
+# Peso de cada parte del puntaje; si falta un dato (fecha o CURP) se reparte entre las demás
+WEIGHTS = {'name': 0.6, 'birth_date': 0.2, 'curp': 0.2}
+
+_PHONETIC_RULES = [
+    (re.compile(r'[^a-zñ]'), ''),
+    (re.compile(r'ch'), 'x'),
+    (re.compile(r'h'), ''),
+    (re.compile(r'qu'), 'k'),
+    (re.compile(r'll'), 'y'),
+    (re.compile(r'g(?=[ei])'), 'j'),
+    (re.compile(r'gu(?=[ei])'), 'g'),
+    (re.compile(r'c(?=[ei])'), 's'),
+    (re.compile(r'z'), 's'),
+    (re.compile(r'[cq]'), 'k'),
+    (re.compile(r'v'), 'b'),
+    (re.compile(r'w'), 'b'),
+    (re.compile(r'y$'), 'i'),
+    (re.compile(r'(.)\1+'), r'\1'),
+]
+
+
+def phonetic_key(text):
+    """
+    Clave fonética simple para apellidos en español: 'Hernández', 'Ernandes' y
+    'Hernandez' dan la misma clave. Se conserva la primera letra y las consonantes.
+    """
+    key = normalize_search(text).replace(' ', '')
+    for pattern, replacement in _PHONETIC_RULES:
+        key = pattern.sub(replacement, key)
+    if not key:
+        return ''
+    return key[0] + re.sub(r'[aeiou]', '', key[1:])
+
+
+@lru_cache(maxsize=200_000)
+def jaro_winkler(a, b):
+    """
+    Similitud Jaro-Winkler entre dos cadenas (1.0 = iguales). Los nombres y apellidos
+    se repiten mucho, así que el caché evita la mayoría de los cálculos.
+    """
+    if a == b:
+        return 1.0
+    len_a, len_b = len(a), len(b)
+    if not len_a or not len_b:
+        return 0.0
+
+    window = max(max(len_a, len_b) // 2 - 1, 0)
+    matched_b = [False] * len_b
+    matches_a = []
+    for i, char in enumerate(a):
+        for j in range(max(0, i - window), min(i + window + 1, len_b)):
+            if not matched_b[j] and b[j] == char:
+                matched_b[j] = True
+                matches_a.append(char)
+                break
+
+    matches = len(matches_a)
+    if not matches:
+        return 0.0
+    matches_b = [b[j] for j in range(len_b) if matched_b[j]]
+    transpositions = sum(x != y for x, y in zip(matches_a, matches_b)) // 2
+
+    jaro = (matches / len_a + matches / len_b + (matches - transpositions) / matches) / 3
+
+    prefix = 0
+    for x, y in zip(a[:4], b[:4]):
+        if x != y:
+            break
+        prefix += 1
+    return jaro + prefix * 0.1 * (1 - jaro)
+
+
+class Candidate:
+    """Datos mínimos de un voluntario para comparar (sin instanciar el modelo)."""
+    __slots__ = ('id', 'given_names', 'first_name', 'paternal', 'maternal', 'birth_date', 'curp')
+
+    def __init__(self, id, first_name, middle_name, paternal, maternal, birth_date, curp):
+        self.id = id
+        self.first_name = normalize_search(first_name)
+        self.given_names = ' '.join(filter(None, [self.first_name, normalize_search(middle_name)]))
+        self.paternal = normalize_search(paternal)
+        # El importador histórico usa 'X' cuando no hay apellido materno
+        self.maternal = '' if normalize_search(maternal) == 'x' else normalize_search(maternal)
+        self.birth_date = birth_date
+        self.curp = (curp or '').upper()
+
+    def blocking_keys(self):
+        first_initial = self.first_name[:1]
+        paternal_initial = self.paternal[:1]
+        if len(self.curp) >= 10:
+            # Letras del nombre + fecha de nacimiento; los errores suelen estar en el resto
+            yield ('curp', self.curp[:10])
+        if self.birth_date and first_initial and paternal_initial:
+            yield ('birth', self.birth_date, first_initial + paternal_initial)
+        if self.paternal:
+            yield ('surname', phonetic_key(self.paternal), phonetic_key(self.maternal), first_initial)
+
+
+def name_similarity(a, b):
+    """Promedio de la similitud de nombre(s), apellido paterno y materno (si ambos lo tienen)."""
+    scores = [jaro_winkler(a.given_names, b.given_names), jaro_winkler(a.paternal, b.paternal)]
+    if a.maternal and b.maternal:
+        scores.append(jaro_winkler(a.maternal, b.maternal))
+    return sum(scores) / len(scores)
+
+
+def score_pair(a, b):
+    """Puntaje de 0 a 1 combinando nombre, fecha de nacimiento y CURP (0 si los apellidos no se parecen)."""
+    if jaro_winkler(a.paternal, b.paternal) < MIN_SURNAME_SIMILARITY:
+        return 0.0
+    parts = {'name': name_similarity(a, b)}
+    if a.birth_date and b.birth_date:
+        parts['birth_date'] = 1.0 if a.birth_date == b.birth_date else 0.0
+    if a.curp and b.curp:
+        parts['curp'] = jaro_winkler(a.curp, b.curp)
+    total_weight = sum(WEIGHTS[part] for part in parts)
+    return sum(WEIGHTS[part] * value for part, value in parts.items()) / total_weight
+
+
+def candidate_pairs(candidates):
+    """Pares (a, b) que comparten al menos una clave de bloqueo. Devuelve (pares, bloques_omitidos)."""
+    blocks = defaultdict(list)
+    for candidate in candidates:
+        for key in candidate.blocking_keys():
+            blocks[key].append(candidate)
+
+    pairs = set()
+    skipped = 0
+    for members in blocks.values():
+        if len(members) < 2:
+            continue
+        if len(members) > MAX_BLOCK_SIZE:
+            skipped += 1
+            continue
+        for a, b in combinations(members, 2):
+            pairs.add((a, b) if a.id < b.id else (b, a))
+    return pairs, skipped
+
+
+def find_duplicates(candidates, threshold=DEFAULT_THRESHOLD):
+    """
+    Devuelve (lista de (id_a, id_b, puntaje) con puntaje >= threshold, estadísticas).
+    Solo se comparan los pares que comparten bloque, no todos contra todos.
+    """
+    pairs, skipped = candidate_pairs(candidates)
+    matches = []
+    for a, b in pairs:
+        score = score_pair(a, b)
+        if score >= threshold:
+            matches.append((a.id, b.id, round(score, 4)))
+    matches.sort()
+    return matches, {'compared': len(pairs), 'skipped_blocks': skipped}
+
+
+def build_clusters(pairs):
+    """
+    Agrupa los pares (id_a, id_b, ...) en grupos conectados (union-find).
+    Devuelve {volunteer_id: cluster}, donde cluster es el id menor del grupo.
+    """
+    parent = {}
+
+    def root(x):
+        parent.setdefault(x, x)
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for a, b, *_ in pairs:
+        ra, rb = root(a), root(b)
+        if ra != rb:
+            parent[max(ra, rb)] = min(ra, rb)
+    return {x: root(x) for x in parent}
+
+
+def load_candidates(queryset):
+    """Lee los voluntarios con values_list (sin instanciar modelos) en bloques."""
+    rows = queryset.values_list(
+        'id', 'first_name', 'middle_name', 'last_name_paternal', 'last_name_maternal', 'birth_date', 'curp'
+    ).order_by('pk')
+    return [Candidate(*row) for row in rows.iterator(chunk_size=5000)]
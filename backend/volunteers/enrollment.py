@@ -0,0 +1,130 @@
+from collections import Counter
+from datetime import date, timedelta
+from django.db import transaction
+from django.db.models import Case, CharField, Count, Exists, Max, OuterRef, Q, Value, When
+from auditing.writer import log_change
+from studies.models import Study
+from .models import Volunteer, Participation
+from .status import WASHOUT_DAYS, MAX_ELIGIBLE_AGE, years_before, refresh_statuses
+
+# Motivos por los que un voluntario no se inscribe (en orden de prioridad)
+SKIP_REASONS = {
+    'already_enrolled': 'Ya participa en este estudio.',
+    'active_study': 'Tiene un estudio activo.',
+    'washout': 'Sigue en periodo de lavado.',
+    'age': 'No es elegible por edad.',
+    'rejected': 'Fue rechazado.',
+}
+
+
+class EnrollmentError(ValueError):
+    pass
+
+
+def skip_reason(study, reference_date):
+    """
+    Expresión SQL con el motivo por el que el voluntario no puede entrar al estudio
+    ('' si es elegible). Usa el lavado guardado (washout_until) y la edad a la fecha de referencia.
+    """
+    too_old = years_before(reference_date, MAX_ELIGIBLE_AGE + 1)
+    return Case(
+        When(Exists(Participation.objects.filter(volunteer=OuterRef('pk'), study=study)),
+             then=Value('already_enrolled')),
+        When(Exists(Participation.objects.filter(volunteer=OuterRef('pk'), study__is_active=True)),
+             then=Value('active_study')),
+        When(washout_until__gt=reference_date, then=Value('washout')),
+        When(birth_date__lte=too_old, then=Value('age')),
+        When(manual_status='rejected', then=Value('rejected')),
+        default=Value(''),
+        output_field=CharField(),
+    )
+
+
+def enroll(study, volunteers, user, justification, today=None):
+    """
+    Inscribe en `study` a los voluntarios elegibles del queryset `volunteers`.
+    La elegibilidad se calcula en una sola consulta, las participaciones se crean con
+    bulk_create y se deja un solo registro de auditoría con el resumen.
+    Devuelve {'study', 'enrolled': [ids], 'skipped': [{'id', 'code', 'reason', 'detail'}]}.
+    """
+    today = today or date.today()
+
+    with transaction.atomic():
+        # Bloqueamos el estudio para que dos asignaciones al mismo estudio no se crucen
+        study = Study.objects.select_for_update().get(pk=study.pk)
+        if not study.is_active:
+            raise EnrollmentError("El estudio no está vigente.")
+
+        # Lavado y edad se evalúan al internamiento si todavía no ocurre
+        reference_date = max(today, study.admission_date or today)
+        rows = volunteers.order_by('pk').annotate(
+            skip_reason=skip_reason(study, reference_date)
+        ).values_list('id', 'code', 'skip_reason')
+
+        enrolled, skipped = [], []
+        for volunteer_id, code, reason in rows:
+            if reason:
+                skipped.append({'id': volunteer_id, 'code': code, 'reason': reason, 'detail': SKIP_REASONS[reason]})
+            else:
+                enrolled.append((volunteer_id, code))
+
+        if enrolled:
+            Participation.objects.bulk_create(
+                [Participation(volunteer_id=volunteer_id, study=study) for volunteer_id, _ in enrolled]
+            )
+            # bulk_create no dispara señales: recalculamos el estatus de los inscritos
+            refresh_statuses([volunteer_id for volunteer_id, _ in enrolled], today=today)
+
+            log_change(
+                user=user,
+                action='CREATE',
+                model_affected='Participation',
+                record_id=f"{study.name} (ID: {study.id})",
+                changes={
+                    'study': study.name,
+                    'enrolled': [code for _, code in enrolled],
+                    'skipped': dict(Counter(s['reason'] for s in skipped)),
+                },
+                justification=justification,
+            )
+
+    return {
+        'study': study.id,
+        'enrolled': [volunteer_id for volunteer_id, _ in enrolled],
+        'skipped': skipped,
+    }
+
+
+def eligible_volunteers(study, target_date, sex=None, age_min=None, age_max=None):
+    """
+    Voluntarios que podrían entrar a `study` el `target_date`, en una sola consulta agrupada:
+      - sin participación previa en el estudio
+      - sin estudio activo que siga en curso en esa fecha (sin fecha de pago o pago posterior)
+      - con su lavado terminado en esa fecha: último pago + 90 días <= target_date
+      - con edad (a esa fecha) dentro del rango y no mayor a 55 años; no rechazados
+    Anota last_payment_date (MAX de Study.payment_date de sus participaciones).
+    """
+    active_on_date = Q(participations__study__is_active=True) & (
+        Q(participations__study__payment_date__isnull=True)
+        | Q(participations__study__payment_date__gte=target_date)
+    )
+    queryset = Volunteer.objects.exclude(manual_status='rejected').annotate(
+        last_payment_date=Max('participations__study__payment_date'),
+        in_this_study=Count('participations', filter=Q(participations__study=study)),
+        active_studies=Count('participations', filter=active_on_date),
+    ).filter(
+        Q(last_payment_date__isnull=True) | Q(last_payment_date__lte=target_date - timedelta(days=WASHOUT_DAYS)),
+        in_this_study=0,
+        active_studies=0,
+    )
+
+    if sex:
+        queryset = queryset.filter(sex=sex)
+    queryset = queryset.filter(
+        Q(birth_date__isnull=True) | Q(birth_date__gt=years_before(target_date, MAX_ELIGIBLE_AGE + 1))
+    )
+    if age_min is not None:
+        queryset = queryset.filter(birth_date__lte=years_before(target_date, age_min))
+    if age_max is not None:
+        queryset = queryset.filter(birth_date__gt=years_before(target_date, age_max + 1))
+    return queryset
@@ -0,0 +1,152 @@
+"""
+Datos sintéticos para pruebas de carga: voluntarios con nombres, CURP válidas (con su
+dígito verificador), fechas de nacimiento y un historial de participaciones repartido
+entre varios estudios. Todo se inserta con bulk_create por bloques.
+"""
+import random
+import unicodedata
+from datetime import date, timedelta
+from auditing.models import AuditLog
+from studies.models import Study
+from .models import Volunteer, Participation, VolunteerCodeSequence, build_volunteer_code
+from .search import build_search_text
+from .status import refresh_statuses
+
+FIRST_NAMES = {
+    'F': ['María', 'Guadalupe', 'Juana', 'Verónica', 'Leticia', 'Rosa', 'Alejandra', 'Patricia', 'Elizabeth',
+          'Gabriela', 'Adriana', 'Claudia', 'Mónica', 'Fernanda', 'Daniela', 'Sofía', 'Valeria', 'Ximena',
+          'Karla', 'Andrea', 'Lucía', 'Paola', 'Brenda', 'Itzel', 'Diana', 'Silvia', 'Araceli', 'Norma'],
+    'M': ['José', 'Juan', 'Luis', 'Miguel', 'Jesús', 'Francisco', 'Alejandro', 'Carlos', 'Jorge', 'Pedro',
+          'Ricardo', 'Fernando', 'Eduardo', 'Roberto', 'Daniel', 'Javier', 'Sergio', 'Arturo', 'Raúl',
+          'Manuel', 'Héctor', 'Óscar', 'Iván', 'Diego', 'Emiliano', 'Santiago', 'Mateo', 'Andrés'],
+}
+SURNAMES = [
+    'Hernández', 'García', 'Martínez', 'López', 'González', 'Pérez', 'Rodríguez', 'Sánchez', 'Ramírez',
+    'Cruz', 'Flores', 'Gómez', 'Morales', 'Vázquez', 'Reyes', 'Jiménez', 'Torres', 'Díaz', 'Gutiérrez',
+    'Ruiz', 'Mendoza', 'Aguilar', 'Ortiz', 'Moreno', 'Castillo', 'Romero', 'Álvarez', 'Méndez', 'Chávez',
+    'Rivera', 'Juárez', 'Ramos', 'Domínguez', 'Herrera', 'Medina', 'Castro', 'Vargas', 'Guzmán', 'Velázquez',
+    'Muñoz', 'Rojas', 'Salazar', 'Contreras', 'Luna', 'Ortega', 'Santiago', 'Guerrero', 'Estrada', 'Bautista',
+    'Cortés', 'Soto', 'Alvarado', 'Espinoza', 'Lara', 'Ávila', 'Ríos', 'Cervantes', 'Silva', 'Delgado',
+]
+STATES = ['DF', 'MC', 'JC', 'NL', 'PL', 'GT', 'VZ', 'MN', 'CH', 'OC', 'GR', 'HG', 'QT', 'SP', 'YN', 'BC']
+
+CURP_CHARSET = '0123456789ABCDEFGHIJKLMNÑOPQRSTUVWXYZ'
+VOWELS = 'AEIOU'
+
+
+def _plain(text):
+    # CURP: mayúsculas sin acentos; la Ñ se escribe como X
+    text = text.upper().replace('Ñ', 'X')
+    return ''.join(c for c in unicodedata.normalize('NFKD', text) if not unicodedata.combining(c))
+
+
+def _first_internal(text, letters):
+    return next((c for c in text[1:] if c in letters), 'X')
+
+
+def curp_check_digit(first17):
+    total = sum(CURP_CHARSET.index(c) * (18 - i) for i, c in enumerate(first17))
+    return str((10 - total % 10) % 10)
+
+
+def build_curp(first_name, paternal, maternal, birth_date, sex, state, homoclave):
+    """CURP con la estructura oficial; `sex` es el del modelo (M/F) y se escribe H/M."""
+    first, paternal, maternal = _plain(first_name), _plain(paternal), _plain(maternal or 'X')
+    consonants = ''.join(c for c in 'ABCDEFGHIJKLMNOPQRSTUVWXYZ' if c not in VOWELS)
+    base = (
+        paternal[0] + _first_internal(paternal, VOWELS) + maternal[0] + first[0]
+        + birth_date.strftime('%y%m%d') + ('H' if sex == 'M' else 'M') + state
+        + _first_internal(paternal, consonants) + _first_internal(maternal, consonants)
+        + _first_internal(first, consonants) + homoclave
+    )
+    return base + curp_check_digit(base)
+
+
+class FakeVolunteerFactory:
+    def __init__(self, seed=None, today=None):
+        self.random = random.Random(seed)
+        self.today = today or date.today()
+        self.curps = set(Volunteer.objects.exclude(curp__isnull=True).values_list('curp', flat=True))
+
+    def volunteer(self):
+        r = self.random
+        sex = r.choice('MF')
+        first_name = r.choice(FIRST_NAMES[sex])
+        middle_name = r.choice(FIRST_NAMES[sex]) if r.random() < 0.35 else None
+        paternal, maternal = r.choice(SURNAMES), (r.choice(SURNAMES) if r.random() < 0.95 else None)
+        # Adultos de 18 a 60 años
+        birth_date = self.today - timedelta(days=r.randint(18 * 365, 60 * 365))
+        state = r.choice(STATES)
+
+        homoclave = str(r.randint(0, 9)) if birth_date.year < 2000 else r.choice('ABCDEFGHIJ')
+        curp = build_curp(first_name, paternal, maternal, birth_date, sex, state, homoclave)
+        while curp in self.curps:
+            # Misma persona "homónima": la homoclave es la que desempata
+            curp = build_curp(first_name, paternal, maternal, birth_date, sex, state, r.choice(CURP_CHARSET[:36]))
+        self.curps.add(curp)
+
+        return Volunteer(
+            first_name=first_name, middle_name=middle_name, last_name_paternal=paternal,
+            last_name_maternal=maternal, birth_date=birth_date, sex=sex, curp=curp,
+            phone=f"55{r.randint(10000000, 99999999)}",
+            manual_status=r.choices(['waiting_approval', 'eligible', 'rejected'], weights=[3, 6, 1])[0],
+        )
+
+    def studies(self, count):
+        """`count` estudios en los últimos 3 años; los más recientes siguen vigentes."""
+        r = self.random
+        studies = []
+        for i in range(count):
+            admission = self.today - timedelta(days=int(3 * 365 * (count - i - 1) / max(count, 1)) + r.randint(0, 20))
+            finished = i < count * 0.9
+            studies.append(Study(
+                name=f"Estudio BE-{admission.year}-{r.randint(0, 99999):05d}",
+                description='Generado por generate_fake_volunteers',
+                admission_date=admission,
+                payment_date=admission + timedelta(days=r.randint(5, 30)) if finished else None,
+                is_active=not finished,
+            ))
+        Study.objects.bulk_create(studies, ignore_conflicts=True)
+        return list(Study.objects.filter(name__in=[s.name for s in studies]))
+
+
+def generate(count, study_count=20, max_participations=3, seed=None, batch_size=2000, on_batch=None):
+    """
+    Inserta `count` voluntarios con hasta `max_participations` estudios cada uno (como máximo
+    uno vigente) y una entrada CREATE de bitácora por voluntario. Devuelve los totales.
+    """
+    factory = FakeVolunteerFactory(seed=seed)
+    studies = factory.studies(study_count)
+    finished = [s for s in studies if not s.is_active]
+    active = [s for s in studies if s.is_active]
+    year = date.today().year
+    totals = {'volunteers': 0, 'participations': 0, 'studies': len(studies)}
+
+    while totals['volunteers'] < count:
+        size = min(batch_size, count - totals['volunteers'])
+        volunteers = [factory.volunteer() for _ in range(size)]
+        first = VolunteerCodeSequence.reserve(year, count=size)
+        for offset, volunteer in enumerate(volunteers):
+            volunteer.code = build_volunteer_code(volunteer.initials, year, first + offset)
+            volunteer.search_text = build_search_text(volunteer)
+        volunteers = Volunteer.objects.bulk_create(volunteers)
+
+        participations = []
+        for volunteer in volunteers:
+            history = factory.random.sample(finished, k=min(len(finished), factory.random.randint(0, max_participations)))
+            if active and factory.random.random() < 0.1:
+                history.append(factory.random.choice(active))
+            participations += [Participation(volunteer=volunteer, study=study) for study in history]
+        Participation.objects.bulk_create(participations)
+        refresh_statuses([v.pk for v in volunteers])
+        AuditLog.objects.bulk_create([
+            AuditLog(action='CREATE', model_affected='Volunteer', record_id=v.code,
+                     changes={'curp': v.curp, 'origen': 'datos sintéticos'}, justification='generate_fake_volunteers')
+            for v in volunteers
+        ])
+
+        totals['volunteers'] += len(volunteers)
+        totals['participations'] += len(participations)
+        if on_batch:
+            on_batch(totals)
+    return totals
@@ -0,0 +1,126 @@
+from datetime import date, datetime
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db import connection
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework import filters
+from rest_framework.exceptions import ValidationError
+from .models import Volunteer, Participation
+from .status import years_before
+from .search import normalize_search
+
+# Parámetros de filter_volunteers + search_volunteers (también los acepta la asignación masiva)
+FILTER_PARAMS = ('status', 'study', 'sex', 'age_min', 'age_max', 'created_after', 'created_before', 'search')
+
+
+class VolunteerFilterBackend(filters.BaseFilterBackend):
+    """
+    Filtros del listado de voluntarios, resueltos en SQL:
+      ?status=eligible,standby   estatus guardado (computed_status), separados por coma
+      ?study=<id>                estudio activo del voluntario
+      ?sex=M|F
+      ?age_min=18&age_max=55     se traduce a un rango de birth_date
+      ?created_after=2026-01-01&created_before=2026-02-01
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        return filter_volunteers(queryset, request.query_params)
+
+
+def filter_volunteers(queryset, params):
+    """Aplica los filtros de VolunteerFilterBackend a partir de un dict de parámetros."""
+    if params.get('status'):
+        valid = {code for code, _ in Volunteer.STATUS_CHOICES}
+        statuses = [s.strip() for s in params['status'].split(',') if s.strip()]
+        invalid = [s for s in statuses if s not in valid]
+        if invalid:
+            raise ValidationError({'status': f"Estatus inválido: {', '.join(invalid)}"})
+        queryset = queryset.filter(computed_status__in=statuses)
+
+    if params.get('study'):
+        study_id = _int(params, 'study')
+        queryset = queryset.filter(Exists(
+            Participation.objects.filter(volunteer=OuterRef('pk'), study_id=study_id, study__is_active=True)
+        ))
+
+    if params.get('sex'):
+        sex = str(params['sex']).upper()
+        if sex not in dict(Volunteer.SEX_CHOICES):
+            raise ValidationError({'sex': "Debe ser 'M' o 'F'."})
+        queryset = queryset.filter(sex=sex)
+
+    # Edad -> rango de fecha de nacimiento (usa el índice de birth_date)
+    today = date.today()
+    if params.get('age_min'):
+        queryset = queryset.filter(birth_date__lte=years_before(today, _int(params, 'age_min')))
+    if params.get('age_max'):
+        queryset = queryset.filter(birth_date__gt=years_before(today, _int(params, 'age_max') + 1))
+
+    if params.get('created_after'):
+        queryset = queryset.filter(created_at__gte=_datetime(params, 'created_after'))
+    if params.get('created_before'):
+        queryset = queryset.filter(created_at__lt=_datetime(params, 'created_before'))
+
+    return queryset
+
+
+def _int(params, name):
+    try:
+        value = int(params[name])
+    except (TypeError, ValueError):
+        raise ValidationError({name: "Debe ser un número entero."})
+    if value < 0:
+        raise ValidationError({name: "Debe ser un número positivo."})
+    return value
+
+
+def _datetime(params, name):
+    value = str(params[name])
+    try:
+        parsed = parse_datetime(value)
+        if parsed is None:
+            parsed_date = parse_date(value)
+            parsed = datetime.combine(parsed_date, datetime.min.time()) if parsed_date else None
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ValidationError({name: "Fecha inválida (use AAAA-MM-DD)."})
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+class VolunteerSearchFilter(filters.BaseFilterBackend):
+    """
+    Búsqueda del listado (?search=garcia lopez) sobre Volunteer.search_text, que ya viene
+    en minúsculas y sin acentos: 'Garcia' encuentra 'García'. Cada palabra debe aparecer
+    en el nombre, código o CURP.
+
+    En PostgreSQL las condiciones usan el índice GIN pg_trgm (LIKE y similitud de palabra,
+    tolera errores de captura) y el listado se ordena por similitud (anotación search_rank).
+    """
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        rank = getattr(view, 'action', None) == 'list'
+        return search_volunteers(queryset, request.query_params.get(self.search_param, ''), rank=rank)
+
+
+def search_volunteers(queryset, text, rank=False):
+    term = normalize_search(text)
+    if not term:
+        return queryset
+
+    postgres = connection.vendor == 'postgresql'
+    for word in term.split():
+        condition = Q(search_text__contains=word)
+        if postgres:
+            condition |= Q(search_text__trigram_word_similar=word)
+        queryset = queryset.filter(condition)
+
+    if postgres and rank:
+        queryset = queryset.annotate(
+            search_rank=TrigramWordSimilarity(term, 'search_text')
+        ).order_by('-search_rank', '-created_at', '-id')
+    return queryset
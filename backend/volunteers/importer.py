@@ -0,0 +1,204 @@
+import pandas as pd
+from datetime import date
+from django.db import transaction, IntegrityError
+from .models import Volunteer, Participation, VolunteerCodeSequence, build_volunteer_code
+from .status import refresh_statuses
+from .search import build_search_text
+from .readers import normalize_sex
+from studies.models import Study
+from auditing.models import AuditLog
+from auditing.writer import log_changes
+
+CURP_PATTERN = r'^[A-Z]{4}\d{6}[HM][A-Z]{5}[A-Z0-9]{2}$'
+
+
+def _clean(series):
+    # Equivalente vectorizado de: "" si es NaN, si no str(val).strip()
+    return series.where(series.notna(), '').astype(str).str.strip()
+
+
+def _parse_dates(series):
+    parsed = pd.to_datetime(series.where(_clean(series) != ''), errors='coerce', format='mixed')
+    return [d.date() if pd.notna(d) else None for d in parsed]
+
+
+class VolunteerImporter:
+    """
+    Importa voluntarios por bloques (ver readers.SpreadsheetReader): validación vectorizada con pandas,
+    una consulta IN por bloque para CURPs/códigos existentes y bulk_create
+    dentro de una transacción por bloque.
+    """
+
+    def __init__(self, on_progress=None, user=None):
+        self.on_progress = on_progress
+        self.user = user
+        self.processed = 0
+        self.created = 0
+        self.errors = []
+
+        self._seen_curps = set()
+        self._seen_codes = set()
+        # Los estudios se resuelven una sola vez (sin distinguir mayúsculas)
+        self._studies = {}
+        for study in Study.objects.all().order_by('id'):
+            self._studies.setdefault(study.name.lower(), study)
+
+    def import_batches(self, batches):
+        """Importa los lotes (fila_excel_inicial, DataFrame normalizado) de un SpreadsheetReader."""
+        for first_row_num, data in batches:
+            self.import_chunk(data, first_row_num)
+        return self
+
+    def import_chunk(self, data, first_row_num):
+        """Importa un bloque ya normalizado; `first_row_num` es la fila de Excel de su primer registro."""
+        data = data.reset_index(drop=True)
+        row_nums = pd.Series(range(first_row_num, first_row_num + len(data)))
+        prefix = "Fila " + row_nums.astype(str) + ": "
+        errors = pd.Series([None] * len(data), dtype=object)
+
+        def flag(mask, messages):
+            pending = mask & errors.isna()
+            errors[pending] = messages[pending]
+
+        # 1. Validaciones de CURP
+        curp = _clean(data['curp']).str.upper()
+        flag(curp == '', prefix + "La CURP es obligatoria.")
+        flag(curp.str.len() != 18, prefix + "La CURP '" + curp + "' debe tener 18 caracteres.")
+        flag(~curp.str.match(CURP_PATTERN), prefix + "La CURP '" + curp + "' tiene formato inválido.")
+
+        existing_curps = set(
+            Volunteer.objects.filter(curp__in=curp[errors.isna()].unique().tolist()).values_list('curp', flat=True)
+        )
+        flag(curp.isin(existing_curps | self._seen_curps), prefix + "La CURP '" + curp + "' ya está registrada.")
+
+        # 2. Datos del Voluntario
+        first_name = _clean(data['first_name'])
+        paternal = _clean(data['last_name_paternal'])
+        flag((first_name == '') | (paternal == ''), prefix + "Falta Nombre o Apellido Paterno.")
+
+        # 3. Código (si viene en el Excel no debe existir)
+        code = _clean(data['code'])
+        provided = code != ''
+        existing_codes = set(
+            Volunteer.objects.filter(code__in=code[provided & errors.isna()].unique().tolist()).values_list('code', flat=True)
+        )
+        flag(provided & code.isin(existing_codes | self._seen_codes), prefix + "El código '" + code + "' ya existe.")
+
+        # Repetidos dentro del mismo archivo: solo la primera fila válida se crea
+        valid = errors.isna()
+        flag(valid & curp.where(valid).duplicated() & (curp != ''), prefix + "La CURP '" + curp + "' ya está registrada.")
+        valid = errors.isna()
+        flag(valid & provided & code.where(valid & provided).duplicated(), prefix + "El código '" + code + "' ya existe.")
+
+        valid = errors.isna()
+        self._seen_curps.update(curp[valid])
+        self._seen_codes.update(code[valid & provided])
+
+        sex = normalize_sex(data['sex'])
+        birth_dates = _parse_dates(data['birth_date'])
+        middle_name = _clean(data['middle_name'])
+        maternal = _clean(data['last_name_maternal'])
+        phone = _clean(data['phone'])
+        studies = _clean(data['studies'])
+
+        pending = []
+        for i in valid[valid].index:
+            volunteer = Volunteer(
+                code=code[i] or None,
+                first_name=first_name[i],
+                middle_name=middle_name[i],
+                last_name_paternal=paternal[i],
+                last_name_maternal=maternal[i],
+                phone=phone[i],
+                sex=sex[i],
+                curp=curp[i],
+                birth_date=birth_dates[i],
+            )
+            pending.append((int(row_nums[i]), volunteer, self._resolve_studies(studies[i])))
+
+        row_errors = errors.dropna().tolist()
+        self._assign_codes([volunteer for _, volunteer, _ in pending])
+        row_errors.extend(self._save(pending))
+
+        self.errors.extend(sorted(row_errors, key=_row_number))
+        self.processed += len(data)
+        if self.on_progress:
+            self.on_progress(self)
+
+    def _resolve_studies(self, value):
+        # Asumiendo formato: "Estudio A, Estudio B"
+        names = [s.strip() for s in value.split(',') if s.strip()]
+        resolved = []
+        for name in names:
+            study = self._studies.get(name.lower())
+            if study and study not in resolved:
+                resolved.append(study)
+        return resolved
+
+    def _assign_codes(self, volunteers):
+        VolunteerCodeSequence.observe_codes([v.code for v in volunteers if v.code])
+
+        missing = [v for v in volunteers if not v.code]
+        if missing:
+            year = date.today().year
+            first = VolunteerCodeSequence.reserve(year, count=len(missing))
+            for offset, volunteer in enumerate(missing):
+                volunteer.code = build_volunteer_code(volunteer.initials, year, first + offset)
+
+        # bulk_create no pasa por Volunteer.save(): llenamos aquí el texto de búsqueda
+        for volunteer in volunteers:
+            volunteer.search_text = build_search_text(volunteer)
+
+    def _save(self, pending):
+        """Guarda el bloque con bulk_create; si falla, reintenta fila por fila para reportar el error."""
+        if not pending:
+            return []
+        try:
+            with transaction.atomic():
+                volunteers = Volunteer.objects.bulk_create([volunteer for _, volunteer, _ in pending])
+                Participation.objects.bulk_create([
+                    Participation(volunteer=volunteer, study=study)
+                    for volunteer, (_, _, row_studies) in zip(volunteers, pending)
+                    for study in row_studies
+                ])
+                # bulk_create no dispara señales: recalculamos el estatus del bloque
+                refresh_statuses([volunteer.pk for volunteer in volunteers])
+                self._log_created(volunteers)
+            self.created += len(volunteers)
+            return []
+        except IntegrityError:
+            pass
+
+        errors = []
+        for row_num, volunteer, row_studies in pending:
+            volunteer.pk = None
+            try:
+                with transaction.atomic():
+                    volunteer.save()
+                    Participation.objects.bulk_create(
+                        [Participation(volunteer=volunteer, study=study) for study in row_studies]
+                    )
+                    refresh_statuses([volunteer.pk])
+                    self._log_created([volunteer])
+                self.created += 1
+            except Exception as row_e:
+                errors.append(f"Fila {row_num}: Error técnico - {str(row_e)}")
+        return errors
+
+    def _log_created(self, volunteers):
+        # Una entrada por voluntario, escritas con un solo INSERT al confirmar el bloque
+        log_changes(
+            AuditLog(
+                user=self.user,
+                action='CREATE',
+                model_affected='Volunteer',
+                record_id=volunteer.code,
+                changes={'curp': volunteer.curp, 'origen': 'importación'},
+                justification='Importación masiva de Excel',
+            )
+            for volunteer in volunteers
+        )
+
+
+def _row_number(message):
+    return int(message.split(':', 1)[0].split()[-1])
@@ -0,0 +1,95 @@
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from .models import ImportJob
+from .importer import VolunteerImporter
+from .readers import SpreadsheetReader
+
+
+def claim_next_job():
+    """
+    Toma el siguiente trabajo en cola y lo marca como 'running'.
+    skip_locked permite correr varios workers sin que se peleen el mismo trabajo.
+    """
+    with transaction.atomic():
+        job = (
+            ImportJob.objects.select_for_update(skip_locked=True)
+            .filter(status='pending')
+            .order_by('created_at')
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = 'running'
+        job.started_at = job.heartbeat_at = timezone.now()
+        job.save(update_fields=['status', 'started_at', 'heartbeat_at'])
+    return job
+
+
+def stale_timeout():
+    return timedelta(seconds=getattr(settings, 'IMPORT_JOB_STALE_SECONDS', 600))
+
+
+def fail_stale_jobs(now=None):
+    """
+    Marca como fallidos los trabajos 'running' sin avance en IMPORT_JOB_STALE_SECONDS
+    (su worker murió). No se reencolan: los bloques ya confirmados quedaron guardados y
+    repetir el archivo los reportaría como duplicados. Devuelve cuántos se marcaron.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        jobs = list(
+            ImportJob.objects.select_for_update(skip_locked=True)
+            .annotate(last_seen=Coalesce('heartbeat_at', 'started_at'))
+            .filter(Q(last_seen__lt=now - stale_timeout()) | Q(last_seen__isnull=True), status='running')
+        )
+        for job in jobs:
+            job.status = 'failed'
+            job.error_message = (
+                f"La importación se interrumpió después de {job.processed} filas (el proceso dejó de responder). "
+                "Revise los voluntarios creados antes de volver a subir el archivo."
+            )
+            job.finished_at = now
+            job.save(update_fields=['status', 'error_message', 'finished_at'])
+            remove_file(job)
+    return len(jobs)
+
+
+def remove_file(job):
+    # El archivo solo hace falta mientras se procesa
+    if job.file:
+        job.file.delete(save=False)
+        ImportJob.objects.filter(pk=job.pk).update(file='')
+
+
+def run_import_job(job):
+    """Procesa un trabajo ya reclamado y va guardando el avance después de cada bloque."""
+
+    def save_progress(importer):
+        ImportJob.objects.filter(pk=job.pk).update(
+            total_rows=reader.total_rows,
+            processed=importer.processed,
+            created=importer.created,
+            errors=importer.errors,
+            heartbeat_at=timezone.now(),
+        )
+
+    try:
+        with job.file.open('rb') as f:
+            # Lectura por lotes: la memoria no crece con el tamaño del archivo
+            reader = SpreadsheetReader(f, job.file.name)
+            VolunteerImporter(on_progress=save_progress, user=job.created_by).import_batches(reader)
+        status, error_message = 'done', ''
+    except Exception as e:
+        status, error_message = 'failed', str(e)
+
+    # Si fail_stale_jobs ya lo dio por perdido, se respeta ese resultado
+    ImportJob.objects.filter(pk=job.pk, status='running').update(
+        status=status, error_message=error_message, finished_at=timezone.now()
+    )
+    remove_file(job)
+    job.refresh_from_db()
+    return job
@@ -0,0 +1,42 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from volunteers.models import Volunteer, DuplicatePair
+from volunteers.duplicates import DEFAULT_THRESHOLD, load_candidates, find_duplicates, build_clusters
+
+
+class Command(BaseCommand):
+    help = 'Busca voluntarios posiblemente duplicados (bloqueo + similitud de nombres) y guarda los grupos encontrados'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help='Puntaje mínimo de 0 a 1')
+        parser.add_argument('--dry-run', action='store_true', help='Solo mostrar el resumen, sin guardar los pares')
+
+    def handle(self, *args, **kwargs):
+        started = time.monotonic()
+
+        candidates = load_candidates(Volunteer.objects.all())
+        pairs, stats = find_duplicates(candidates, threshold=kwargs['threshold'])
+        clusters = build_clusters(pairs)
+
+        if not kwargs['dry_run']:
+            # Cada corrida reemplaza el resultado anterior
+            with transaction.atomic():
+                DuplicatePair.objects.all().delete()
+                DuplicatePair.objects.bulk_create(
+                    [
+                        DuplicatePair(volunteer_a_id=a, volunteer_b_id=b, score=score, cluster=clusters[a])
+                        for a, b, score in pairs
+                    ],
+                    batch_size=1000,
+                )
+
+        elapsed = time.monotonic() - started
+        if stats['skipped_blocks']:
+            self.stdout.write(self.style.WARNING(
+                f"{stats['skipped_blocks']} bloques demasiado grandes se omitieron"
+            ))
+        self.stdout.write(self.style.SUCCESS(
+            f"Voluntarios: {len(candidates)}, Pares comparados: {stats['compared']}, "
+            f"Posibles duplicados: {len(pairs)} en {len(set(clusters.values()))} grupos ({elapsed:.1f} s)"
+        ))
@@ -0,0 +1,33 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from volunteers.fake import generate
+
+
+class Command(BaseCommand):
+    help = 'Inserta voluntarios sintéticos (CURP válidas, nombres, historial de estudios) para pruebas de carga'
+
+    def add_arguments(self, parser):
+        parser.add_argument('count', type=int, help='Voluntarios a crear')
+        parser.add_argument('--studies', type=int, default=20, help='Estudios a crear para el historial')
+        parser.add_argument('--max-participations', type=int, default=3,
+                            help='Máximo de estudios terminados por voluntario')
+        parser.add_argument('--seed', type=int, default=None, help='Semilla para repetir los mismos datos')
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **kwargs):
+        if kwargs['count'] < 1 or kwargs['studies'] < 1:
+            raise CommandError("count y --studies deben ser mayores a 0.")
+
+        started = time.monotonic()
+
+        def progress(totals):
+            self.stdout.write(f"  {totals['volunteers']}/{kwargs['count']} voluntarios")
+
+        totals = generate(
+            kwargs['count'], study_count=kwargs['studies'], max_participations=kwargs['max_participations'],
+            seed=kwargs['seed'], batch_size=kwargs['batch_size'], on_batch=progress,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Voluntarios: {totals['volunteers']}, Participaciones: {totals['participations']}, "
+            f"Estudios: {totals['studies']} ({time.monotonic() - started:.1f} s)"
+        ))
@@ -1,109 +1,165 @@
-import pandas as pd
+import time
+from datetime import date
+from multiprocessing import Pool
 from django.core.management.base import BaseCommand
-from volunteers.models import Volunteer, Participation
+from django.db import transaction
+from volunteers.models import Volunteer, Participation, VolunteerCodeSequence, build_volunteer_code
+from volunteers.readers import SpreadsheetReader, parse_history_batch
+from volunteers.status import refresh_statuses
+from volunteers.search import build_search_text
 from studies.models import Study
-from django.utils.dateparse import parse_date
-import datetime
+
+# Campos que se actualizan cuando la CURP ya existe (el resto solo se llena al crear)
+UPSERT_FIELDS = ['first_name', 'middle_name', 'last_name_paternal', 'last_name_maternal', 'sex', 'phone', 'search_text', 'updated_at']
+
 
 class Command(BaseCommand):
-    help = 'Importar voluntarios desde un archivo Excel'
+    help = 'Carga masiva de voluntarios históricos desde un archivo Excel (.xlsx) o CSV'
 
     def add_arguments(self, parser):
-        parser.add_argument('excel_file', type=str, help='Ruta del archivo Excel')
+        parser.add_argument('excel_file', type=str, help='Ruta del archivo Excel o CSV')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Filas por bloque (una transacción por bloque)')
+        parser.add_argument('--workers', type=int, default=1, help='Procesos para interpretar las filas (1 = sin paralelismo)')
 
     def handle(self, *args, **kwargs):
         file_path = kwargs['excel_file']
-        
+        chunk_size = kwargs['chunk_size']
+        workers = kwargs['workers']
+
         self.stdout.write(f"Leyendo archivo: {file_path}...")
-        
+
         try:
-            # Asumimos que las columnas del Excel se llaman así (ajústalo a tu excel real)
-            df = pd.read_excel(file_path)
-            # Normalizar nombres de columnas a minúsculas para evitar errores
-            df.columns = df.columns.str.lower().str.strip()
+            # Lectura por lotes con el mismo mapeo de columnas (COLUMN_ALIASES) que el endpoint
+            f = open(file_path, 'rb')
+            reader = SpreadsheetReader(f, file_path, batch_size=chunk_size)
         except Exception as e:
             self.stdout.write(self.style.ERROR(f"Error leyendo el archivo: {e}"))
             return
 
-        count_created = 0
-        count_updated = 0
+        self.studies = {}
+        self.count_rows = 0
+        self.count_created = 0
+        self.count_updated = 0
+        self.count_participations = 0
+        started = time.monotonic()
 
-        for index, row in df.iterrows():
-            try:
-                # 1. Extracción de datos (Ajusta los nombres de las claves según tu Excel)
-                # Ejemplo: row.get('nombre completo', '')
-                
-                # Asumiremos que el Excel tiene columnas separadas o trataremos de separar el nombre
-                # Aquí hago una lógica simple, pero lo ideal es que el Excel tenga columnas separadas
-                full_name = str(row.get('nombre', '')).strip()
-                parts = full_name.split()
-                
-                first_name = parts[0] if len(parts) > 0 else "SinNombre"
-                # Lógica básica de separación (puede fallar con nombres compuestos, ojo aquí)
-                if len(parts) >= 3:
-                    last_name_p = parts[-2]
-                    last_name_m = parts[-1]
-                    middle_name = " ".join(parts[1:-2])
-                elif len(parts) == 2:
-                    last_name_p = parts[1]
-                    last_name_m = "X" # Placeholder si falta
-                    middle_name = ""
-                else:
-                    last_name_p = "X"
-                    last_name_m = "X"
-                    middle_name = ""
-
-                curp = str(row.get('curp', '')).strip().upper()
-                phone = str(row.get('telefono', ''))
-                sex = str(row.get('sexo', 'M'))[0].upper() # Tomamos la primera letra
-
-                # 2. Crear o Actualizar Voluntario
-                volunteer, created = Volunteer.objects.update_or_create(
-                    curp=curp,
-                    defaults={
-                        'first_name': first_name,
-                        'middle_name': middle_name,
-                        'last_name_paternal': last_name_p,
-                        'last_name_maternal': last_name_m,
-                        'sex': sex,
-                        'phone': phone,
-                    }
-                )
-
-                if created:
-                    count_created += 1
-                else:
-                    count_updated += 1
-
-                # 3. Importar Estudio (Si el Excel dice en qué estudio participó)
-                study_name = str(row.get('estudio', '')).strip()
-                fecha_pago = row.get('fecha pago') # Asumiendo columna 'fecha pago'
-                
-                if study_name and study_name.lower() != 'nan':
-                    # Buscamos o creamos el estudio (para que no falle la importación)
-                    study, _ = Study.objects.get_or_create(name=study_name)
-                    
-                    # Verificamos si es fecha válida
-                    if pd.isnull(fecha_pago):
-                        p_date = None
-                    else:
-                        # Pandas a veces trae Timestamp, lo pasamos a date
-                        p_date = fecha_pago.date() if isinstance(fecha_pago, datetime.datetime) else None
-
-                    # Creamos la participación histórica
-                    # OJO: Asumimos fecha de internamiento hoy si no viene en el excel, o pon una por defecto
-                    Participation.objects.get_or_create(
-                        volunteer=volunteer,
-                        study=study,
-                        defaults={
-                            'admission_date': datetime.date.today(), # Ajustar si el excel tiene esta fecha
-                            'payment_date': p_date,
-                            'is_active': False if p_date else True
-                        }
-                    )
+        with f:
+            if workers > 1:
+                # Los procesos interpretan los lotes; este proceso solo escribe en la BD
+                with Pool(workers) as pool:
+                    parsed = pool.imap(parse_history_batch, reader)
+                    self._load_all(parsed)
+            else:
+                self._load_all(map(parse_history_batch, reader))
 
+        elapsed = time.monotonic() - started
+        rate = self.count_rows / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Importación completada. Creados: {self.count_created}, Actualizados: {self.count_updated}, "
+            f"Participaciones: {self.count_participations}"
+        ))
+        self.stdout.write(f"{self.count_rows} filas en {elapsed:.1f} s ({rate:.0f} filas/s)")
+
+    def _load_all(self, parsed_batches):
+        for records, warnings in parsed_batches:
+            for warning in warnings:
+                self.stdout.write(self.style.WARNING(warning))
+            try:
+                with transaction.atomic():
+                    created, updated, participations = self._load_chunk(records)
+                self.count_created += created
+                self.count_updated += updated
+                self.count_participations += participations
             except Exception as e:
-                self.stdout.write(self.style.WARNING(f"Error en fila {index}: {e}"))
+                # El bloque se revirtió completo; los estudios en caché pudieron no guardarse
+                self.studies = {}
+                first, last = records[0]['row_num'], records[-1]['row_num']
+                self.stdout.write(self.style.WARNING(f"Error en filas {first}-{last}: {e}"))
+            self.count_rows += len(records) + len(warnings)
+
+    def _load_chunk(self, records):
+        """Guarda un bloque y devuelve (creados, actualizados, participaciones)."""
+        if not records:
+            return 0, 0, 0
+
+        # Si una CURP se repite en el bloque, gana la última fila
+        by_curp = {r['curp']: r for r in records}
+        # CURP -> código de los que ya existen (el código se conserva, pero entra en search_text)
+        existing = dict(Volunteer.objects.filter(curp__in=by_curp.keys()).values_list('curp', 'code'))
+
+        # 1. Estudios: se crean una sola vez y se reutilizan entre bloques
+        self._ensure_studies(records)
+
+        # 2. Voluntarios: upsert por CURP; solo los nuevos consumen consecutivo
+        new_records = [r for r in by_curp.values() if r['curp'] not in existing]
+        year = date.today().year
+        next_sequence = VolunteerCodeSequence.reserve(year, count=len(new_records)) if new_records else None
+
+        volunteers = []
+        for r in by_curp.values():
+            volunteer = Volunteer(
+                curp=r['curp'],
+                first_name=r['first_name'],
+                middle_name=r['middle_name'],
+                last_name_paternal=r['last_name_paternal'],
+                last_name_maternal=r['last_name_maternal'],
+                sex=r['sex'],
+                phone=r['phone'],
+                birth_date=r['birth_date'],
+            )
+            if r['curp'] in existing:
+                volunteer.code = existing[r['curp']]
+            else:
+                volunteer.code = build_volunteer_code(volunteer.initials, year, next_sequence)
+                next_sequence += 1
+            volunteer.search_text = build_search_text(volunteer)
+            volunteers.append(volunteer)
+
+        Volunteer.objects.bulk_create(
+            volunteers, update_conflicts=True, unique_fields=['curp'], update_fields=UPSERT_FIELDS
+        )
+        # 3. Participaciones históricas (sin duplicar las que ya existen)
+        ids = dict(Volunteer.objects.filter(curp__in=by_curp.keys()).values_list('curp', 'id'))
+        current = set(
+            Participation.objects.filter(volunteer_id__in=ids.values()).values_list('volunteer_id', 'study_id')
+        )
+        participations = []
+        for r in records:
+            if not r['study']:
                 continue
+            pair = (ids[r['curp']], self.studies[r['study']].id)
+            if pair not in current:
+                current.add(pair)
+                participations.append(Participation(volunteer_id=pair[0], study_id=pair[1]))
+
+        Participation.objects.bulk_create(participations)
+        # bulk_create no dispara señales: recalculamos el estatus del bloque
+        refresh_statuses(ids.values())
+        return len(new_records), len(by_curp) - len(new_records), len(participations)
+
+    def _ensure_studies(self, records):
+        payment_dates = {}
+        for r in records:
+            if r['study'] and r['study'] not in self.studies:
+                payment_dates.setdefault(r['study'], r['payment_date'])
+        if not payment_dates:
+            return
+
+        for study in Study.objects.filter(name__in=payment_dates.keys()):
+            self.studies[study.name] = study
+
+        # La fecha de pago del histórico vive en el estudio (Participation ya no la tiene)
+        today = date.today()
+        missing = [
+            Study(
+                name=name,
+                payment_date=payment_date,
+                is_active=not (payment_date and payment_date < today),
+            )
+            for name, payment_date in payment_dates.items()
+            if name not in self.studies
+        ]
+        Study.objects.bulk_create(missing, ignore_conflicts=True)
 
-        self.stdout.write(self.style.SUCCESS(f"Importación completada. Creados: {count_created}, Actualizados: {count_updated}"))
\ No newline at end of file
+        for study in Study.objects.filter(name__in=[s.name for s in missing]):
+            self.studies[study.name] = study
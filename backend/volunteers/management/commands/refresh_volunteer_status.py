@@ -0,0 +1,27 @@
+import time
+from django.core.management.base import BaseCommand
+from volunteers.models import Volunteer
+from volunteers.status import refresh_statuses, date_driven_candidates
+
+
+class Command(BaseCommand):
+    help = 'Recalcula el estatus guardado de los voluntarios (fin de lavado, edad, fecha de internamiento, estudios ya cerrados). Correr a diario.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Recalcular todos los voluntarios, no solo los candidatos por fecha')
+
+    def handle(self, *args, **kwargs):
+        started = time.monotonic()
+
+        if kwargs['all']:
+            volunteers = Volunteer.objects.all()
+        else:
+            volunteers = date_driven_candidates()
+
+        candidates = volunteers.count()
+        changed = refresh_statuses(volunteers)
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Estatus actualizado. Revisados: {candidates}, Cambiaron: {changed} ({elapsed:.1f} s)"
+        ))
@@ -0,0 +1,39 @@
+import time
+from django.core.management.base import BaseCommand
+from volunteers.jobs import claim_next_job, run_import_job, fail_stale_jobs
+
+
+class Command(BaseCommand):
+    help = 'Procesa en segundo plano las importaciones de Excel en cola (ImportJob)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Procesar la cola pendiente y salir')
+        parser.add_argument('--poll-interval', type=float, default=2.0, help='Segundos entre revisiones de la cola')
+
+    def handle(self, *args, **kwargs):
+        once = kwargs['once']
+        poll_interval = kwargs['poll_interval']
+
+        self.stdout.write("Worker de importación iniciado.")
+
+        while True:
+            stale = fail_stale_jobs()
+            if stale:
+                self.stdout.write(self.style.WARNING(f"{stale} importaciones sin avance se marcaron como fallidas."))
+
+            job = claim_next_job()
+            if job is None:
+                if once:
+                    break
+                time.sleep(poll_interval)
+                continue
+
+            self.stdout.write(f"Procesando importación {job.id}...")
+            job = run_import_job(job)
+
+            if job.status == 'done':
+                self.stdout.write(self.style.SUCCESS(
+                    f"Importación {job.id} completada. Creados: {job.created}, Errores: {len(job.errors)}"
+                ))
+            else:
+                self.stdout.write(self.style.ERROR(f"Importación {job.id} fallida: {job.error_message}"))
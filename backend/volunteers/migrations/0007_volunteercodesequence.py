@@ -0,0 +1,38 @@
+# Generated by Django 5.2.6 on 2026-10-18 00:24
+
+from django.db import migrations, models
+
+
+def seed_sequences(apps, schema_editor):
+    # Inicializa el contador de cada año con el consecutivo más alto ya usado
+    Volunteer = apps.get_model('volunteers', 'Volunteer')
+    VolunteerCodeSequence = apps.get_model('volunteers', 'VolunteerCodeSequence')
+
+    max_by_year = {}
+    for code in Volunteer.objects.exclude(code__isnull=True).values_list('code', flat=True).iterator():
+        parts = code.split('-')
+        if len(parts) >= 3 and parts[-2].isdigit() and parts[-1].isdigit():
+            year, sequence = int(parts[-2]), int(parts[-1])
+            max_by_year[year] = max(sequence, max_by_year.get(year, 0))
+
+    VolunteerCodeSequence.objects.bulk_create(
+        [VolunteerCodeSequence(year=year, last_value=value) for year, value in max_by_year.items()]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('volunteers', '0006_participation_assigned_at_alter_participation_study_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VolunteerCodeSequence',
+            fields=[
+                ('year', models.PositiveIntegerField(primary_key=True, serialize=False)),
+                ('last_value', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(seed_sequences, migrations.RunPython.noop),
+    ]
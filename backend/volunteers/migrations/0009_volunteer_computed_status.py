@@ -0,0 +1,84 @@
+# Generated by Django 5.2.6 on 2026-10-18 00:31
+
+from datetime import date, timedelta
+from django.db import migrations, models
+from django.db.models import Prefetch
+
+# Copia de las reglas de volunteers/status.py al momento de esta migración: si el
+# módulo cambia después, la migración sigue haciendo lo mismo.
+WASHOUT_DAYS = 90
+MAX_ELIGIBLE_AGE = 55
+MANUAL_FALLBACK = ('waiting_approval', 'eligible', 'rejected')
+
+
+def age_on(birth_date, today):
+    if not birth_date:
+        return None
+    return today.year - birth_date.year - ((today.month, today.day) < (birth_date.month, birth_date.day))
+
+
+def compute_status(volunteer, participations, today):
+    studies = [p.study for p in sorted(participations, key=lambda p: p.id)]
+
+    payment_dates = [s.payment_date for s in studies if s.payment_date]
+    washout_until = max(payment_dates) + timedelta(days=WASHOUT_DAYS) if payment_dates else None
+
+    active = next((s for s in studies if s.is_active), None)
+    if active:
+        if active.admission_date and active.admission_date > today:
+            return 'study_assigned', washout_until
+        return 'in_study', washout_until
+
+    age = age_on(volunteer.birth_date, today)
+    if age is not None and age > MAX_ELIGIBLE_AGE:
+        return 'age_mismatch', washout_until
+
+    if washout_until:
+        if today < washout_until:
+            return 'standby', washout_until
+        elif volunteer.manual_status != 'rejected':
+            return 'eligible', washout_until
+
+    if volunteer.manual_status in MANUAL_FALLBACK:
+        return volunteer.manual_status, washout_until
+    return 'waiting_approval', washout_until
+
+
+def backfill_computed_status(apps, schema_editor):
+    today = date.today()
+    Volunteer = apps.get_model('volunteers', 'Volunteer')
+    Participation = apps.get_model('volunteers', 'Participation')
+
+    volunteers = Volunteer.objects.prefetch_related(
+        Prefetch('participations', queryset=Participation.objects.select_related('study'))
+    ).order_by('pk')
+
+    batch = []
+    for volunteer in volunteers.iterator(chunk_size=1000):
+        volunteer.computed_status, volunteer.washout_until = compute_status(volunteer, volunteer.participations.all(), today)
+        batch.append(volunteer)
+        if len(batch) >= 1000:
+            Volunteer.objects.bulk_update(batch, ['computed_status', 'washout_until'])
+            batch = []
+    Volunteer.objects.bulk_update(batch, ['computed_status', 'washout_until'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('volunteers', '0008_importjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='volunteer',
+            name='computed_status',
+            field=models.CharField(choices=[('waiting_approval', 'En espera por aprobación'), ('eligible', 'Apto'), ('rejected', 'Rechazado'), ('age_mismatch', 'No elegible por edad'), ('in_study', 'En estudio'), ('study_assigned', 'Estudio asignado'), ('standby', 'En espera (Descanso)')], db_index=True, default='waiting_approval', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='volunteer',
+            name='washout_until',
+            field=models.DateField(blank=True, db_index=True, null=True),
+        ),
+        migrations.RunPython(backfill_computed_status, migrations.RunPython.noop),
+    ]
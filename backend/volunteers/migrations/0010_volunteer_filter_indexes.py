@@ -0,0 +1,39 @@
+# Generated by Django 5.2.6 on 2026-10-18 00:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('studies', '0003_alter_study_is_active'),
+        ('volunteers', '0009_volunteer_computed_status'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='volunteer',
+            name='computed_status',
+            field=models.CharField(choices=[('waiting_approval', 'En espera por aprobación'), ('eligible', 'Apto'), ('rejected', 'Rechazado'), ('age_mismatch', 'No elegible por edad'), ('in_study', 'En estudio'), ('study_assigned', 'Estudio asignado'), ('standby', 'En espera (Descanso)')], default='waiting_approval', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='participation',
+            index=models.Index(fields=['study', 'volunteer'], name='participation_study_vol_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='volunteer',
+            index=models.Index(fields=['-created_at', '-id'], name='volunteer_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='volunteer',
+            index=models.Index(fields=['computed_status', '-created_at', '-id'], name='volunteer_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='volunteer',
+            index=models.Index(fields=['sex', 'birth_date'], name='volunteer_sex_birth_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='volunteer',
+            index=models.Index(fields=['birth_date'], name='volunteer_birth_idx'),
+        ),
+    ]
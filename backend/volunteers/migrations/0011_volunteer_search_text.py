@@ -0,0 +1,67 @@
+# Generated by Django 5.2.6 on 2026-10-18 02:10
+
+from django.contrib.postgres.operations import TrigramExtension
+import unicodedata
+from django.db import migrations, models
+
+
+# Copia de volunteers/search.py al momento de esta migración: si el módulo cambia
+# después, la migración sigue haciendo lo mismo.
+def build_search_text(volunteer):
+    text = ' '.join([
+        volunteer.first_name or '',
+        volunteer.middle_name or '',
+        volunteer.last_name_paternal or '',
+        volunteer.last_name_maternal or '',
+        volunteer.code or '',
+        volunteer.curp or '',
+    ])
+    decomposed = unicodedata.normalize('NFKD', text)
+    without_accents = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    return ' '.join(without_accents.lower().split())
+
+
+def backfill_search_text(apps, schema_editor):
+    Volunteer = apps.get_model('volunteers', 'Volunteer')
+    batch = []
+    for volunteer in Volunteer.objects.order_by('pk').iterator(chunk_size=1000):
+        volunteer.search_text = build_search_text(volunteer)
+        batch.append(volunteer)
+        if len(batch) >= 1000:
+            Volunteer.objects.bulk_update(batch, ['search_text'])
+            batch = []
+    Volunteer.objects.bulk_update(batch, ['search_text'])
+
+
+def create_trigram_index(apps, schema_editor):
+    # El operador gin_trgm_ops solo existe en PostgreSQL (extensión pg_trgm)
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS volunteer_search_trgm_idx '
+        'ON volunteers_volunteer USING gin (search_text gin_trgm_ops)'
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS volunteer_search_trgm_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('volunteers', '0010_volunteer_filter_indexes'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='volunteer',
+            name='search_text',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(backfill_search_text, migrations.RunPython.noop),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-18 00:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('volunteers', '0011_volunteer_search_text'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DuplicatePair',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('cluster', models.BigIntegerField(db_index=True)),
+                ('detected_at', models.DateTimeField(auto_now_add=True)),
+                ('volunteer_a', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='volunteers.volunteer')),
+                ('volunteer_b', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='volunteers.volunteer')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('volunteer_a', 'volunteer_b'), name='unique_duplicate_pair')],
+            },
+        ),
+    ]
@@ -1,7 +1,21 @@
-from django.db import models
+from django.db import models, transaction
+from django.conf import settings
 from django.core.validators import RegexValidator
 import uuid
 
+
+def build_volunteer_code(initials, year, sequence):
+    # Formato INICIALES-AÑO-CONSECUTIVO, ej: FGG-2026-0338
+    return f"{initials}-{year}-{sequence:04d}"
+
+
+def parse_volunteer_code(code):
+    """Devuelve (año, consecutivo) de un código INICIALES-AÑO-CONSECUTIVO, o None."""
+    parts = (code or '').split('-')
+    if len(parts) >= 3 and parts[-2].isdigit() and parts[-1].isdigit():
+        return int(parts[-2]), int(parts[-1])
+    return None
+
 class Volunteer(models.Model):
     # Generamos UUID por si no traen CURP, para tener algo único interno
     id = models.BigAutoField(primary_key=True)
@@ -44,62 +58,67 @@ class Volunteer(models.Model):
     ]
     manual_status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='waiting_approval')
     status_reason = models.TextField(blank=True, null=True)
+
+    # Estatus mostrado (estudio activo, edad, lavado y estatus manual), guardado para poder
+    # filtrar/ordenar en SQL. Lo mantienen volunteers/status.py, las señales y el comando diario.
+    computed_status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='waiting_approval')
+    washout_until = models.DateField(blank=True, null=True, db_index=True)
+
+    # Nombre completo + código + CURP en minúsculas y sin acentos (volunteers/search.py).
+    # En PostgreSQL tiene un índice GIN pg_trgm para la búsqueda del listado (?search=).
+    search_text = models.TextField(blank=True, default='', editable=False)
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        # Índices para los filtros del listado (volunteers/filters.py), que siempre
+        # se ordena por (-created_at, -id) para la paginación por cursor
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='volunteer_created_idx'),
+            models.Index(fields=['computed_status', '-created_at', '-id'], name='volunteer_status_created_idx'),
+            models.Index(fields=['sex', 'birth_date'], name='volunteer_sex_birth_idx'),
+            models.Index(fields=['birth_date'], name='volunteer_birth_idx'),
+        ]
+
     def save(self, *args, **kwargs):
         # Lógica para autogenerar código SOLO si no se proporcionó uno
         if not self.code:
             from datetime import date
-            today = date.today()
-            current_year = today.year  # 2026
-
-            # 1. Obtener Iniciales (Ej: Francisca Janette Gallegos García -> FGG)
-            # Primera letra nombre
-            ini_nom = self.first_name.strip()[0].upper()
-            # Primera letra paterno
-            ini_pat = self.last_name_paternal.strip()[0].upper()
-            # Primera letra materno (Si no tiene, usamos 'X')
-            if self.last_name_maternal and self.last_name_maternal.strip():
-                ini_mat = self.last_name_maternal.strip()[0].upper()
-            else:
-                ini_mat = 'X'
-            
-            initials = f"{ini_nom}{ini_pat}{ini_mat}"
+            current_year = date.today().year  # 2026
 
-            # 2. Calcular el consecutivo global del año (Ej: 0338)
-            # Buscamos todos los códigos que contengan el año actual "-2026-"
-            # para encontrar el número más alto usado este año, sin importar las iniciales.
-            
-            # Obtenemos los códigos existentes del año
-            existing_codes = Volunteer.objects.filter(
-                code__contains=f"-{current_year}-"
-            ).values_list('code', flat=True)
-            
-            max_sequence = 0
-            
-            for code in existing_codes:
-                try:
-                    # El formato es INICIALES-AÑO-CONSECUTIVO
-                    # Hacemos split por guion '-' y tomamos la última parte
-                    parts = code.split('-')
-                    # Validamos que tenga al menos 3 partes y la ultima sea numero
-                    if len(parts) >= 3 and parts[-1].isdigit():
-                        sequence = int(parts[-1])
-                        if sequence > max_sequence:
-                            max_sequence = sequence
-                except (ValueError, IndexError):
-                    continue
-            
-            # El nuevo consecutivo es el máximo encontrado + 1
-            new_sequence = max_sequence + 1
-            
-            # 3. Formar el código final: FGG-2026-0338
-            self.code = f"{initials}-{current_year}-{new_sequence:04d}"
+            # Consecutivo global del año tomado del contador (O(1), con bloqueo de fila)
+            new_sequence = VolunteerCodeSequence.reserve(current_year)
+
+            # Formar el código final: FGG-2026-0338
+            self.code = build_volunteer_code(self.initials, current_year, new_sequence)
+        elif self._state.adding:
+            # Código importado: avanzamos el contador para no reutilizar su número
+            VolunteerCodeSequence.observe_codes([self.code])
+
+        # Recalculamos el estatus guardado (edad o estatus manual pudieron cambiar)
+        from .status import compute_status
+        from .search import build_search_text
+        participations = self.participations.select_related('study') if self.pk else []
+        self.computed_status, self.washout_until = compute_status(self, participations)
+        self.search_text = build_search_text(self)
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = set(kwargs['update_fields']) | {'computed_status', 'washout_until', 'search_text'}
             
         super().save(*args, **kwargs)
 
+    @property
+    def initials(self):
+        # Ej: Francisca Janette Gallegos García -> FGG
+        ini_nom = self.first_name.strip()[0].upper()
+        ini_pat = self.last_name_paternal.strip()[0].upper()
+        # Primera letra materno (Si no tiene, usamos 'X')
+        if self.last_name_maternal and self.last_name_maternal.strip():
+            ini_mat = self.last_name_maternal.strip()[0].upper()
+        else:
+            ini_mat = 'X'
+        return f"{ini_nom}{ini_pat}{ini_mat}"
+
     def __str__(self):
         return f"{self.first_name} {self.last_name_paternal} ({self.code})"
 
@@ -123,10 +142,124 @@ class Participation(models.Model):
     volunteer = models.ForeignKey(Volunteer, related_name='participations', on_delete=models.CASCADE)
     study = models.ForeignKey('studies.Study', on_delete=models.CASCADE)
     assigned_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Filtro ?study=<id>: voluntarios con participación en el estudio
+            models.Index(fields=['study', 'volunteer'], name='participation_study_vol_idx'),
+        ]
     
     def __str__(self):
         return f"{self.volunteer.code} - {self.study.name}"
     
     @property
     def study_name(self):
-        return self.study.name
\ No newline at end of file
+        return self.study.name
+
+class VolunteerCodeSequence(models.Model):
+    """Contador por año para el consecutivo de los códigos de voluntario."""
+    year = models.PositiveIntegerField(primary_key=True)
+    last_value = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.year}: {self.last_value}"
+
+    @classmethod
+    def reserve(cls, year, count=1):
+        """
+        Reserva `count` consecutivos del año y devuelve el primero.
+        Los números reservados son [primero, primero + count).
+        """
+        if count < 1:
+            raise ValueError("count debe ser mayor o igual a 1")
+
+        with transaction.atomic():
+            sequence = cls._locked(year)
+            first = sequence.last_value + 1
+            sequence.last_value += count
+            sequence.save(update_fields=['last_value'])
+        return first
+
+    @classmethod
+    def observe_codes(cls, codes):
+        """Avanza los contadores para que no reutilicen números de códigos ya asignados."""
+        max_by_year = {}
+        for code in codes:
+            parsed = parse_volunteer_code(code)
+            if parsed:
+                year, sequence = parsed
+                max_by_year[year] = max(sequence, max_by_year.get(year, 0))
+
+        for year, sequence in max_by_year.items():
+            with transaction.atomic():
+                cls._locked(year)
+                cls.objects.filter(year=year, last_value__lt=sequence).update(last_value=sequence)
+
+    @classmethod
+    def _locked(cls, year):
+        # Debe llamarse dentro de transaction.atomic()
+        sequence, _ = cls.objects.select_for_update().get_or_create(
+            year=year, defaults={'last_value': cls._existing_max(year)}
+        )
+        return sequence
+
+    @staticmethod
+    def _existing_max(year):
+        # Solo se ejecuta la primera vez que se usa un año (y en la migración),
+        # para continuar la numeración de los códigos que ya existen.
+        max_sequence = 0
+        codes = Volunteer.objects.filter(code__contains=f"-{year}-").values_list('code', flat=True)
+        for code in codes.iterator():
+            parsed = parse_volunteer_code(code)
+            if parsed and parsed[0] == year:
+                max_sequence = max(max_sequence, parsed[1])
+        return max_sequence
+
+
+class ImportJob(models.Model):
+    """Importación de Excel en segundo plano; la procesa el comando run_import_worker."""
+    STATUS_CHOICES = [
+        ('pending', 'En cola'),
+        ('running', 'Procesando'),
+        ('done', 'Finalizado'),
+        ('failed', 'Fallido'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    file = models.FileField(upload_to='imports/')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending', db_index=True)
+    total_rows = models.PositiveIntegerField(null=True, blank=True)
+    processed = models.PositiveIntegerField(default=0)
+    created = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)
+    error_message = models.TextField(blank=True, default='')
+
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    # El worker lo actualiza después de cada bloque; si deja de avanzar, el trabajo se da por perdido
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Importación {self.id} ({self.status})"
+
+
+class DuplicatePair(models.Model):
+    """
+    Posible registro duplicado detectado por el comando find_duplicates (volunteers/duplicates.py).
+    Cada corrida reemplaza todos los pares; `cluster` es el id menor del grupo conectado.
+    """
+    volunteer_a = models.ForeignKey(Volunteer, related_name='+', on_delete=models.CASCADE)
+    volunteer_b = models.ForeignKey(Volunteer, related_name='+', on_delete=models.CASCADE)
+    score = models.FloatField()
+    cluster = models.BigIntegerField(db_index=True)
+    detected_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['volunteer_a', 'volunteer_b'], name='unique_duplicate_pair'),
+        ]
+
+    def __str__(self):
+        return f"{self.volunteer_a_id} ~ {self.volunteer_b_id} ({self.score:.2f})"
@@ -0,0 +1,57 @@
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class VolunteerCursorPagination(CursorPagination):
+    # Paginación por cursor sobre (created_at, id): el costo por página no crece
+    # con el tamaño del registro, a diferencia de LIMIT/OFFSET.
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = ('-created_at', '-id')
+    offset_query_param = 'offset'
+
+    ranked = False
+
+    def get_ordering(self, request, queryset, view):
+        # ?ordering= cambia la columna del cursor; el id desempata filas con el mismo valor
+        ordering = super().get_ordering(request, queryset, view)
+        if not any(field.lstrip('-') == 'id' for field in ordering):
+            ordering += ('-id' if ordering[0].startswith('-') else 'id',)
+        return ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        # Con ?search= en PostgreSQL el orden es por similitud (VolunteerSearchFilter), que no
+        # es una posición estable para el cursor: esas búsquedas se paginan con ?offset=.
+        self.ranked = 'search_rank' in queryset.query.annotations
+        if not self.ranked:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        try:
+            self.offset = max(0, int(request.query_params.get(self.offset_query_param, 0)))
+        except ValueError:
+            self.offset = 0
+
+        rows = list(queryset[self.offset:self.offset + self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        self.has_previous = self.offset > 0
+        self.page = rows[:self.page_size]
+        return self.page
+
+    def _offset_link(self, offset):
+        url = remove_query_param(self.base_url, self.cursor_query_param)
+        if offset <= 0:
+            return remove_query_param(url, self.offset_query_param)
+        return replace_query_param(url, self.offset_query_param, offset)
+
+    def get_next_link(self):
+        if not self.ranked:
+            return super().get_next_link()
+        return self._offset_link(self.offset + self.page_size) if self.has_next else None
+
+    def get_previous_link(self):
+        if not self.ranked:
+            return super().get_previous_link()
+        return self._offset_link(self.offset - self.page_size) if self.has_previous else None
@@ -0,0 +1,189 @@
+import os
+import pandas as pd
+from openpyxl import load_workbook
+
+# Columnas aceptadas (en minúsculas) para cada campo del modelo. Es el único
+# mapeo de alias: lo usan tanto el endpoint de importación como import_excel.
+# Si vienen ambas, gana la primera, igual que row.get('nombre', row.get('first_name')).
+COLUMN_ALIASES = {
+    'curp': ('curp',),
+    'first_name': ('nombre', 'first_name'),
+    'middle_name': ('segundo nombre', 'middle_name'),
+    'last_name_paternal': ('apellido paterno', 'last_name_paternal'),
+    'last_name_maternal': ('apellido materno', 'last_name_maternal'),
+    'phone': ('telefono', 'phone'),
+    'sex': ('sexo', 'sex'),
+    'birth_date': ('fecha nacimiento', 'fecha de nacimiento'),
+    'code': ('codigo', 'code'),
+    'studies': ('estudios', 'studies', 'estudio'),
+    'payment_date': ('fecha pago', 'fecha de pago', 'payment_date'),
+}
+
+SUPPORTED_EXTENSIONS = ('.xlsx', '.csv')
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+class InvalidSpreadsheet(ValueError):
+    pass
+
+
+def normalize_columns(df):
+    """Pasa los encabezados a minúsculas y resuelve los alias a los nombres del modelo."""
+    df.columns = [str(c).lower().strip() for c in df.columns]
+    normalized = pd.DataFrame(index=df.index)
+    for field, aliases in COLUMN_ALIASES.items():
+        source = next((alias for alias in aliases if alias in df.columns), None)
+        normalized[field] = df[source] if source else None
+    return normalized
+
+
+class SpreadsheetReader:
+    """
+    Lee un .xlsx (openpyxl en modo read-only) o un .csv (pandas por bloques) y
+    entrega lotes normalizados de `batch_size` filas como (fila_excel_inicial, DataFrame).
+    La memoria usada depende del tamaño del lote, no del archivo.
+    """
+
+    def __init__(self, file, filename, batch_size=DEFAULT_BATCH_SIZE):
+        self.file = file
+        self.batch_size = batch_size
+        self.extension = os.path.splitext(filename or '')[1].lower()
+        if self.extension not in SUPPORTED_EXTENSIONS:
+            raise InvalidSpreadsheet("El archivo debe ser un Excel (.xlsx) o CSV.")
+        self.total_rows = None
+
+    def __iter__(self):
+        if self.extension == '.csv':
+            return self._iter_csv()
+        return self._iter_xlsx()
+
+    def _iter_xlsx(self):
+        try:
+            workbook = load_workbook(self.file, read_only=True, data_only=True)
+        except Exception:
+            raise InvalidSpreadsheet("El archivo no es un Excel válido (.xlsx).")
+
+        try:
+            sheet = workbook.worksheets[0]
+            # max_row viene de las dimensiones guardadas en el archivo; es solo un estimado
+            if sheet.max_row:
+                self.total_rows = max(sheet.max_row - 1, 0)
+
+            rows = sheet.iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                return
+            columns = [str(c) if c is not None else '' for c in header]
+
+            batch, batch_start, row_num = [], 2, 1
+            for values in rows:
+                row_num += 1
+                if all(v is None or (isinstance(v, str) and not v.strip()) for v in values):
+                    continue  # Filas vacías (comunes al final de la hoja)
+                if not batch:
+                    batch_start = row_num
+                batch.append(values)
+                if len(batch) >= self.batch_size:
+                    yield batch_start, self._to_frame(batch, columns)
+                    batch = []
+            if batch:
+                yield batch_start, self._to_frame(batch, columns)
+        finally:
+            workbook.close()
+
+    def _iter_csv(self):
+        try:
+            chunks = pd.read_csv(
+                self.file, chunksize=self.batch_size, dtype=str,
+                encoding='utf-8-sig', encoding_errors='replace',
+            )
+            row_num = 2
+            for chunk in chunks:
+                yield row_num, normalize_columns(chunk)
+                row_num += len(chunk)
+        except (pd.errors.ParserError, pd.errors.EmptyDataError):
+            raise InvalidSpreadsheet("El archivo no es un CSV válido.")
+
+    @staticmethod
+    def _to_frame(batch, columns):
+        width = len(columns)
+        rows = [tuple(values[:width]) + (None,) * (width - len(values)) for values in batch]
+        return normalize_columns(pd.DataFrame(rows, columns=columns))
+
+
+def _text(value):
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return ''
+    return str(value).strip()
+
+
+def normalize_sex(series):
+    """
+    Sexo como lo guarda el modelo, igual en la importación por API y en import_excel:
+    'H...' -> 'M', 'M...' (Mujer) -> 'F', 'F' se queda; lo demás queda vacío.
+    """
+    sex = series.where(series.notna(), '').astype(str).str.strip().str.upper()
+    normalized = pd.Series([None] * len(sex), index=sex.index, dtype=object)
+    normalized[sex == 'F'] = 'F'
+    normalized[sex.str.startswith('M')] = 'F'
+    normalized[sex.str.startswith('H')] = 'M'
+    return normalized
+
+
+def _as_dates(series):
+    parsed = pd.to_datetime(series, errors='coerce', format='mixed')
+    return [None if pd.isna(d) else d.date() for d in parsed]
+
+
+def parse_history_batch(item):
+    """
+    Convierte un lote normalizado del histórico (import_excel) en registros listos
+    para guardar. No toca la base de datos, así que puede correr en otro proceso.
+    Devuelve (registros, advertencias).
+    """
+    first_row_num, batch = item
+    records, warnings = [], []
+    birth_dates = _as_dates(batch['birth_date'])
+    payment_dates = _as_dates(batch['payment_date'])
+    sexes = normalize_sex(batch['sex']).tolist()
+
+    for offset, row in enumerate(batch.to_dict('records')):
+        row_num = first_row_num + offset
+        curp = _text(row['curp']).upper()
+        if not curp:
+            warnings.append(f"Fila {row_num}: sin CURP, se omite.")
+            continue
+
+        if _text(row['last_name_paternal']):
+            # El archivo trae columnas separadas
+            first_name = _text(row['first_name']) or "SinNombre"
+            middle_name = _text(row['middle_name'])
+            last_name_p = _text(row['last_name_paternal'])
+            last_name_m = _text(row['last_name_maternal']) or "X"
+        else:
+            # Solo viene el nombre completo: tratamos de separarlo (puede fallar con nombres compuestos)
+            parts = _text(row['first_name']).split()
+            first_name = parts[0] if parts else "SinNombre"
+            if len(parts) >= 3:
+                last_name_p, last_name_m, middle_name = parts[-2], parts[-1], " ".join(parts[1:-2])
+            elif len(parts) == 2:
+                last_name_p, last_name_m, middle_name = parts[1], "X", ""
+            else:
+                last_name_p, last_name_m, middle_name = "X", "X", ""
+
+        records.append({
+            'row_num': row_num,
+            'curp': curp,
+            'first_name': first_name,
+            'middle_name': middle_name,
+            'last_name_paternal': last_name_p,
+            'last_name_maternal': last_name_m,
+            'sex': sexes[offset],
+            'phone': _text(row['phone']),
+            'birth_date': birth_dates[offset],
+            'study': _text(row['studies']),
+            'payment_date': payment_dates[offset],
+        })
+
+    return records, warnings
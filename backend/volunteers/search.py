@@ -0,0 +1,20 @@
+import unicodedata
+
+
+def normalize_search(text):
+    """Minúsculas, sin acentos y con espacios simples: 'García  López' -> 'garcia lopez'."""
+    decomposed = unicodedata.normalize('NFKD', str(text or ''))
+    without_accents = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    return ' '.join(without_accents.lower().split())
+
+
+def build_search_text(volunteer):
+    """Texto de búsqueda del voluntario: nombre completo, código y CURP normalizados."""
+    return normalize_search(' '.join([
+        volunteer.first_name or '',
+        volunteer.middle_name or '',
+        volunteer.last_name_paternal or '',
+        volunteer.last_name_maternal or '',
+        volunteer.code or '',
+        volunteer.curp or '',
+    ]))
@@ -1,8 +1,11 @@
+from datetime import timedelta
+from django.db import transaction
 from rest_framework import serializers
-from .models import Volunteer, Participation
+from .models import Volunteer, Participation, ImportJob
 from studies.models import Study
-from auditing.models import AuditLog
-from datetime import date, timedelta
+from auditing.writer import log_change
+from .filters import FILTER_PARAMS
+from .status import WASHOUT_DAYS, age_on
 
 class ParticipationSerializer(serializers.ModelSerializer):
     study_name = serializers.CharField(source='study.name', read_only=True)
@@ -14,13 +17,49 @@ class ParticipationSerializer(serializers.ModelSerializer):
         model = Participation
         fields = ['id', 'volunteer', 'study', 'study_name', 'admission_date', 'payment_date', 'is_active']
 
-class VolunteerSerializer(serializers.ModelSerializer):
-    participations = ParticipationSerializer(many=True, read_only=True)
-    
+class VolunteerListSerializer(serializers.ModelSerializer):
+    """Representación compacta para el listado (sin participaciones anidadas)."""
     status = serializers.SerializerMethodField()
     last_study = serializers.SerializerMethodField()
     active_study = serializers.SerializerMethodField()
-    age = serializers.IntegerField(read_only=True) # Exponemos la edad calculada
+    study_names = serializers.SerializerMethodField()
+    age = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Volunteer
+        fields = [
+            'id', 'code', 'first_name', 'middle_name', 'last_name_paternal',
+            'last_name_maternal', 'sex', 'phone', 'curp', 'birth_date', 'age',
+            'created_at', 'status', 'active_study', 'last_study', 'study_names',
+            'manual_status',
+        ]
+        read_only_fields = fields
+
+    # Todas las consultas se resuelven sobre obj.participations.all(), que la vista
+    # precarga (Prefetch + select_related('study')), así que no hay queries por fila.
+    def _participations(self, obj):
+        return sorted(obj.participations.all(), key=lambda p: p.id)
+
+    def _active_participation(self, obj):
+        return next((p for p in self._participations(obj) if p.study.is_active), None)
+
+    def get_active_study(self, obj):
+        active_part = self._active_participation(obj)
+        return active_part.study.name if active_part else None
+
+    def get_last_study(self, obj):
+        participations = self._participations(obj)
+        return participations[-1].study.name if participations else "-"
+
+    def get_status(self, obj):
+        # Estatus materializado en Volunteer.computed_status (ver volunteers/status.py)
+        return obj.get_computed_status_display()
+
+    def get_study_names(self, obj):
+        return [p.study.name for p in self._participations(obj)]
+
+class VolunteerSerializer(VolunteerListSerializer):
+    participations = ParticipationSerializer(many=True, read_only=True)
     
     justification = serializers.CharField(write_only=True, required=False)
     initial_study_id = serializers.IntegerField(write_only=True, required=False)
@@ -37,51 +76,6 @@ class VolunteerSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['code', 'age']
 
-    def get_active_study(self, obj):
-        active_part = obj.participations.filter(study__is_active=True).first()
-        return active_part.study.name if active_part else None
-
-    def get_last_study(self, obj):
-        last = obj.participations.order_by('-id').first()
-        return last.study.name if last else "-"
-
-    def get_status(self, obj):
-        today = date.today()
-        
-        # 1. PRIORIDAD MÁXIMA: En estudio activo
-        active_part = obj.participations.filter(study__is_active=True).first()
-        if active_part:
-            if active_part.study.admission_date and active_part.study.admission_date > today:
-                return "Estudio asignado"
-            return "En estudio"
-        
-        # 2. VALIDACIÓN DE EDAD (Mayor a 55 años)
-        if obj.age is not None and obj.age > 55:
-            return "No elegible por edad"
-
-        # 3. PERIODO DE LAVADO (Lógica modificada)
-        last_paid = obj.participations.filter(study__payment_date__isnull=False).order_by('-study__payment_date').first()
-        
-        if last_paid:
-            three_months_later = last_paid.study.payment_date + timedelta(days=90)
-            
-            # Si la fecha actual es MENOR a los 3 meses -> Sigue en descanso
-            if today < three_months_later:
-                return "En espera (Descanso)"
-            
-            # NUEVO: Si la fecha actual es MAYOR a los 3 meses -> Pasa a Apto automáticamente
-            # (Siempre y cuando no haya sido rechazado manualmente por otra razón médica)
-            elif obj.manual_status != 'rejected':
-                return "Apto"
-        
-        # 4. Estatus Administrativo Manual (Fallback)
-        status_map = {
-            'waiting_approval': 'En espera por aprobación',
-            'eligible': 'Apto',
-            'rejected': 'Rechazado'
-        }
-        return status_map.get(obj.manual_status, 'En espera por aprobación')
-
     def create(self, validated_data):
         study_id = validated_data.pop('initial_study_id', None)
         admission_date = validated_data.pop('initial_admission_date', None)
@@ -110,14 +104,94 @@ class VolunteerSerializer(serializers.ModelSerializer):
             if old_value != value:
                 changes[field] = {'from': str(old_value), 'to': str(value)}
 
-        if changes:
-            AuditLog.objects.create(
-                user=user,
-                action='UPDATE',
-                model_affected='Volunteer',
-                record_id=instance.code,
-                changes=changes,
-                justification=justification
-            )
-
-        return super().update(instance, validated_data)
\ No newline at end of file
+        # La bitácora se escribe al confirmar la misma transacción que guarda el cambio
+        with transaction.atomic():
+            if changes:
+                log_change(
+                    user=user,
+                    action='UPDATE',
+                    model_affected='Volunteer',
+                    record_id=instance.code,
+                    changes=changes,
+                    justification=justification
+                )
+
+            return super().update(instance, validated_data)
+
+class ImportJobSerializer(serializers.ModelSerializer):
+    has_errors = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ImportJob
+        fields = [
+            'id', 'status', 'total_rows', 'processed', 'created', 'errors', 'has_errors',
+            'error_message', 'created_at', 'started_at', 'finished_at'
+        ]
+        read_only_fields = fields
+
+    def get_has_errors(self, obj):
+        return len(obj.errors) > 0
+
+
+class DuplicateVolunteerSerializer(serializers.ModelSerializer):
+    full_name = serializers.ReadOnlyField()
+    status = serializers.CharField(source='get_computed_status_display', read_only=True)
+
+    class Meta:
+        model = Volunteer
+        fields = ['id', 'code', 'full_name', 'curp', 'birth_date', 'phone', 'status', 'created_at']
+        read_only_fields = fields
+
+
+class StudyAssignmentSerializer(serializers.Serializer):
+    """Datos para inscribir a un voluntario en un estudio (volunteers/{id}/add-participation/)."""
+    study_id = serializers.PrimaryKeyRelatedField(queryset=Study.objects.all())
+    justification = serializers.CharField()
+
+
+class BulkAssignmentSerializer(StudyAssignmentSerializer):
+    """
+    Inscripción de una cohorte: lista de ids o un filtro con los mismos
+    parámetros del listado, ej. {"status": "eligible", "sex": "F", "age_max": 40}.
+    """
+    volunteer_ids = serializers.ListField(
+        child=serializers.IntegerField(), required=False, allow_empty=False, max_length=5000
+    )
+    filters = serializers.DictField(required=False)
+
+    def validate(self, attrs):
+        if ('volunteer_ids' in attrs) == ('filters' in attrs):
+            raise serializers.ValidationError("Envíe 'volunteer_ids' o 'filters', no ambos.")
+        filters = attrs.get('filters', {})
+        unknown = set(filters) - set(FILTER_PARAMS)
+        if unknown:
+            raise serializers.ValidationError({'filters': f"Filtros no válidos: {', '.join(sorted(unknown))}"})
+        # Un filtro vacío seleccionaría a todo el padrón
+        if 'filters' in attrs and not any(str(value).strip() for value in filters.values() if value is not None):
+            raise serializers.ValidationError({'filters': "Indique al menos un filtro o una búsqueda."})
+        return attrs
+
+
+class EligibleVolunteerSerializer(serializers.ModelSerializer):
+    """Voluntario reclutable para un estudio en una fecha (context['target_date'])."""
+    full_name = serializers.ReadOnlyField()
+    status = serializers.CharField(source='get_computed_status_display', read_only=True)
+    age_on_date = serializers.SerializerMethodField()
+    last_payment_date = serializers.DateField(read_only=True)
+    available_from = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Volunteer
+        fields = [
+            'id', 'code', 'full_name', 'sex', 'phone', 'birth_date', 'age_on_date',
+            'status', 'last_payment_date', 'available_from'
+        ]
+        read_only_fields = fields
+
+    def get_age_on_date(self, obj):
+        return age_on(obj.birth_date, self.context['target_date'])
+
+    def get_available_from(self, obj):
+        if obj.last_payment_date is None:
+            return None
+        return obj.last_payment_date + timedelta(days=WASHOUT_DAYS)
@@ -0,0 +1,43 @@
+from django.db.models import QuerySet
+from django.db.models.signals import post_save, pre_delete, post_delete
+from django.dispatch import receiver
+from .models import Volunteer, Participation
+from .status import refresh_statuses
+from studies.models import Study
+
+
+# Mantienen Volunteer.computed_status al día cuando cambian sus participaciones o estudios
+
+def deleted_in_cascade(origin):
+    """True si el borrado viene de otro modelo (un Study o Volunteer que arrastra sus participaciones)."""
+    if origin is None:
+        return False
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return model is not Participation
+
+
+@receiver([post_save, post_delete], sender=Participation)
+def refresh_volunteer_on_participation_change(sender, instance, origin=None, **kwargs):
+    # En cascada no se recalcula fila por fila: el borrado del estudio lo hace una sola vez
+    # y el del voluntario no lo necesita.
+    if deleted_in_cascade(origin):
+        return
+    refresh_statuses([instance.volunteer_id])
+
+
+@receiver(post_save, sender=Study)
+def refresh_volunteers_on_study_change(sender, instance, **kwargs):
+    refresh_statuses(
+        Volunteer.objects.filter(pk__in=Participation.objects.filter(study=instance).values('volunteer_id'))
+    )
+
+
+@receiver(pre_delete, sender=Study)
+def collect_volunteers_of_deleted_study(sender, instance, **kwargs):
+    # Después del borrado ya no hay participaciones de dónde sacar a los voluntarios
+    instance._volunteer_ids = list(Participation.objects.filter(study=instance).values_list('volunteer_id', flat=True))
+
+
+@receiver(post_delete, sender=Study)
+def refresh_volunteers_on_study_delete(sender, instance, **kwargs):
+    refresh_statuses(getattr(instance, '_volunteer_ids', []))
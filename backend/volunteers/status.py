@@ -0,0 +1,123 @@
+from datetime import date, timedelta
+from django.db.models import Exists, OuterRef, Prefetch, Q, QuerySet
+from django.utils import timezone
+
+# Reglas del estatus mostrado (antes vivían en VolunteerSerializer.get_status)
+WASHOUT_DAYS = 90
+MAX_ELIGIBLE_AGE = 55
+
+# Estatus administrativos que se respetan como último recurso
+MANUAL_FALLBACK = ('waiting_approval', 'eligible', 'rejected')
+
+# Lo que escribe refresh_statuses; updated_at va explícito porque bulk_update no lo actualiza
+STATUS_FIELDS = ['computed_status', 'washout_until', 'updated_at']
+
+
+def age_on(birth_date, today):
+    if not birth_date:
+        return None
+    return today.year - birth_date.year - ((today.month, today.day) < (birth_date.month, birth_date.day))
+
+
+def years_before(today, years):
+    try:
+        return today.replace(year=today.year - years)
+    except ValueError:  # 29 de febrero
+        return today.replace(year=today.year - years, day=28)
+
+
+def compute_status(volunteer, participations, today=None):
+    """
+    Calcula (computed_status, washout_until) a partir de los campos del voluntario
+    y sus participaciones (con el estudio ya cargado). No hace consultas.
+    """
+    today = today or date.today()
+    studies = [p.study for p in sorted(participations, key=lambda p: p.id)]
+
+    payment_dates = [s.payment_date for s in studies if s.payment_date]
+    washout_until = max(payment_dates) + timedelta(days=WASHOUT_DAYS) if payment_dates else None
+
+    # 1. PRIORIDAD MÁXIMA: En estudio activo
+    active = next((s for s in studies if s.is_active), None)
+    if active:
+        if active.admission_date and active.admission_date > today:
+            return 'study_assigned', washout_until
+        return 'in_study', washout_until
+
+    # 2. VALIDACIÓN DE EDAD (Mayor a 55 años)
+    age = age_on(volunteer.birth_date, today)
+    if age is not None and age > MAX_ELIGIBLE_AGE:
+        return 'age_mismatch', washout_until
+
+    # 3. PERIODO DE LAVADO: 90 días después del último pago
+    if washout_until:
+        if today < washout_until:
+            return 'standby', washout_until
+        # Pasa a Apto automáticamente, salvo que haya sido rechazado manualmente
+        elif volunteer.manual_status != 'rejected':
+            return 'eligible', washout_until
+
+    # 4. Estatus Administrativo Manual (Fallback)
+    if volunteer.manual_status in MANUAL_FALLBACK:
+        return volunteer.manual_status, washout_until
+    return 'waiting_approval', washout_until
+
+
+def refresh_statuses(volunteers, today=None, batch_size=1000):
+    """
+    Recalcula y guarda el estatus de los voluntarios indicados (queryset o lista de ids).
+    Solo escribe las filas que cambiaron, con bulk_update. Devuelve cuántas cambiaron.
+    """
+    from .models import Volunteer, Participation
+
+    if not isinstance(volunteers, QuerySet):
+        volunteers = Volunteer.objects.filter(pk__in=list(volunteers))
+
+    queryset = volunteers.only(
+        'id', 'birth_date', 'manual_status', 'computed_status', 'washout_until'
+    ).prefetch_related(
+        Prefetch('participations', queryset=Participation.objects.select_related('study'))
+    ).order_by('pk')
+
+    changed = []
+    total = 0
+    for volunteer in queryset.iterator(chunk_size=batch_size):
+        new_status, washout_until = compute_status(volunteer, volunteer.participations.all(), today)
+        if (new_status, washout_until) != (volunteer.computed_status, volunteer.washout_until):
+            volunteer.computed_status = new_status
+            volunteer.washout_until = washout_until
+            volunteer.updated_at = timezone.now()
+            changed.append(volunteer)
+        if len(changed) >= batch_size:
+            Volunteer.objects.bulk_update(changed, STATUS_FIELDS)
+            total += len(changed)
+            changed = []
+
+    if changed:
+        Volunteer.objects.bulk_update(changed, STATUS_FIELDS)
+        total += len(changed)
+
+    # Se llama después de cada inscripción o importación masiva: los conteos por estudio cambian
+    from studies.cache import invalidate_stats
+    invalidate_stats()
+    return total
+
+
+def date_driven_candidates(today=None):
+    """
+    Voluntarios cuyo estatus puede cambiar solo por el paso del tiempo, más los que siguen
+    "En estudio" sin ningún estudio activo (p. ej. si un cierre de estudios se interrumpió).
+    """
+    from .models import Volunteer, Participation
+
+    today = today or date.today()
+    # Cumplen más de 55 años: nacidos en o antes de hoy hace 56 años
+    too_old = years_before(today, MAX_ELIGIBLE_AGE + 1)
+    active = Participation.objects.filter(volunteer=OuterRef('pk'), study__is_active=True)
+
+    return Volunteer.objects.filter(
+        Q(computed_status='standby', washout_until__lte=today)
+        | Q(computed_status='study_assigned')
+        | (Q(computed_status='in_study') & ~Exists(active))
+        | (Q(birth_date__lte=too_old) & ~Q(computed_status__in=['age_mismatch', 'in_study', 'study_assigned']))
+    )
@@ -1,3 +1,771 @@
-from django.test import TestCase
+from datetime import date, timedelta
+import csv
+import os
+import tempfile
+from unittest import mock
+from io import BytesIO, StringIO
 
-# Create your tests here.
+import pandas as pd
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from studies.models import Study
+from auditing.models import AuditLog
+from .models import Volunteer, Participation, VolunteerCodeSequence, DuplicatePair, ImportJob
+from .jobs import claim_next_job, fail_stale_jobs
+from .duplicates import phonetic_key, jaro_winkler
+from .readers import SpreadsheetReader
+from .status import refresh_statuses
+
+
+class VolunteerListQueryCountTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='recepcion', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.active_study = Study.objects.create(name='Estudio Activo')
+        self.finished_study = Study.objects.create(
+            name='Estudio Terminado',
+            payment_date=date.today() - timedelta(days=30),
+            is_active=False,
+        )
+
+    def _create_volunteers(self, n, offset=0):
+        for i in range(offset, offset + n):
+            volunteer = Volunteer.objects.create(first_name=f'Nombre{i}', last_name_paternal='Paterno')
+            Participation.objects.create(volunteer=volunteer, study=self.finished_study)
+            if i % 2:
+                Participation.objects.create(volunteer=volunteer, study=self.active_study)
+
+    def test_list_query_count_is_constant(self):
+        # 1 query para voluntarios + 1 para participaciones (con su estudio)
+        self._create_volunteers(2)
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/volunteers/')
+        self.assertEqual(response.status_code, 200)
+
+        self._create_volunteers(10, offset=2)
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/volunteers/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_computed_fields_from_prefetched_data(self):
+        self._create_volunteers(2)
+        rows = {row['first_name']: row for row in self.client.get('/api/volunteers/').data['results']}
+
+        self.assertEqual(rows['Nombre1']['status'], 'En estudio')
+        self.assertEqual(rows['Nombre1']['active_study'], 'Estudio Activo')
+        self.assertEqual(rows['Nombre1']['last_study'], 'Estudio Activo')
+
+        self.assertEqual(rows['Nombre0']['status'], 'En espera (Descanso)')
+        self.assertIsNone(rows['Nombre0']['active_study'])
+        self.assertEqual(rows['Nombre0']['last_study'], 'Estudio Terminado')
+        self.assertEqual(rows['Nombre1']['study_names'], ['Estudio Terminado', 'Estudio Activo'])
+
+
+class VolunteerPaginationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='recepcion', password='x'))
+        self.study = Study.objects.create(name='Estudio Activo')
+        for i in range(5):
+            volunteer = Volunteer.objects.create(first_name=f'Nombre{i}', last_name_paternal='Paterno')
+            Participation.objects.create(volunteer=volunteer, study=self.study)
+
+    def test_cursor_walks_all_rows_without_duplicates(self):
+        seen = []
+        url = '/api/volunteers/?page_size=2'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            seen.extend(row['id'] for row in response.data['results'])
+            url = response.data['next']
+
+        expected = list(Volunteer.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_cursor_walks_every_ordering_with_null_birth_dates(self):
+        Volunteer.objects.filter(first_name__in=['Nombre1', 'Nombre3']).update(birth_date=None)
+        Volunteer.objects.exclude(first_name__in=['Nombre1', 'Nombre3']).update(birth_date=date(1990, 1, 1))
+        expected = {
+            'created_at': ('created_at', 'id'), '-created_at': ('-created_at', '-id'),
+            'code': ('code', 'id'), '-code': ('-code', '-id'),
+            # birth_date no es un orden permitido: se usa el de siempre
+            'birth_date': ('-created_at', '-id'), '-birth_date': ('-created_at', '-id'),
+        }
+        for ordering, order_by in expected.items():
+            seen, url = [], f'/api/volunteers/?page_size=2&ordering={ordering}'
+            while url:
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200, ordering)
+                seen.extend(row['id'] for row in response.data['results'])
+                url = response.data['next']
+            self.assertEqual(seen, list(Volunteer.objects.order_by(*order_by).values_list('id', flat=True)), ordering)
+
+    def test_ranked_search_is_paginated_by_offset(self):
+        # En PostgreSQL ?search= anota search_rank; aquí se simula con una similitud fija
+        from django.db.models import FloatField, Value
+        from rest_framework.request import Request
+        from rest_framework.test import APIRequestFactory
+        from .pagination import VolunteerCursorPagination
+
+        queryset = Volunteer.objects.annotate(search_rank=Value(0.5, output_field=FloatField())) \
+            .order_by('-search_rank', '-created_at', '-id')
+        seen, previous, url = [], [], '/api/volunteers/?search=nombre&page_size=2'
+        while url:
+            paginator = VolunteerCursorPagination()
+            request = Request(APIRequestFactory().get(url))
+            seen.extend(v.id for v in paginator.paginate_queryset(queryset, request))
+            data = paginator.get_paginated_response([]).data
+            previous.append(data['previous'])
+            url = data['next']
+
+        self.assertEqual(seen, list(queryset.values_list('id', flat=True)))
+        self.assertEqual(len(seen), 5)
+        self.assertIsNone(previous[0])
+        self.assertIn('offset=2', previous[-1])
+        self.assertIn('search=nombre', previous[-1])
+
+    def test_list_is_compact_and_retrieve_is_full(self):
+        volunteer = Volunteer.objects.first()
+        row = self.client.get('/api/volunteers/').data['results'][0]
+        self.assertNotIn('participations', row)
+
+        detail = self.client.get(f'/api/volunteers/{volunteer.id}/').data
+        self.assertEqual(len(detail['participations']), 1)
+
+
+class VolunteerCodeSequenceTests(TestCase):
+    def test_codes_are_consecutive_per_year(self):
+        year = date.today().year
+        first = Volunteer.objects.create(first_name='Francisca', last_name_paternal='Gallegos', last_name_maternal='García')
+        second = Volunteer.objects.create(first_name='Juan', last_name_paternal='Pérez')
+        self.assertEqual(first.code, f'FGG-{year}-0001')
+        self.assertEqual(second.code, f'JPX-{year}-0002')
+
+    def test_reserve_claims_a_block(self):
+        self.assertEqual(VolunteerCodeSequence.reserve(2030, count=100), 1)
+        self.assertEqual(VolunteerCodeSequence.reserve(2030), 101)
+
+    def test_counter_continues_after_imported_codes(self):
+        year = date.today().year
+        Volunteer.objects.create(code=f'ABC-{year}-0338', first_name='Ana', last_name_paternal='Beltrán')
+        volunteer = Volunteer.objects.create(first_name='Juan', last_name_paternal='Pérez')
+        self.assertEqual(volunteer.code, f'JPX-{year}-0339')
+
+    def test_counter_is_seeded_from_existing_codes(self):
+        Volunteer.objects.bulk_create([Volunteer(code='ABC-2031-0041', first_name='Ana', last_name_paternal='Beltrán')])
+        self.assertEqual(VolunteerCodeSequence.reserve(2031), 42)
+
+
+def make_excel(rows):
+    buffer = BytesIO()
+    pd.DataFrame(rows).to_excel(buffer, index=False)
+    return SimpleUploadedFile(
+        'voluntarios.xlsx', buffer.getvalue(),
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    )
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class VolunteerImportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='admin', password='x', is_staff=True))
+        self.study = Study.objects.create(name='Estudio A')
+        Volunteer.objects.create(first_name='Ya', last_name_paternal='Existe', curp='EXIS900101HDFRRR01', code='YEX-2020-0001')
+
+    def _upload(self, rows):
+        # Encola el archivo, corre el worker y devuelve el estado final del trabajo
+        response = self.client.post('/api/volunteers/import/', {'file': make_excel(rows)}, format='multipart')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['status'], 'pending')
+
+        call_command('run_import_worker', '--once', stdout=StringIO())
+        return self.client.get(f"/api/volunteers/import/{response.data['id']}/")
+
+    def test_import_reports_errors_per_row(self):
+        rows = [
+            {'Nombre': 'Ana', 'Apellido Paterno': 'López', 'CURP': 'lopa900101mdfrrr01', 'Sexo': 'Mujer', 'Estudios': 'estudio a, Inexistente'},
+            {'Nombre': 'Luis', 'Apellido Paterno': 'Ruiz', 'CURP': '', 'Sexo': 'H'},
+            {'Nombre': 'Eva', 'Apellido Paterno': 'Díaz', 'CURP': 'CORTA', 'Sexo': 'M'},
+            {'Nombre': 'Eva', 'Apellido Paterno': 'Díaz', 'CURP': 'EXIS900101HDFRRR01', 'Sexo': 'M'},
+            {'Nombre': '', 'Apellido Paterno': 'Díaz', 'CURP': 'DIAE900101MDFRRR01', 'Sexo': 'M'},
+            {'Nombre': 'Ana', 'Apellido Paterno': 'López', 'CURP': 'LOPA900101MDFRRR01', 'Sexo': 'M'},
+            {'Nombre': 'Raúl', 'Apellido Paterno': 'Soto', 'CURP': 'SOTR900101HDFRRR01', 'Codigo': 'YEX-2020-0001'},
+        ]
+        response = self._upload(rows)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['status'], 'done')
+        self.assertEqual(response.data['processed'], 7)
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(response.data['errors'], [
+            "Fila 3: La CURP es obligatoria.",
+            "Fila 4: La CURP 'CORTA' debe tener 18 caracteres.",
+            "Fila 5: La CURP 'EXIS900101HDFRRR01' ya está registrada.",
+            "Fila 6: Falta Nombre o Apellido Paterno.",
+            "Fila 7: La CURP 'LOPA900101MDFRRR01' ya está registrada.",
+            "Fila 8: El código 'YEX-2020-0001' ya existe.",
+        ])
+
+        volunteer = Volunteer.objects.get(curp='LOPA900101MDFRRR01')
+        self.assertEqual(volunteer.sex, 'F')
+        self.assertEqual(volunteer.code, f'ALX-{date.today().year}-0001')
+        self.assertEqual(list(volunteer.participations.values_list('study__name', flat=True)), ['Estudio A'])
+
+    def test_import_query_count_does_not_grow_with_rows(self):
+        def rows(n, offset):
+            return [
+                {'Nombre': f'Nombre{i}', 'Apellido Paterno': 'Paterno', 'CURP': f'PAPN9001{i:02d}HDFRRR01', 'Estudios': 'Estudio A'}
+                for i in range(offset, offset + n)
+            ]
+
+        # La primera carga del año crea el contador de códigos; la descartamos
+        self._upload(rows(1, 0))
+
+        with CaptureQueriesContext(connection) as few:
+            self.assertEqual(self._upload(rows(5, 1)).data['created'], 5)
+        with CaptureQueriesContext(connection) as many:
+            self.assertEqual(self._upload(rows(50, 6)).data['created'], 50)
+
+        self.assertEqual(len(few), len(many))
+        self.assertEqual(Participation.objects.filter(study=self.study).count(), 56)
+
+    def test_invalid_file_marks_job_as_failed(self):
+        upload = SimpleUploadedFile('voluntarios.xlsx', b'no es un excel')
+        job_id = self.client.post('/api/volunteers/import/', {'file': upload}, format='multipart').data['id']
+        call_command('run_import_worker', '--once', stdout=StringIO())
+
+        response = self.client.get(f'/api/volunteers/import/{job_id}/')
+        self.assertEqual(response.data['status'], 'failed')
+        self.assertEqual(response.data['error_message'], "El archivo no es un Excel válido (.xlsx).")
+
+    def test_csv_is_imported_with_same_column_aliases(self):
+        csv = "nombre,apellido paterno,curp,sexo\nAna,López,LOPA900101MDFRRR01,M\nLuis,,RUIL900101HDFRRR01,H\n"
+        upload = SimpleUploadedFile('voluntarios.csv', csv.encode('utf-8'), content_type='text/csv')
+        job_id = self.client.post('/api/volunteers/import/', {'file': upload}, format='multipart').data['id']
+        call_command('run_import_worker', '--once', stdout=StringIO())
+
+        response = self.client.get(f'/api/volunteers/import/{job_id}/')
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(response.data['errors'], ["Fila 3: Falta Nombre o Apellido Paterno."])
+
+    def test_file_is_removed_when_job_finishes(self):
+        job_id = self.client.post('/api/volunteers/import/', {'file': make_excel([{'Nombre': 'A'}])}, format='multipart').data['id']
+        path = ImportJob.objects.get(pk=job_id).file.path
+        self.assertTrue(os.path.exists(path))
+
+        call_command('run_import_worker', '--once', stdout=StringIO())
+        job = ImportJob.objects.get(pk=job_id)
+        self.assertEqual(job.status, 'done')
+        self.assertFalse(job.file)
+        self.assertFalse(os.path.exists(path))
+
+    @override_settings(IMPORT_JOB_STALE_SECONDS=60)
+    def test_stale_running_job_is_failed(self):
+        job_id = self.client.post('/api/volunteers/import/', {'file': make_excel([{'Nombre': 'A'}])}, format='multipart').data['id']
+        job = claim_next_job()
+        path = job.file.path
+
+        # Con avance reciente sigue corriendo
+        self.assertEqual(fail_stale_jobs(), 0)
+        # El worker murió: no hay avance desde hace más de un minuto
+        ImportJob.objects.filter(pk=job_id).update(heartbeat_at=timezone.now() - timedelta(minutes=5))
+        out = StringIO()
+        call_command('run_import_worker', '--once', stdout=out)
+        self.assertIn('1 importaciones sin avance', out.getvalue())
+
+        job = ImportJob.objects.get(pk=job_id)
+        self.assertEqual(job.status, 'failed')
+        self.assertIn('se interrumpió', job.error_message)
+        self.assertIsNotNone(job.finished_at)
+        self.assertFalse(os.path.exists(path))
+
+    def test_unsupported_extension_is_rejected(self):
+        upload = SimpleUploadedFile('voluntarios.pdf', b'%PDF')
+        response = self.client.post('/api/volunteers/import/', {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 400)
+
+
+class SpreadsheetReaderTests(TestCase):
+    def test_xlsx_batches_keep_excel_row_numbers(self):
+        rows = [{'Nombre': f'N{i}', 'CURP': f'C{i}'} for i in range(5)]
+        rows.insert(2, {'Nombre': None, 'CURP': None})  # fila vacía en medio
+        batches = list(SpreadsheetReader(make_excel(rows), 'voluntarios.xlsx', batch_size=2))
+
+        self.assertEqual([start for start, _ in batches], [2, 5, 7])
+        self.assertEqual(batches[1][1]['first_name'].tolist(), ['N2', 'N3'])
+        self.assertIn('last_name_paternal', batches[0][1].columns)
+
+
+class ImportExcelCommandTests(TestCase):
+    def _run(self, rows, *args):
+        path = os.path.join(tempfile.mkdtemp(), 'historico.csv')
+        pd.DataFrame(rows).to_csv(path, index=False)
+        out = StringIO()
+        call_command('import_excel', path, *args, stdout=out)
+        return out.getvalue()
+
+    def test_upserts_by_curp_and_creates_studies_once(self):
+        rows = [
+            {'Nombre': 'Ana María López Díaz', 'CURP': 'LOPA900101MDFRRR01', 'Sexo': 'F', 'Estudio': 'Histórico 1', 'Fecha Pago': '2020-05-01'},
+            {'Nombre': 'Luis Ruiz', 'CURP': 'RUIL900101HDFRRR01', 'Sexo': 'H', 'Estudio': 'Histórico 1', 'Fecha Pago': '2020-05-01'},
+        ]
+        output = self._run(rows, '--chunk-size', '1')
+        self.assertIn('Creados: 2, Actualizados: 0, Participaciones: 2', output)
+        self.assertIn('filas/s', output)
+
+        rows[0]['Nombre'] = 'Ana López Díaz'
+        output = self._run(rows)
+        self.assertIn('Creados: 0, Actualizados: 2, Participaciones: 0', output)
+
+        ana = Volunteer.objects.get(curp='LOPA900101MDFRRR01')
+        self.assertEqual((ana.first_name, ana.middle_name, ana.last_name_paternal), ('Ana', '', 'López'))
+        self.assertTrue(ana.code.startswith('ALD-'))
+        self.assertEqual(Volunteer.objects.get(curp='RUIL900101HDFRRR01').sex, 'M')
+
+        study = Study.objects.get(name='Histórico 1')
+        self.assertEqual(study.payment_date, date(2020, 5, 1))
+        self.assertFalse(study.is_active)
+        self.assertEqual(Participation.objects.filter(study=study).count(), 2)
+
+    def test_sex_is_normalized_like_the_api_importer(self):
+        from .importer import VolunteerImporter
+
+        labels = ['Mujer', 'Hombre', 'M', 'H', 'F', '', 'X']
+        rows = [
+            {'Nombre': 'Ana', 'Apellido Paterno': 'Prueba', 'CURP': f'PRUA9001{i:02d}HDFRRR01', 'Sexo': label}
+            for i, label in enumerate(labels)
+        ]
+        self._run(rows)
+        historic = dict(Volunteer.objects.values_list('curp', 'sex'))
+        self.assertEqual([historic[row['CURP']] for row in rows], ['F', 'M', 'F', 'M', 'F', None, None])
+
+        # El importador de la API con las mismas filas guarda lo mismo
+        Volunteer.objects.all().delete()
+        VolunteerImporter().import_batches(SpreadsheetReader(make_excel(rows), 'voluntarios.xlsx'))
+        self.assertEqual(dict(Volunteer.objects.values_list('curp', 'sex')), historic)
+
+
+class ComputedStatusTests(TestCase):
+    def setUp(self):
+        self.volunteer = Volunteer.objects.create(first_name='Ana', last_name_paternal='López', manual_status='eligible')
+
+    def test_status_follows_participation_and_study_changes(self):
+        self.assertEqual(self.volunteer.computed_status, 'eligible')
+
+        study = Study.objects.create(name='Estudio', admission_date=date.today() + timedelta(days=7))
+        participation = Participation.objects.create(volunteer=self.volunteer, study=study)
+        self.volunteer.refresh_from_db()
+        self.assertEqual(self.volunteer.computed_status, 'study_assigned')
+
+        study.payment_date = date.today() - timedelta(days=10)
+        study.is_active = False
+        study.save()
+        self.volunteer.refresh_from_db()
+        self.assertEqual(self.volunteer.computed_status, 'standby')
+        self.assertEqual(self.volunteer.washout_until, study.payment_date + timedelta(days=90))
+
+        participation.delete()
+        self.volunteer.refresh_from_db()
+        self.assertEqual((self.volunteer.computed_status, self.volunteer.washout_until), ('eligible', None))
+
+    def test_cascaded_deletes_refresh_once(self):
+        study = Study.objects.create(name='Estudio')
+        volunteers = [self.volunteer] + [
+            Volunteer.objects.create(first_name=f'Nombre{i}', last_name_paternal='Paterno') for i in range(3)
+        ]
+        for volunteer in volunteers:
+            Participation.objects.create(volunteer=volunteer, study=study)
+        self.assertEqual(Volunteer.objects.filter(computed_status='in_study').count(), 4)
+
+        with mock.patch('volunteers.signals.refresh_statuses', wraps=refresh_statuses) as refresh:
+            study.delete()
+        self.assertEqual(refresh.call_count, 1)
+        self.assertEqual(sorted(refresh.call_args.args[0]), sorted(v.pk for v in volunteers))
+        self.assertFalse(Volunteer.objects.filter(computed_status='in_study').exists())
+
+        other = Study.objects.create(name='Otro estudio')
+        Participation.objects.create(volunteer=volunteers[1], study=other)
+        with mock.patch('volunteers.signals.refresh_statuses') as refresh:
+            volunteers[1].delete()
+        refresh.assert_not_called()
+
+    def test_refresh_bumps_updated_at(self):
+        # Los respaldos incrementales toman las filas por updated_at
+        before = timezone.now() - timedelta(days=1)
+        Volunteer.objects.filter(pk=self.volunteer.pk).update(updated_at=before)
+        study = Study.objects.create(name='Estudio')
+        Participation.objects.bulk_create([Participation(volunteer=self.volunteer, study=study)])
+        self.assertEqual(refresh_statuses([self.volunteer.pk]), 1)
+        self.volunteer.refresh_from_db()
+        self.assertEqual(self.volunteer.computed_status, 'in_study')
+        self.assertGreater(self.volunteer.updated_at, before)
+
+    def test_daily_command_applies_date_driven_transitions(self):
+        study = Study.objects.create(name='Estudio', payment_date=date.today() - timedelta(days=30), is_active=False)
+        Participation.objects.create(volunteer=self.volunteer, study=study)
+        self.volunteer.refresh_from_db()
+        self.assertEqual(self.volunteer.computed_status, 'standby')
+
+        # Simulamos el paso del tiempo sin disparar señales
+        paid = date.today() - timedelta(days=100)
+        Study.objects.filter(pk=study.pk).update(payment_date=paid)
+        Volunteer.objects.filter(pk=self.volunteer.pk).update(washout_until=paid + timedelta(days=90))
+        old = Volunteer.objects.create(first_name='Luis', last_name_paternal='Ruiz', birth_date=date(1990, 1, 1))
+        Volunteer.objects.filter(pk=old.pk).update(birth_date=date(1950, 1, 1))
+
+        out = StringIO()
+        call_command('refresh_volunteer_status', stdout=out)
+        self.assertIn('Cambiaron: 2', out.getvalue())
+
+        self.volunteer.refresh_from_db()
+        old.refresh_from_db()
+        self.assertEqual(self.volunteer.computed_status, 'eligible')
+        self.assertEqual(old.computed_status, 'age_mismatch')
+        self.assertEqual(Volunteer.objects.filter(computed_status='eligible').count(), 1)
+
+
+class VolunteerFilterTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='recepcion', password='x'))
+        self.study = Study.objects.create(name='Estudio Activo')
+
+        today = date.today()
+        self.young = Volunteer.objects.create(first_name='Ana', last_name_paternal='López', sex='F',
+                                              birth_date=today.replace(year=today.year - 25), manual_status='eligible')
+        self.adult = Volunteer.objects.create(first_name='Luis', last_name_paternal='Ruiz', sex='M',
+                                              birth_date=today.replace(year=today.year - 40))
+        self.old = Volunteer.objects.create(first_name='Eva', last_name_paternal='Díaz', sex='F',
+                                            birth_date=today.replace(year=today.year - 60))
+        Participation.objects.create(volunteer=self.adult, study=self.study)
+
+    def _ids(self, query):
+        response = self.client.get(f'/api/volunteers/?{query}')
+        self.assertEqual(response.status_code, 200, response.data)
+        return {row['id'] for row in response.data['results']}
+
+    def test_filters(self):
+        self.assertEqual(self._ids('status=eligible'), {self.young.id})
+        self.assertEqual(self._ids('status=in_study,age_mismatch'), {self.adult.id, self.old.id})
+        self.assertEqual(self._ids(f'study={self.study.id}'), {self.adult.id})
+        self.assertEqual(self._ids('sex=f'), {self.young.id, self.old.id})
+        self.assertEqual(self._ids('age_min=25&age_max=40'), {self.young.id, self.adult.id})
+        self.assertEqual(self._ids('age_min=41'), {self.old.id})
+        self.assertEqual(self._ids(f'created_after={date.today()}'), {self.young.id, self.adult.id, self.old.id})
+        self.assertEqual(self._ids(f'created_before={date.today()}'), set())
+
+    def test_invalid_filters_return_400(self):
+        for query in ['status=nope', 'sex=X', 'age_min=abc', 'created_after=2026-13-01', 'study=x']:
+            self.assertEqual(self.client.get(f'/api/volunteers/?{query}').status_code, 400, query)
+
+    def test_status_counts(self):
+        counts = self.client.get('/api/volunteers/status-counts/').data
+        self.assertEqual(counts['eligible'], 1)
+        self.assertEqual(counts['in_study'], 1)
+        self.assertEqual(counts['age_mismatch'], 1)
+        self.assertEqual(counts['rejected'], 0)
+
+
+class VolunteerSearchTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='recepcion', password='x'))
+        self.garcia = Volunteer.objects.create(first_name='María', middle_name='José', last_name_paternal='García',
+                                               last_name_maternal='López', curp='GALM900101MDFRPR01')
+        self.ruiz = Volunteer.objects.create(first_name='Luis', last_name_paternal='Ruiz', last_name_maternal='Peña')
+
+    def _ids(self, term):
+        response = self.client.get('/api/volunteers/', {'search': term})
+        self.assertEqual(response.status_code, 200, response.data)
+        return [row['id'] for row in response.data['results']]
+
+    def test_search_text_is_normalized(self):
+        self.assertEqual(self.garcia.search_text, f'maria jose garcia lopez {self.garcia.code.lower()} galm900101mdfrpr01')
+
+    def test_search_ignores_accents_and_case(self):
+        self.assertEqual(self._ids('Garcia'), [self.garcia.id])
+        self.assertEqual(self._ids('PEÑA'), [self.ruiz.id])
+        self.assertEqual(self._ids('pena'), [self.ruiz.id])
+
+    def test_every_word_must_match(self):
+        self.assertEqual(self._ids('maria lopez'), [self.garcia.id])
+        self.assertEqual(self._ids('maria ruiz'), [])
+
+    def test_search_by_code_and_curp(self):
+        self.assertEqual(self._ids(self.ruiz.code), [self.ruiz.id])
+        self.assertEqual(self._ids('galm9001'), [self.garcia.id])
+
+    def test_search_text_follows_updates(self):
+        self.ruiz.last_name_paternal = 'Núñez'
+        self.ruiz.save(update_fields=['last_name_paternal'])
+        self.assertEqual(self._ids('nunez'), [self.ruiz.id])
+
+
+class VolunteerExportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='recepcion', password='x'))
+        study = Study.objects.create(name='Estudio A')
+        for i in range(5):
+            volunteer = Volunteer.objects.create(first_name=f'Ana{i}', last_name_paternal='López',
+                                                 sex='F' if i % 2 else 'M', curp=f'LOPA90010{i}MDFRRR01')
+            Participation.objects.create(volunteer=volunteer, study=study)
+
+    def _content(self, query):
+        response = self.client.get(f'/api/volunteers/export/?{query}')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content)
+
+    def test_csv_uses_list_filters(self):
+        content = self._content('format=csv&sex=f').decode('utf-8-sig')
+        rows = list(csv.reader(StringIO(content)))
+        self.assertEqual(rows[0][:3], ['Codigo', 'CURP', 'Nombre'])
+        self.assertEqual(sorted(row[2] for row in rows[1:]), ['Ana1', 'Ana3'])
+        self.assertEqual({row[6] for row in rows[1:]}, {'Mujer'})
+        self.assertEqual({row[12] for row in rows[1:]}, {'Estudio A'})
+
+    def test_xlsx_can_be_imported_back(self):
+        content = self._content('format=xlsx')
+        df = pd.read_excel(BytesIO(content))
+        self.assertEqual(len(df), 5)
+        self.assertEqual(set(df['Sexo']), {'Hombre', 'Mujer'})
+
+    def test_queries_do_not_grow_with_rows(self):
+        # Voluntarios + participaciones del bloque, sin consultas por fila
+        with self.assertNumQueries(2):
+            self._content('format=csv')
+
+    def test_unknown_format(self):
+        self.assertEqual(self.client.get('/api/volunteers/export/?format=pdf').status_code, 404)
+
+
+class DuplicateDetectionTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username='admin', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+        birth = date(1990, 5, 17)
+        self.original = Volunteer.objects.create(first_name='Juan', last_name_paternal='Hernández', last_name_maternal='Vázquez',
+                                                 birth_date=birth, curp='HEVJ900517HDFRZN01')
+        # Mismo voluntario capturado otra vez con errores y sin CURP
+        self.typo = Volunteer.objects.create(first_name='Juan', last_name_paternal='Ernandez', last_name_maternal='Basquez',
+                                             birth_date=birth)
+        # Misma CURP salvo la homoclave y nombre con error
+        self.curp_twin = Volunteer.objects.create(first_name='Jaun', last_name_paternal='Hernandez', last_name_maternal='Vazquez',
+                                                  birth_date=birth, curp='HEVJ900517HDFRZN09')
+        self.other = Volunteer.objects.create(first_name='Juan', last_name_paternal='Hernández', last_name_maternal='Ruiz',
+                                              birth_date=date(1985, 1, 2))
+
+    def test_phonetic_key_and_similarity(self):
+        self.assertEqual(phonetic_key('Hernández'), phonetic_key('Ernandes'))
+        self.assertEqual(phonetic_key('Vázquez'), phonetic_key('Basquez'))
+        self.assertNotEqual(phonetic_key('Guerra'), phonetic_key('Herrera'))
+        self.assertEqual(jaro_winkler('juan', 'juan'), 1.0)
+        self.assertGreater(jaro_winkler('martha', 'marhta'), 0.95)
+        self.assertLess(jaro_winkler('lopez', 'ruiz'), 0.6)
+
+    def test_command_groups_duplicates(self):
+        out = StringIO()
+        call_command('find_duplicates', stdout=out)
+        self.assertIn('en 1 grupos', out.getvalue())
+
+        clusters = set(DuplicatePair.objects.values_list('cluster', flat=True))
+        self.assertEqual(clusters, {self.original.id})
+        members = set()
+        for a, b in DuplicatePair.objects.values_list('volunteer_a_id', 'volunteer_b_id'):
+            members.update([a, b])
+        self.assertEqual(members, {self.original.id, self.typo.id, self.curp_twin.id})
+
+    def test_dry_run_does_not_save(self):
+        call_command('find_duplicates', '--dry-run', stdout=StringIO())
+        self.assertFalse(DuplicatePair.objects.exists())
+
+    def test_endpoint_lists_clusters(self):
+        call_command('find_duplicates', stdout=StringIO())
+        response = self.client.get('/api/volunteers/duplicates/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 1)
+        cluster = response.data[0]
+        self.assertEqual([v['id'] for v in cluster['volunteers']], [self.original.id, self.typo.id, self.curp_twin.id])
+        self.assertTrue(all(p['score'] <= cluster['score'] for p in cluster['pairs']))
+
+        self.assertEqual(self.client.get('/api/volunteers/duplicates/?min_score=1.1').data, [])
+        self.assertEqual(self.client.get('/api/volunteers/duplicates/?min_score=x').status_code, 400)
+
+        self.client.force_authenticate(User.objects.create_user(username='recepcion', password='x'))
+        self.assertEqual(self.client.get('/api/volunteers/duplicates/').status_code, 403)
+
+
+class StudyEnrollmentTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_superuser(username='admin', password='x'))
+        today = date.today()
+        self.study = Study.objects.create(name='Cohorte', admission_date=today + timedelta(days=10))
+        self.other_active = Study.objects.create(name='Otro Activo')
+        recent = Study.objects.create(name='Reciente', payment_date=today - timedelta(days=30), is_active=False)
+
+        def volunteer(name, **kwargs):
+            kwargs.setdefault('birth_date', today.replace(year=today.year - 30))
+            return Volunteer.objects.create(first_name=name, last_name_paternal='Prueba', **kwargs)
+
+        self.eligible = volunteer('Apto', sex='F', manual_status='eligible')
+        self.eligible_m = volunteer('AptoM', sex='M', manual_status='eligible')
+        self.busy = volunteer('Ocupado', sex='F')
+        Participation.objects.create(volunteer=self.busy, study=self.other_active)
+        self.resting = volunteer('Descanso', sex='F')
+        Participation.objects.create(volunteer=self.resting, study=recent)
+        # Cumple 56 antes del internamiento
+        self.old = volunteer('Mayor', sex='F', birth_date=today.replace(year=today.year - 56) + timedelta(days=5))
+        self.rejected = volunteer('Rechazado', sex='F', manual_status='rejected')
+
+    def _assign(self, **data):
+        data.setdefault('study_id', self.study.id)
+        data.setdefault('justification', 'Reclutamiento')
+        return self.client.post('/api/volunteers/bulk-assign/', data, format='json')
+
+    def test_only_eligible_are_enrolled(self):
+        ids = [self.eligible.id, self.busy.id, self.resting.id, self.old.id, self.rejected.id, 999999]
+        # La bitácora se escribe al confirmar la transacción (auditing/writer.py)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self._assign(volunteer_ids=ids)
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data['enrolled'], [self.eligible.id])
+        reasons = {s['id']: s['reason'] for s in response.data['skipped']}
+        self.assertEqual(reasons, {
+            self.busy.id: 'active_study', self.resting.id: 'washout',
+            self.old.id: 'age', self.rejected.id: 'rejected',
+        })
+        self.assertEqual(response.data['not_found'], [999999])
+
+        self.eligible.refresh_from_db()
+        self.assertEqual(self.eligible.computed_status, 'study_assigned')
+        log = AuditLog.objects.get()
+        self.assertEqual(log.model_affected, 'Participation')
+        self.assertEqual(log.changes['enrolled'], [self.eligible.code])
+        self.assertEqual(log.changes['skipped']['washout'], 1)
+
+        # Repetir la asignación no duplica participaciones
+        response = self._assign(volunteer_ids=[self.eligible.id])
+        self.assertEqual(response.data['skipped'][0]['reason'], 'already_enrolled')
+        self.assertEqual(Participation.objects.filter(study=self.study).count(), 1)
+
+    def test_assign_by_filter(self):
+        response = self._assign(filters={'sex': 'M'})
+        self.assertEqual(response.data['enrolled'], [self.eligible_m.id])
+
+        self.assertEqual(self._assign(filters={'color': 'rojo'}).status_code, 400)
+        self.assertEqual(self._assign(volunteer_ids=[1], filters={'sex': 'M'}).status_code, 400)
+        self.assertEqual(self._assign().status_code, 400)
+
+    def test_empty_selection_is_rejected(self):
+        for data in ({'filters': {}}, {'filters': {'sex': '', 'search': '  '}}, {'volunteer_ids': []}):
+            response = self._assign(**data)
+            self.assertEqual(response.status_code, 400, data)
+        self.assertFalse(Participation.objects.filter(study=self.study).exists())
+
+    def test_query_count_does_not_grow_with_cohort(self):
+        def cohort(size, prefix):
+            return [v.id for v in Volunteer.objects.bulk_create([
+                Volunteer(first_name='C', last_name_paternal='P', code=f'{prefix}-{i}') for i in range(size)
+            ])]
+
+        small, large = cohort(5, 'S'), cohort(300, 'L')
+        with CaptureQueriesContext(connection) as small_queries:
+            self.assertEqual(len(self._assign(volunteer_ids=small).data['enrolled']), 5)
+        self.study.refresh_from_db()
+        with CaptureQueriesContext(connection) as large_queries:
+            self.assertEqual(len(self._assign(volunteer_ids=large).data['enrolled']), 300)
+        # SQLite parte los bulk_update grandes por su límite de parámetros; por eso el margen
+        self.assertLessEqual(len(large_queries), len(small_queries) + 2)
+        self.assertLess(len(large_queries), 15)
+
+    def test_inactive_study(self):
+        self.study.is_active = False
+        self.study.save()
+        response = self._assign(volunteer_ids=[self.eligible.id])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['detail'], "El estudio no está vigente.")
+
+    def test_add_participation(self):
+        data = {'study_id': self.study.id, 'justification': 'Alta'}
+        response = self.client.post(f'/api/volunteers/{self.eligible.id}/add-participation/', data, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual([p['study'] for p in response.data['participations']], [self.study.id])
+
+        response = self.client.post(f'/api/volunteers/{self.resting.id}/add-participation/', data, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['detail'], 'Sigue en periodo de lavado.')
+
+    def test_requires_admin(self):
+        self.client.force_authenticate(User.objects.create_user(username='recepcion', password='x'))
+        self.assertEqual(self._assign(volunteer_ids=[self.eligible.id]).status_code, 403)
+
+
+class VolunteerIndexUsageTests(TestCase):
+    """Revisa con EXPLAIN que cada filtro del listado use su índice."""
+
+    def setUp(self):
+        if connection.vendor == 'postgresql':
+            # Con tablas de prueba tan chicas el planeador prefiere un seq scan
+            with connection.cursor() as cursor:
+                cursor.execute('SET enable_seqscan TO off')
+
+    def assertUsesIndex(self, queryset, index_name):
+        self.assertIn(index_name, queryset.explain())
+
+    def test_filters_use_indexes(self):
+        volunteers = Volunteer.objects.order_by('-created_at', '-id')
+        self.assertUsesIndex(volunteers, 'volunteer_created_idx')
+        self.assertUsesIndex(volunteers.filter(computed_status='eligible'), 'volunteer_status_created_idx')
+        self.assertUsesIndex(Volunteer.objects.filter(sex='F', birth_date__lte=date(2000, 1, 1)), 'volunteer_sex_birth_idx')
+        self.assertUsesIndex(Volunteer.objects.filter(birth_date__gt=date(1970, 1, 1)), 'volunteer_birth_idx')
+        self.assertUsesIndex(Participation.objects.filter(study_id=1, volunteer_id=1), 'participation_study_vol_idx')
+
+    def test_search_uses_trigram_index(self):
+        if connection.vendor != 'postgresql':
+            self.skipTest('El índice pg_trgm solo existe en PostgreSQL')
+        self.assertUsesIndex(Volunteer.objects.filter(search_text__contains='garcia'), 'volunteer_search_trgm_idx')
+        self.assertUsesIndex(Volunteer.objects.filter(search_text__trigram_word_similar='garsia'), 'volunteer_search_trgm_idx')
+
+
+class FakeVolunteerTests(TestCase):
+    def test_generate_fake_volunteers(self):
+        from .fake import build_curp, curp_check_digit
+        from .importer import CURP_PATTERN
+
+        # Ejemplo con el dígito verificador oficial
+        self.assertEqual(curp_check_digit('HEGG560427MVZRRL0'), '4')
+        self.assertEqual(
+            build_curp('Enrique', 'González', 'Ñúñez', date(1956, 12, 31), 'M', 'DF', '0')[:17],
+            'GOXE561231HDFNXN0',
+        )
+
+        out = StringIO()
+        call_command('generate_fake_volunteers', 120, studies=5, seed=1, batch_size=50, stdout=out)
+
+        volunteers = list(Volunteer.objects.all())
+        self.assertEqual(len(volunteers), 120)
+        self.assertEqual(len({v.code for v in volunteers}), 120)
+        self.assertEqual(len({v.curp for v in volunteers}), 120)
+        for volunteer in volunteers:
+            self.assertRegex(volunteer.curp, CURP_PATTERN)
+            self.assertEqual(volunteer.curp[-1], curp_check_digit(volunteer.curp[:17]))
+            self.assertEqual(volunteer.curp[10], 'H' if volunteer.sex == 'M' else 'M')
+        self.assertEqual(Study.objects.count(), 5)
+        self.assertTrue(Participation.objects.exists())
+        self.assertEqual(AuditLog.objects.filter(action='CREATE', model_affected='Volunteer').count(), 120)
+        self.assertIn('Voluntarios: 120', out.getvalue())
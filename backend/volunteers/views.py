@@ -1,22 +1,61 @@
-import pandas as pd
-import re
+from datetime import date
+from django.db.models import Prefetch, Count
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
 from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
-from .models import Volunteer, Participation
-from studies.models import Study # Importamos el modelo de Estudios
-from .serializers import VolunteerSerializer, ParticipationSerializer
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from .models import Volunteer, Participation, ImportJob, DuplicatePair
+from .serializers import (
+    VolunteerSerializer, VolunteerListSerializer, ParticipationSerializer, ImportJobSerializer,
+    DuplicateVolunteerSerializer, StudyAssignmentSerializer, BulkAssignmentSerializer,
+)
 from .permissions import IsAdminOrReadOnly
+from .pagination import VolunteerCursorPagination
+from .readers import SUPPORTED_EXTENSIONS
+from .filters import VolunteerFilterBackend, VolunteerSearchFilter, filter_volunteers, search_volunteers
+from .enrollment import enroll, EnrollmentError
+from .export import CSVRenderer, XLSXRenderer, CONTENT_TYPES, export_rows, stream_csv, stream_xlsx
 
 class VolunteerViewSet(viewsets.ModelViewSet):
-    queryset = Volunteer.objects.all().order_by('-created_at')
+    # Cargamos participaciones + estudios en una sola pasada para evitar N+1
+    queryset = Volunteer.objects.all().prefetch_related(
+        Prefetch('participations', queryset=Participation.objects.select_related('study').order_by('id'))
+    ).order_by('-created_at')
     serializer_class = VolunteerSerializer
     permission_classes = [IsAuthenticated, IsAdminOrReadOnly]
+    pagination_class = VolunteerCursorPagination
     
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ['first_name', 'last_name_paternal', 'last_name_maternal', 'code', 'curp']
-    ordering_fields = ['created_at', 'birth_date', 'code']
+    filter_backends = [VolunteerFilterBackend, VolunteerSearchFilter, filters.OrderingFilter]
+    # Solo columnas sin NULL: el cursor guarda la posición de la última fila y un NULL
+    # (p. ej. birth_date) no se puede volver a comparar en la página siguiente.
+    ordering_fields = ['created_at', 'code']
+
+    def get_serializer_class(self):
+        # El listado usa la representación compacta; el detalle completo solo en retrieve
+        if self.action == 'list':
+            return VolunteerListSerializer
+        return super().get_serializer_class()
+
+    @action(detail=False, methods=['GET'], url_path='status-counts')
+    def status_counts(self, request):
+        # Totales por estatus para las pestañas del listado, con los mismos filtros (un solo GROUP BY)
+        queryset = self.filter_queryset(self.get_queryset()).order_by()
+        rows = queryset.values('computed_status').annotate(total=Count('id'))
+        counts = {code: 0 for code, _ in Volunteer.STATUS_CHOICES}
+        counts.update({row['computed_status']: row['total'] for row in rows})
+        return Response(counts)
+
+    @action(detail=False, methods=['GET'], url_path='export', renderer_classes=[CSVRenderer, XLSXRenderer])
+    def export(self, request):
+        # ?format=csv|xlsx con los mismos filtros del listado; las filas se envían mientras se leen
+        export_format = request.query_params.get('format', 'csv')
+        rows = export_rows(self.filter_queryset(self.get_queryset()))
+        content = stream_xlsx(rows) if export_format == 'xlsx' else stream_csv(rows)
+        response = StreamingHttpResponse(content, content_type=CONTENT_TYPES[export_format])
+        response['Content-Disposition'] = f'attachment; filename="voluntarios_{date.today()}.{export_format}"'
+        return response
 
     @action(detail=False, methods=['POST'], url_path='import')
     def import_volunteers(self, request):
@@ -25,124 +64,89 @@ class VolunteerViewSet(viewsets.ModelViewSet):
         if not file:
             return Response({"error": "No se proporcionó ningún archivo."}, status=status.HTTP_400_BAD_REQUEST)
 
+        if not file.name.lower().endswith(SUPPORTED_EXTENSIONS):
+            return Response({"error": "El archivo debe ser un Excel (.xlsx) o CSV."}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Guardamos el archivo y dejamos la importación en cola para el worker
+        # (python manage.py run_import_worker); el cliente consulta el avance con el id.
+        job = ImportJob.objects.create(file=file, created_by=request.user)
+        return Response(ImportJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=False, methods=['GET'], url_path=r'import/(?P<job_id>[0-9a-f-]+)', permission_classes=[IsAdminUser])
+    def import_status(self, request, job_id=None):
+        job = get_object_or_404(ImportJob, pk=job_id)
+        return Response(ImportJobSerializer(job).data)
+
+    @action(detail=True, methods=['POST'], url_path='add-participation')
+    def add_participation(self, request, pk=None):
+        volunteer = self.get_object()
+        serializer = StudyAssignmentSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            result = enroll(
+                serializer.validated_data['study_id'], Volunteer.objects.filter(pk=volunteer.pk),
+                request.user, serializer.validated_data['justification'],
+            )
+        except EnrollmentError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if result['skipped']:
+            return Response({"detail": result['skipped'][0]['detail']}, status=status.HTTP_400_BAD_REQUEST)
+
+        volunteer = self.get_queryset().get(pk=volunteer.pk)
+        return Response(VolunteerSerializer(volunteer).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['POST'], url_path='bulk-assign')
+    def bulk_assign(self, request):
+        # Inscribe una cohorte completa en un estudio con una sola petición
+        serializer = BulkAssignmentSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        if 'volunteer_ids' in data:
+            volunteers = Volunteer.objects.filter(pk__in=data['volunteer_ids'])
+        else:
+            volunteers = filter_volunteers(Volunteer.objects.all(), data['filters'])
+            volunteers = search_volunteers(volunteers, data['filters'].get('search', ''))
+
         try:
+            result = enroll(data['study_id'], volunteers, request.user, data['justification'])
+        except EnrollmentError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if 'volunteer_ids' in data:
+            found = set(result['enrolled']) | {s['id'] for s in result['skipped']}
+            result['not_found'] = sorted(set(data['volunteer_ids']) - found)
+        return Response(result)
+
+    @action(detail=False, methods=['GET'], url_path='duplicates', permission_classes=[IsAdminUser])
+    def duplicates(self, request):
+        # Grupos de posibles duplicados calculados por: python manage.py find_duplicates
+        pairs = DuplicatePair.objects.select_related('volunteer_a', 'volunteer_b').order_by('cluster', '-score')
+        if request.query_params.get('min_score'):
             try:
-                df = pd.read_excel(file)
-            except Exception:
-                return Response({"error": "El archivo no es un Excel válido (.xlsx)."}, status=status.HTTP_400_BAD_REQUEST)
-
-            # Normalizar columnas
-            df.columns = [str(c).lower().strip() for c in df.columns]
-
-            created_count = 0
-            errors = []
-            
-            # Regex CURP
-            curp_pattern = r'^[A-Z]{4}\d{6}[HM][A-Z]{5}[A-Z0-9]{2}$'
-
-            for index, row in df.iterrows():
-                row_num = index + 2 
-
-                try:
-                    # 1. Función de limpieza
-                    def clean(val): 
-                        if pd.isna(val): return ""
-                        return str(val).strip()
-
-                    # 2. Validaciones de CURP
-                    raw_curp = row.get('curp')
-                    curp = clean(raw_curp).upper() if raw_curp else None
-
-                    if not curp:
-                        errors.append(f"Fila {row_num}: La CURP es obligatoria.")
-                        continue
-
-                    if len(curp) != 18:
-                        errors.append(f"Fila {row_num}: La CURP '{curp}' debe tener 18 caracteres.")
-                        continue
-
-                    if not re.match(curp_pattern, curp):
-                        errors.append(f"Fila {row_num}: La CURP '{curp}' tiene formato inválido.")
-                        continue
-
-                    if Volunteer.objects.filter(curp=curp).exists():
-                        errors.append(f"Fila {row_num}: La CURP '{curp}' ya está registrada.")
-                        continue
-
-                    # 3. Datos del Voluntario
-                    first_name = clean(row.get('nombre', row.get('first_name')))
-                    paternal = clean(row.get('apellido paterno', row.get('last_name_paternal')))
-                    
-                    if not first_name or not paternal:
-                        errors.append(f"Fila {row_num}: Falta Nombre o Apellido Paterno.")
-                        continue
-
-                    # Sexo (Normalización)
-                    sex_val = clean(row.get('sexo', row.get('sex'))).upper()
-                    if sex_val.startswith('H'): sex_val = 'M'
-                    elif sex_val.startswith('M'): sex_val = 'F'
-                    if sex_val not in ['M', 'F']:
-                         # Si viene vacío o raro, asignamos None o reportamos error
-                         sex_val = None 
-
-                    # Fecha Nacimiento
-                    birth_date = None
-                    raw_date = row.get('fecha nacimiento', row.get('fecha de nacimiento'))
-                    if pd.notna(raw_date) and str(raw_date).strip() != '':
-                        try:
-                            birth_date = pd.to_datetime(raw_date).date()
-                        except:
-                            pass # Si falla, se queda en None
-
-                    # CÓDIGO (Importante: leerlo del excel si viene)
-                    provided_code = clean(row.get('codigo', row.get('code')))
-                    if not provided_code:
-                        provided_code = None # Dejar que el modelo lo autogenere
-                    elif Volunteer.objects.filter(code=provided_code).exists():
-                        errors.append(f"Fila {row_num}: El código '{provided_code}' ya existe.")
-                        continue
-
-                    # 4. Creación
-                    volunteer = Volunteer.objects.create(
-                        code=provided_code,
-                        first_name=first_name,
-                        middle_name=clean(row.get('segundo nombre', row.get('middle_name'))),
-                        last_name_paternal=paternal,
-                        last_name_maternal=clean(row.get('apellido materno', row.get('last_name_maternal'))),
-                        phone=clean(row.get('telefono', row.get('phone'))),
-                        sex=sex_val,
-                        curp=curp,
-                        birth_date=birth_date
-                        # ¡OJO! Eliminé 'email' porque tu modelo no lo tiene
-                    )
-                    created_count += 1
-
-                    # 5. ASIGNACIÓN DE ESTUDIOS (Opcional, basado en tu imagen)
-                    estudios_str = clean(row.get('estudios', row.get('studies')))
-                    if estudios_str:
-                        # Asumiendo formato: "Estudio A, Estudio B"
-                        names = [s.strip() for s in estudios_str.split(',') if s.strip()]
-                        for study_name in names:
-                            study = Study.objects.filter(name__iexact=study_name).first()
-                            if study:
-                                Participation.objects.get_or_create(
-                                    volunteer=volunteer,
-                                    study=study
-                                )
-                
-                except Exception as row_e:
-                    errors.append(f"Fila {row_num}: Error técnico - {str(row_e)}")
-
-            response_data = {
-                "message": "Proceso finalizado.",
-                "created": created_count,
-                "errors": errors,
-                "has_errors": len(errors) > 0
-            }
-            return Response(response_data, status=status.HTTP_200_OK)
-
-        except Exception as e:
-            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+                pairs = pairs.filter(score__gte=float(request.query_params['min_score']))
+            except ValueError:
+                return Response({"min_score": "Debe ser un número entre 0 y 1."}, status=status.HTTP_400_BAD_REQUEST)
+
+        clusters = {}
+        for pair in pairs:
+            cluster = clusters.setdefault(pair.cluster, {
+                'cluster': pair.cluster, 'score': pair.score, 'volunteers': {}, 'pairs': [],
+            })
+            cluster['score'] = max(cluster['score'], pair.score)
+            cluster['volunteers'].setdefault(pair.volunteer_a_id, pair.volunteer_a)
+            cluster['volunteers'].setdefault(pair.volunteer_b_id, pair.volunteer_b)
+            cluster['pairs'].append({
+                'volunteer_a': pair.volunteer_a_id, 'volunteer_b': pair.volunteer_b_id, 'score': pair.score,
+            })
+
+        results = sorted(clusters.values(), key=lambda c: (-c['score'], c['cluster']))
+        for cluster in results:
+            cluster['volunteers'] = DuplicateVolunteerSerializer(
+                sorted(cluster['volunteers'].values(), key=lambda v: v.id), many=True
+            ).data
+        return Response(results)
 
 class ParticipationViewSet(viewsets.ModelViewSet):
     queryset = Participation.objects.all()
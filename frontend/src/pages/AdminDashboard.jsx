@@ -11,6 +11,7 @@ const AdminDashboard = () => {
   const [studies, setStudies] = useState([]);
   const [users, setUsers] = useState([]);
   const [logs, setLogs] = useState([]);
+  const [logsNextUrl, setLogsNextUrl] = useState(null);
   const [loading, setLoading] = useState(false);
 
   // Estados de Modales
@@ -35,35 +36,51 @@ const AdminDashboard = () => {
     reset: resetUser,
   } = useForm();
 
+  // Procesar logs para visualización amigable
+  const processLogs = (rows) =>
+    rows.map((log) => ({
+      ...log,
+      action_display:
+        { CREATE: "Creación", UPDATE: "Edición", DELETE: "Eliminación" }[
+          log.action
+        ] || log.action,
+      model_display:
+        {
+          Volunteer: "Voluntario",
+          Study: "Estudio",
+          Participation: "Participación",
+          User: "Usuario",
+        }[log.model_affected] || log.model_affected,
+      date_display: new Date(log.timestamp).toLocaleString(),
+    }));
+
+  const loadMoreLogs = async () => {
+    if (!logsNextUrl) return;
+    try {
+      const res = await api.get(logsNextUrl);
+      setLogs((prev) => [...prev, ...processLogs(res.data.results)]);
+      setLogsNextUrl(res.data.next);
+    } catch (error) {
+      console.error("Error cargando más registros:", error);
+    }
+  };
+
   // Carga de Datos
   const loadData = async () => {
     setLoading(true);
     try {
       if (activeTab === "studies") {
-        const res = await api.get("studies/");
+        // Con los conteos de inscritos calculados en el servidor
+        const res = await api.get("studies/", { params: { with_stats: 1 } });
         setStudies(res.data);
       } else if (activeTab === "users") {
         const res = await api.get("admin/users/");
         setUsers(res.data);
       } else if (activeTab === "logs") {
+        // La bitácora está paginada por cursor: { next, previous, results }
         const res = await api.get("admin/logs/");
-        // Procesar logs para visualización amigable
-        const processedLogs = res.data.map((log) => ({
-          ...log,
-          action_display:
-            { CREATE: "Creación", UPDATE: "Edición", DELETE: "Eliminación" }[
-              log.action
-            ] || log.action,
-          model_display:
-            {
-              Volunteer: "Voluntario",
-              Study: "Estudio",
-              Participation: "Participación",
-              User: "Usuario",
-            }[log.model_affected] || log.model_affected,
-          date_display: new Date(log.timestamp).toLocaleString(),
-        }));
-        setLogs(processedLogs);
+        setLogs(processLogs(res.data.results));
+        setLogsNextUrl(res.data.next);
       }
     } catch (error) {
       console.error("Error cargando datos:", error);
@@ -248,6 +265,23 @@ const AdminDashboard = () => {
       label: "F. Pago",
       render: (r) => r.payment_date || "-",
     },
+    {
+      key: "enrolled",
+      label: "Inscritos",
+      render: (r) =>
+        r.stats ? (
+          <span className="text-xs">
+            <span className="font-bold">{r.stats.enrolled}</span>
+            <span className="text-gray-500">
+              {" "}
+              ({r.stats.female} M / {r.stats.male} H, {r.stats.in_washout} en
+              lavado)
+            </span>
+          </span>
+        ) : (
+          "-"
+        ),
+    },
     {
       key: "is_active",
       label: "Estado",
@@ -382,7 +416,19 @@ const AdminDashboard = () => {
           />
         )}
         {activeTab === "logs" && (
-          <SmartTable title="Bitácora" data={logs} columns={logCols} />
+          <>
+            <SmartTable title="Bitácora" data={logs} columns={logCols} />
+            {logsNextUrl && (
+              <div className="flex justify-center py-4">
+                <button
+                  onClick={loadMoreLogs}
+                  className="px-4 py-2 bg-white text-gray-700 border border-gray-300 rounded-lg hover:bg-gray-50 transition-all text-sm font-medium shadow-sm"
+                >
+                  Cargar más registros
+                </button>
+              </div>
+            )}
+          </>
         )}
       </div>
 
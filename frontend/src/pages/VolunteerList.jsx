@@ -15,6 +15,8 @@ import {
   X,
   AlertTriangle,
   CheckCircle,
+  Search,
+  Download,
 } from "lucide-react";
 import Modal from "../components/Modal";
 import SmartTable from "../components/SmartTable";
@@ -22,6 +24,20 @@ import { AuthContext } from "../context/AuthContext";
 import VolunteerForm from "./VolunteerForm";
 import ParticipationManager from "../components/ParticipationManager";
 
+// Sondeo de las importaciones en segundo plano
+const IMPORT_POLL_MS = 1500;
+const IMPORT_STALL_MS = 2 * 60 * 1000;
+
+// Cada pestaña se traduce a un filtro ?status= del servidor (computed_status)
+const TAB_STATUSES = {
+  aptos: "eligible",
+  en_estudio: "in_study",
+  asignado: "study_assigned",
+  por_aprobacion: "waiting_approval",
+  descanso: "standby",
+  rechazados: "rejected,age_mismatch",
+};
+
 const VolunteerList = () => {
   const { user } = useContext(AuthContext);
 
@@ -37,34 +53,117 @@ const VolunteerList = () => {
   const [showHistoryFor, setShowHistoryFor] = useState(null);
   const [importResults, setImportResults] = useState(null);
   const [isImportModalOpen, setIsImportModalOpen] = useState(false);
+  const [nextUrl, setNextUrl] = useState(null);
+  const [statusCounts, setStatusCounts] = useState({});
+  const [searchTerm, setSearchTerm] = useState("");
+  const [searchQuery, setSearchQuery] = useState("");
+
+  // Búsqueda en el servidor (nombre, código o CURP, sin importar acentos);
+  // esperamos a que dejen de teclear para no mandar una petición por letra
+  useEffect(() => {
+    const timeoutId = setTimeout(() => setSearchQuery(searchTerm.trim()), 300);
+    return () => clearTimeout(timeoutId);
+  }, [searchTerm]);
+
   // --- 1. CARGA DE DATOS (POLLING) ---
+  // El endpoint está paginado por cursor: { next, previous, results }
+  const processVolunteers = (rows) =>
+    rows.map((v) => ({
+      ...v,
+      full_name_search:
+        `${v.first_name} ${v.middle_name || ""} ${v.last_name_paternal} ${v.last_name_maternal}`.trim(),
+      study_names_filter: v.study_names || [],
+      raw_status: v.status, // Guardamos estatus original
+
+      // Datos calculados para filtros y ordenamiento
+      creation_date_fmt: new Date(v.created_at).toLocaleDateString(),
+      creation_year_filter: new Date(v.created_at).getFullYear().toString(),
+      code_year_filter: v.code ? v.code.split("-")[1] : "",
+      code_number_sort: v.code ? parseInt(v.code.split("-")[2] || 0) : 0,
+    }));
+
   const fetchVolunteers = useCallback(async (isBackground = false) => {
     if (!isBackground) setLoading(true);
 
     try {
-      const res = await api.get("volunteers/");
-
-      const processedData = res.data.map((v) => ({
-        ...v,
-        full_name_search:
-          `${v.first_name} ${v.middle_name || ""} ${v.last_name_paternal} ${v.last_name_maternal}`.trim(),
-        study_names_filter: v.participations?.map((p) => p.study_name) || [],
-        raw_status: v.status, // Guardamos estatus original
-
-        // Datos calculados para filtros y ordenamiento
-        creation_date_fmt: new Date(v.created_at).toLocaleDateString(),
-        creation_year_filter: new Date(v.created_at).getFullYear().toString(),
-        code_year_filter: v.code ? v.code.split("-")[1] : "",
-        code_number_sort: v.code ? parseInt(v.code.split("-")[2] || 0) : 0,
-      }));
-
-      setVolunteers(processedData);
+      const statusFilter = TAB_STATUSES[activeTab];
+      const searchParams = searchQuery ? { search: searchQuery } : {};
+      const [res, countsRes] = await Promise.all([
+        api.get("volunteers/", {
+          params: statusFilter
+            ? { ...searchParams, status: statusFilter }
+            : searchParams,
+        }),
+        api.get("volunteers/status-counts/", { params: searchParams }),
+      ]);
+      const firstPage = processVolunteers(res.data.results);
+      setStatusCounts(countsRes.data);
+
+      if (isBackground) {
+        // En el polling solo refrescamos la primera página y conservamos las ya cargadas
+        setVolunteers((prev) => {
+          const freshIds = new Set(firstPage.map((v) => v.id));
+          return [...firstPage, ...prev.filter((v) => !freshIds.has(v.id))];
+        });
+      } else {
+        setVolunteers(firstPage);
+        setNextUrl(res.data.next);
+      }
     } catch (error) {
       console.error("Error cargando voluntarios", error);
     } finally {
       if (!isBackground) setLoading(false);
     }
-  }, []);
+  }, [activeTab, searchQuery]);
+
+  // Descarga el listado completo con los filtros actuales (el servidor lo envía en streaming)
+  const handleExport = async () => {
+    try {
+      const statusFilter = TAB_STATUSES[activeTab];
+      const res = await api.get("volunteers/export/", {
+        params: {
+          format: "xlsx",
+          ...(searchQuery ? { search: searchQuery } : {}),
+          ...(statusFilter ? { status: statusFilter } : {}),
+        },
+        responseType: "blob",
+      });
+      const url = URL.createObjectURL(res.data);
+      const link = document.createElement("a");
+      link.href = url;
+      link.download = `voluntarios_${new Date().toISOString().slice(0, 10)}.xlsx`;
+      link.click();
+      URL.revokeObjectURL(url);
+    } catch (error) {
+      console.error("Error exportando voluntarios", error);
+      alert("No se pudo exportar el listado.");
+    }
+  };
+
+  const loadMoreVolunteers = async () => {
+    if (!nextUrl) return;
+    try {
+      const res = await api.get(nextUrl);
+      const page = processVolunteers(res.data.results);
+      setVolunteers((prev) => {
+        const loadedIds = new Set(prev.map((v) => v.id));
+        return [...prev, ...page.filter((v) => !loadedIds.has(v.id))];
+      });
+      setNextUrl(res.data.next);
+    } catch (error) {
+      console.error("Error cargando más voluntarios", error);
+    }
+  };
+
+  // El listado no trae participaciones anidadas; las pedimos al abrir el historial
+  const openHistory = async (row) => {
+    try {
+      const res = await api.get(`volunteers/${row.id}/`);
+      setShowHistoryFor({ ...row, participations: res.data.participations });
+    } catch (error) {
+      console.error("Error cargando historial", error);
+    }
+  };
 
   useEffect(() => {
     fetchVolunteers(false);
@@ -74,56 +173,23 @@ const VolunteerList = () => {
 
   // --- 2. LÓGICA DE FILTRADO Y CONTEOS ---
 
-  // Calculamos los totales para cada pestaña
+  // Totales por pestaña calculados en el servidor (un solo GROUP BY)
   const counts = useMemo(() => {
+    const c = statusCounts;
+    const total = Object.values(c).reduce((sum, n) => sum + n, 0);
     return {
-      todos: volunteers.length,
-      aptos: volunteers.filter((v) => v.raw_status === "Apto").length,
-      en_estudio: volunteers.filter((v) => v.raw_status === "En estudio")
-        .length,
-      asignado: volunteers.filter((v) => v.raw_status === "Estudio asignado")
-        .length,
-      por_aprobacion: volunteers.filter(
-        (v) => v.raw_status === "En espera por aprobación",
-      ).length,
-      descanso: volunteers.filter(
-        (v) => v.raw_status === "En espera (Descanso)",
-      ).length,
-      rechazados: volunteers.filter(
-        (v) =>
-          v.raw_status.includes("Rechazado") ||
-          v.raw_status.includes("No elegible"),
-      ).length,
+      todos: total,
+      aptos: c.eligible || 0,
+      en_estudio: c.in_study || 0,
+      asignado: c.study_assigned || 0,
+      por_aprobacion: c.waiting_approval || 0,
+      descanso: c.standby || 0,
+      rechazados: (c.rejected || 0) + (c.age_mismatch || 0),
     };
-  }, [volunteers]);
+  }, [statusCounts]);
 
-  // Filtramos la data para la tabla
-  const filteredData = useMemo(() => {
-    switch (activeTab) {
-      case "aptos":
-        return volunteers.filter((v) => v.raw_status === "Apto");
-      case "en_estudio":
-        return volunteers.filter((v) => v.raw_status === "En estudio");
-      case "asignado":
-        return volunteers.filter((v) => v.raw_status === "Estudio asignado");
-      case "por_aprobacion":
-        return volunteers.filter(
-          (v) => v.raw_status === "En espera por aprobación",
-        );
-      case "descanso":
-        return volunteers.filter(
-          (v) => v.raw_status === "En espera (Descanso)",
-        );
-      case "rechazados":
-        return volunteers.filter(
-          (v) =>
-            v.raw_status.includes("Rechazado") ||
-            v.raw_status.includes("No elegible"),
-        );
-      default:
-        return volunteers;
-    }
-  }, [volunteers, activeTab]);
+  // El servidor ya filtra por pestaña
+  const filteredData = volunteers;
 
   const getTableTitle = () => {
     const titles = {
@@ -176,8 +242,34 @@ const VolunteerList = () => {
         headers: { "Content-Type": "multipart/form-data" },
       });
 
+      // La importación corre en segundo plano: consultamos el trabajo hasta que termine.
+      // Si no avanza en IMPORT_STALL_MS (p. ej. no hay worker corriendo) dejamos de esperar.
+      let job = res.data;
+      let lastProgress = `${job.status}:${job.processed}`;
+      let lastChange = Date.now();
+      while (job.status === "pending" || job.status === "running") {
+        await new Promise((resolve) => setTimeout(resolve, IMPORT_POLL_MS));
+        job = (await api.get(`volunteers/import/${job.id}/`)).data;
+
+        const progress = `${job.status}:${job.processed}`;
+        if (progress !== lastProgress) {
+          lastProgress = progress;
+          lastChange = Date.now();
+        } else if (Date.now() - lastChange > IMPORT_STALL_MS) {
+          throw new Error(
+            job.status === "pending"
+              ? "La importación sigue en cola: el proceso de importación no está corriendo. Avise al administrador."
+              : "La importación dejó de avanzar. Revise su estado más tarde.",
+          );
+        }
+      }
+
+      if (job.status === "failed") {
+        throw new Error(job.error_message);
+      }
+
       // Guardamos resultados y abrimos el modal de reporte
-      setImportResults(res.data);
+      setImportResults({ ...job, message: "Proceso finalizado." });
       setIsImportModalOpen(true);
 
       fetchVolunteers(false); // Refrescamos la tabla de fondo
@@ -241,13 +333,13 @@ const VolunteerList = () => {
       filterOptions: studyOptions,
       render: (row) => (
         <div className="flex flex-wrap gap-1">
-          {row.participations && row.participations.length > 0 ? (
-            row.participations.map((p, index) => (
+          {row.study_names && row.study_names.length > 0 ? (
+            row.study_names.map((name, index) => (
               <span
                 key={index}
                 className="text-xs bg-gray-100 text-gray-600 px-2 py-1 rounded border border-gray-200 truncate max-w-[100px]"
               >
-                {p.study_name}
+                {name}
               </span>
             ))
           ) : (
@@ -359,7 +451,7 @@ const VolunteerList = () => {
             </button>
           )}
           <button
-            onClick={() => setShowHistoryFor(row)}
+            onClick={() => openHistory(row)}
             className="p-1.5 text-gray-400 hover:text-purple-600 hover:bg-purple-50 rounded"
             title="Historial Rápido"
           >
@@ -514,35 +606,67 @@ const VolunteerList = () => {
           data={filteredData}
           columns={columns}
           actions={
-            user?.isAdmin && (
-              <div className="flex gap-3">
+            <div className="flex gap-3">
+              <div className="relative">
+                <Search
+                  size={16}
+                  className="absolute left-3 top-1/2 -translate-y-1/2 text-gray-400"
+                />
                 <input
-                  type="file"
-                  accept=".xlsx, .xls"
-                  id="excel-upload"
-                  className="hidden"
-                  onChange={handleFileUpload}
+                  type="text"
+                  placeholder="Buscar nombre, código o CURP..."
+                  value={searchTerm}
+                  onChange={(e) => setSearchTerm(e.target.value)}
+                  className="pl-9 pr-3 py-2 border border-gray-300 rounded-lg text-sm focus:outline-none focus:ring-2 focus:ring-blue-500/30 focus:border-blue-500 w-64"
                 />
-                <button
-                  onClick={() =>
-                    document.getElementById("excel-upload").click()
-                  }
-                  className="flex items-center gap-2 px-3 py-2 bg-white text-gray-700 border border-gray-300 rounded-lg hover:bg-green-50 hover:text-green-700 hover:border-green-300 transition-all text-sm font-medium shadow-sm"
-                >
-                  <FileSpreadsheet size={16} />
-                  <span className="hidden sm:inline">Importar Excel</span>
-                </button>
-                <button
-                  onClick={handleCreate}
-                  className="flex items-center gap-2 px-4 py-2 bg-blue-600 text-white rounded-lg hover:bg-blue-700 transition-all text-sm font-bold shadow-md shadow-blue-600/20 active:scale-95"
-                >
-                  <Plus size={18} />
-                  <span>Nuevo Voluntario</span>
-                </button>
               </div>
-            )
+              <button
+                onClick={handleExport}
+                className="flex items-center gap-2 px-3 py-2 bg-white text-gray-700 border border-gray-300 rounded-lg hover:bg-gray-50 transition-all text-sm font-medium shadow-sm"
+              >
+                <Download size={16} />
+                <span className="hidden sm:inline">Exportar</span>
+              </button>
+              {user?.isAdmin && (
+                <div className="flex gap-3">
+                  <input
+                    type="file"
+                    accept=".xlsx, .csv"
+                    id="excel-upload"
+                    className="hidden"
+                    onChange={handleFileUpload}
+                  />
+                  <button
+                    onClick={() =>
+                      document.getElementById("excel-upload").click()
+                    }
+                    className="flex items-center gap-2 px-3 py-2 bg-white text-gray-700 border border-gray-300 rounded-lg hover:bg-green-50 hover:text-green-700 hover:border-green-300 transition-all text-sm font-medium shadow-sm"
+                  >
+                    <FileSpreadsheet size={16} />
+                    <span className="hidden sm:inline">Importar Excel</span>
+                  </button>
+                  <button
+                    onClick={handleCreate}
+                    className="flex items-center gap-2 px-4 py-2 bg-blue-600 text-white rounded-lg hover:bg-blue-700 transition-all text-sm font-bold shadow-md shadow-blue-600/20 active:scale-95"
+                  >
+                    <Plus size={18} />
+                    <span>Nuevo Voluntario</span>
+                  </button>
+                </div>
+              )}
+            </div>
           }
         />
+        {nextUrl && (
+          <div className="flex justify-center py-4">
+            <button
+              onClick={loadMoreVolunteers}
+              className="px-4 py-2 bg-white text-gray-700 border border-gray-300 rounded-lg hover:bg-gray-50 transition-all text-sm font-medium shadow-sm"
+            >
+              Cargar más voluntarios
+            </button>
+          </div>
+        )}
       </div>
 
       <Modal